@@ -1,7 +1,21 @@
-from fastapi import FastAPI
+import logging
+import os
+from dotenv import load_dotenv
+
+# Before the services and routers are imported: several of them read their settings at import time
+load_dotenv()
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from services.level_services import LevelServices
 from routers.level_routes import router as level_router, get_service_instance
+from services.executor import shutdown_executor
+from services.metrics import REGISTRY, MetricsMiddleware
+from services.profiler import create_profiler
+from services.response_cache import CachedJSON
+
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
 
 app = FastAPI()
 
@@ -14,19 +28,63 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency histograms and in-flight requests for /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Create a single instance of LevelServices
 level_service = LevelServices()
 
 # Register the instance with the router's getter function
 get_service_instance.service = level_service
 
+REGISTRY.gauge("word_game_ready", "1 once the word game has finished warming up.",
+               function=lambda: int(level_service.is_ready))
+REGISTRY.gauge("progress_players", "Players held by the progress store.",
+               function=lambda: len(level_service.progress))
+REGISTRY.gauge("event_subscribers", "Open /events streams.",
+               function=lambda: len(level_service.events))
+
+# Optional sampling profiler, enabled with PROFILER_ENABLED=1
+profiler = create_profiler()
+
 # Include the level router
 app.include_router(level_router)
 
+@app.on_event("startup")
+async def start_warmup():
+    # Serve /health immediately and build the word game off the request path
+    if level_service.warmup_mode == "background":
+        level_service.start_background_warmup()
+
+@app.on_event("shutdown")
+async def flush_progress():
+    # Write any progress still waiting for the write-behind flush
+    level_service.progress.close()
+    if level_service.is_ready:
+        level_service.word_game_service.close()
+    shutdown_executor()
+
+# Static payloads serialized once; clients revalidate with If-None-Match and get 304s
+ROOT_RESPONSE = CachedJSON({"message": "DataHunt API is running!"}, "public, max-age=3600")
+HEALTH_RESPONSES = {
+    ready: CachedJSON({"status": "healthy", "ready": ready}, "no-cache") for ready in (False, True)
+}
+
 @app.get("/")
-async def root():
-    return {"message": "DataHunt API is running!"}
+async def root(request: Request):
+    return ROOT_RESPONSE.response(request)
 
 @app.get("/health")
-async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+async def health_check(request: Request):
+    return HEALTH_RESPONSES[level_service.is_ready].response(request)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/profile", response_class=PlainTextResponse)
+async def profile(limit: int = 200, reset: bool = False):
+    """Collapsed stacks from the sampling profiler (flamegraph input)."""
+    if profiler is None:
+        return PlainTextResponse("Profiler disabled; set PROFILER_ENABLED=1\n", status_code=404)
+    return PlainTextResponse(profiler.report(limit, reset))
@@ -0,0 +1,56 @@
+"""Import-time and boot-time benchmark for the backend app.
+
+Usage (from backend/):
+    python -m benchmarks.bench_boot [--runs 5] [--output boot.json]
+
+Each run uses a fresh interpreter, so module caches do not hide import cost.
+"""
+import argparse
+import statistics
+from benchmarks.common import run_python, write_results
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import app
+print(time.perf_counter() - start)
+"""
+
+# Import the app, run the startup hooks and wait until the word game is ready
+BOOT_SNIPPET = """
+import asyncio, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+asyncio.run(app.app.router.startup())
+if app.level_service.warmup_mode == "lazy":
+    app.level_service.word_game_service
+while not app.level_service.is_ready:
+    time.sleep(0.001)
+print(imported - start, time.perf_counter() - start)
+"""
+
+
+def bench_mode(mode: str, runs: int) -> dict:
+    env = {"WORD_GAME_INIT": mode}
+    imports = [float(run_python(IMPORT_SNIPPET, env)) for _ in range(runs)]
+    boots = [tuple(map(float, run_python(BOOT_SNIPPET, env).split())) for _ in range(runs)]
+    return {
+        "import_ms": 1000 * statistics.median(imports),
+        "boot_import_ms": 1000 * statistics.median(b[0] for b in boots),
+        "ready_ms": 1000 * statistics.median(b[1] for b in boots),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = {mode: bench_mode(mode, args.runs) for mode in ("eager", "lazy", "background")}
+    write_results("boot", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
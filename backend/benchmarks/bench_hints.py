@@ -0,0 +1,70 @@
+"""Benchmark the IVF hint index against exact brute-force search.
+
+Usage (from backend/):
+    python -m benchmarks.bench_hints [--dim 100] [--sizes 1000 10000 100000] [--output hints.json]
+
+Reports build time, query latency and recall@k for synthetic clustered
+vocabularies of each size.
+"""
+import argparse
+
+import numpy as np
+
+from benchmarks.common import summarize, time_call, write_results
+from services.embedding_store import EmbeddingStore
+from services.hint_index import HintIndex
+
+
+def synthetic_store(size: int, dim: int, rng) -> EmbeddingStore:
+    # Clustered vectors look more like word embeddings than uniform noise does
+    centers = rng.standard_normal((max(1, size // 50), dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), size)] + 0.5 * rng.standard_normal((size, dim)).astype(np.float32)
+    store = EmbeddingStore(dim=dim, capacity=size)
+    store.add_many([f"w{i}" for i in range(size)], vectors)
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dim", type=int, default=100)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    results = {}
+    for size in args.sizes:
+        store = synthetic_store(size, args.dim, rng)
+        build = time_call(lambda: HintIndex(store), repeat=1)[0]
+        index = HintIndex(store)
+        queries = store.matrix[rng.choice(size, args.queries, replace=False)]
+
+        recalls = []
+        for query in queries:
+            exact = set(np.argsort(store.matrix @ query)[::-1][:args.k])
+            found = {int(word[1:]) for word, _ in index.query(query, args.k)}
+            recalls.append(len(exact & found) / args.k)
+
+        samples = []
+        for query in queries:
+            samples.extend(time_call(lambda: index.query(query, args.k), repeat=1))
+        brute = []
+        for query in queries:
+            brute.extend(time_call(lambda: np.argpartition(store.matrix @ query, -args.k)[-args.k:], repeat=1))
+
+        results[str(size)] = {
+            "n_lists": index.n_lists,
+            "n_probe": index.n_probe,
+            "build_ms": 1000 * build,
+            "query": summarize(samples),
+            "brute_force": summarize(brute),
+            f"recall_at_{args.k}": float(np.mean(recalls)),
+        }
+
+    write_results("hints", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
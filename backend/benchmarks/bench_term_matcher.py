@@ -0,0 +1,97 @@
+"""Microbenchmark: compiled term matcher versus the linear substring loop.
+
+Usage (from backend/):
+    python -m benchmarks.bench_term_matcher [--guesses 2000] [--output matcher.json]
+
+Compares the Aho-Corasick TermMatcher with the original ``term in guess``
+loop for term tables of 16, 1k and 10k entries, and the PrefixTrie with
+the character-by-character common-prefix loop.
+"""
+import argparse
+import random
+import string
+import time
+
+from benchmarks.common import write_results
+from services.term_matcher import PrefixTrie, TermMatcher
+
+SPY_TERMS = {
+    "spy": 90.0, "secret": 75.0, "agent": 85.0, "intelligen": 80.0,
+    "cover": 80.0, "surveillance": 85.0, "reconn": 70.0, "infiltrat": 80.0,
+    "stealth": 65.0, "decept": 70.0, "crypt": 50.0, "secur": 60.0,
+    "mission": 65.0, "shadow": 60.0, "covert": 85.0, "classified": 75.0
+}
+
+
+def random_word(rng: random.Random, low: int = 4, high: int = 12) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(low, high)))
+
+
+def term_table(size: int, rng: random.Random) -> dict:
+    terms = dict(SPY_TERMS)
+    while len(terms) < size:
+        terms[random_word(rng, 4, 10)] = float(rng.randint(20, 90))
+    return terms
+
+
+def loop_best_match(terms: dict, guess: str):
+    # The original scoring loop: test every term with `in`
+    for term, sim in terms.items():
+        if term in guess:
+            return term, sim
+    return None
+
+
+def loop_common_prefix(word1: str, word2: str) -> int:
+    common_prefix_length = 0
+    for i in range(min(len(word1), len(word2))):
+        if word1[i] == word2[i]:
+            common_prefix_length += 1
+        else:
+            break
+    return common_prefix_length
+
+
+def per_call_us(fn, guesses) -> float:
+    start = time.perf_counter()
+    for guess in guesses:
+        fn(guess)
+    return 1e6 * (time.perf_counter() - start) / len(guesses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--guesses", type=int, default=2000)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    # Mostly misses, like real traffic that reaches the fallback path
+    guesses = [random_word(rng) for _ in range(args.guesses)] + list(SPY_TERMS)
+
+    results = {"terms": {}, "prefix": {}}
+    for size in (16, 1000, 10000):
+        terms = term_table(size, rng)
+        start = time.perf_counter()
+        matcher = TermMatcher(terms)
+        build_ms = 1000 * (time.perf_counter() - start)
+        results["terms"][str(size)] = {
+            "loop_us": per_call_us(lambda g: loop_best_match(terms, g), guesses),
+            "matcher_us": per_call_us(matcher.best_match, guesses),
+            "matcher_build_ms": build_ms,
+        }
+
+    for size in (16, 1000, 10000):
+        vocabulary = list(term_table(size, rng))
+        trie = PrefixTrie(vocabulary + ["espionage"])
+        results["prefix"][str(size)] = {
+            "loop_us": per_call_us(lambda g: loop_common_prefix("espionage", g), guesses),
+            "trie_us": per_call_us(lambda g: trie.common_prefix_length(g, "espionage"), guesses),
+            "trie_longest_prefix_us": per_call_us(trie.longest_prefix, guesses),
+        }
+
+    write_results("term_matcher", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
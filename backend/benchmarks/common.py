@@ -0,0 +1,83 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+# Benchmarks are run from the backend directory: python -m benchmarks.<name>
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of the samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples: List[float], elapsed: Optional[float] = None) -> Dict[str, float]:
+    """Summarize latency samples (seconds) as milliseconds, plus throughput if elapsed is given."""
+    summary = {
+        "count": len(samples),
+        "mean_ms": 1000 * sum(samples) / len(samples) if samples else 0.0,
+        "p50_ms": 1000 * percentile(samples, 50),
+        "p95_ms": 1000 * percentile(samples, 95),
+        "p99_ms": 1000 * percentile(samples, 99),
+        "max_ms": 1000 * max(samples) if samples else 0.0,
+    }
+    if elapsed:
+        summary["throughput_rps"] = len(samples) / elapsed
+    return summary
+
+
+def time_call(fn, repeat: int = 1000) -> List[float]:
+    """Time repeated calls of fn, one sample per call."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def run_python(code: str, env: Optional[Dict[str, str]] = None) -> str:
+    """Run a snippet in a fresh interpreter from the backend directory and return its stdout."""
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **(env or {})},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout.strip()
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_results(name: str, results: Dict[str, Any], output: Optional[str] = None) -> None:
+    """Print the results and save them as JSON together with run metadata."""
+    payload = {
+        "benchmark": name,
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    text = json.dumps(payload, indent=2)
+    print(text)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
@@ -0,0 +1,123 @@
+"""Concurrent load test for the backend, driven in process over the ASGI transport.
+
+Usage (from backend/):
+    python -m benchmarks.load_test [--players 200] [--guesses 10] [--output load.json]
+
+Every simulated player runs the level flow with its requests fired
+concurrently, including both logic-gate circuits at once. Afterwards each
+player's progress is checked, so lost updates to completed levels or
+solved circuits fail the run.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.common import summarize, write_results
+
+GUESSES = ["spy", "agent", "secret", "covert", "shadow", "cipher", "mission", "tango", "secure", "stealth"]
+CIRCUITS = {
+    "circuit1": ["NOT", "AND", "OR"],
+    "circuit2": ["NAND", "OR", "NOR"],
+}
+ACCESS_PATTERN_ANSWERS = ["Unauthorized", "Unauthorized", "Authorized", "Unauthorized"]
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors = 0
+
+    async def request(self, client: httpx.AsyncClient, method: str, url: str, route: str = None, **kwargs):
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.samples[route or url].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors += 1
+        return response
+
+
+async def play(client: httpx.AsyncClient, recorder: Recorder, player_id: str, guesses: int) -> None:
+    headers = {"X-Player-ID": player_id}
+    for level_id in (1, 2):
+        await recorder.request(client, "POST", "/solution", json={"level_id": level_id}, headers=headers)
+
+    session = (await recorder.request(client, "POST", "/word-game/start", headers=headers)).json()
+    guess_words = [GUESSES[i % len(GUESSES)] for i in range(guesses)] + ["espionage"]
+    await asyncio.gather(*(
+        recorder.request(client, "POST", "/word-game/guess", headers=headers,
+                         json={"session_id": session["session_id"], "guess": word})
+        for word in guess_words
+    ))
+
+    # Both circuits and the access patterns race each other on purpose
+    await asyncio.gather(
+        *(recorder.request(client, "POST", "/logic-gates/check", headers=headers,
+                           json={"circuit_id": circuit_id, "sequence": sequence})
+          for circuit_id, sequence in CIRCUITS.items()),
+        recorder.request(client, "POST", "/access-patterns/check", headers=headers,
+                         json={"answers": ACCESS_PATTERN_ANSWERS}),
+        recorder.request(client, "GET", "/levels", headers=headers),
+    )
+
+
+async def run(players: int, guesses: int) -> dict:
+    import app
+
+    await app.app.router.startup()
+    transport = httpx.ASGITransport(app=app.app)
+    recorder = Recorder()
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+        # Wait for the word game warm-up so it is not part of the measurement
+        await client.post("/word-game/start")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(play(client, recorder, f"player-{i}", guesses) for i in range(players)))
+        elapsed = time.perf_counter() - start
+
+        lost_updates = []
+        for i in range(players):
+            headers = {"X-Player-ID": f"player-{i}"}
+            levels = (await client.get("/levels", headers=headers)).json()
+            circuits = (await client.post("/logic-gates/check", headers=headers,
+                                          json={"circuit_id": "circuit1", "sequence": []})).json()
+            if levels["completed"] != [1, 2, 3, 4, 5] or not circuits["all_circuits_solved"]:
+                lost_updates.append({"player": f"player-{i}", "levels": levels, "circuits": circuits})
+    await app.app.router.shutdown()
+
+    all_samples = [s for samples in recorder.samples.values() for s in samples]
+    return {
+        "players": players,
+        "guesses_per_player": guesses,
+        "errors": recorder.errors,
+        "lost_updates": len(lost_updates),
+        "lost_update_examples": lost_updates[:5],
+        "overall": summarize(all_samples, elapsed),
+        "routes": {route: summarize(samples) for route, samples in sorted(recorder.samples.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--guesses", type=int, default=10)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    # Every simulated player shares one client address; throttling would only measure the limiter
+    os.environ.setdefault("GUESS_SESSION_RATE_LIMIT", "0")
+    os.environ.setdefault("GUESS_IP_RATE_LIMIT", "0")
+
+    results = asyncio.run(run(args.players, args.guesses))
+    write_results("load_test", results, args.output)
+    if results["lost_updates"] or results["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
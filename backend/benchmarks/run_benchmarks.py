@@ -0,0 +1,180 @@
+"""Reproducible benchmark suite for the backend.
+
+Usage (from backend/):
+    python -m benchmarks.run_benchmarks [--scale 1.0] [--output results.json] [--compare previous.json]
+
+Drives ``app.app`` in process over the httpx ASGI transport (no network)
+with realistic player flows, then runs micro-benchmarks of the word game
+hot paths. Results are written as JSON; ``--compare`` prints the change
+of every p50/p99 and throughput figure against an earlier run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.common import summarize, time_call, write_results
+
+GUESS_POOL = ["spy", "secret", "agent", "covert", "spyy", "agnet", "cipher", "shadow", "mission",
+              "surveillance", "intelligence", "stealth", "decoy", "banana", "tango", "secrets"]
+CIRCUITS = {
+    "circuit1": ["NOT", "AND", "OR"],
+    "circuit2": ["NAND", "OR", "NOR"],
+}
+ACCESS_PATTERN_ANSWERS = ["Unauthorized", "Unauthorized", "Authorized", "Unauthorized"]
+
+
+async def timed_requests(client: httpx.AsyncClient, requests: List[dict], concurrency: int,
+                         responses: Optional[List[httpx.Response]] = None) -> dict:
+    """Send the requests with bounded concurrency and summarize their latency.
+
+    When a responses list is given it is filled with the responses in request order.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: List[float] = []
+    errors = 0
+    if responses is not None:
+        responses.extend([None] * len(requests))
+
+    async def send(index, request):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(**request)
+            samples.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+            if responses is not None:
+                responses[index] = response
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send(i, request) for i, request in enumerate(requests)))
+    summary = summarize(samples, time.perf_counter() - start)
+    summary["errors"] = errors
+    return summary
+
+
+async def run_flows(scale: float, concurrency: int) -> Dict[str, dict]:
+    import app
+
+    rng = random.Random(1234)
+    players = [f"bench-{i}" for i in range(max(1, int(200 * scale)))]
+    await app.app.router.startup()
+    results = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app.app), base_url="http://bench") as client:
+        # Wait for the word game warm-up so it is not part of any flow
+        await client.post("/word-game/start")
+
+        results["levels_polling"] = await timed_requests(client, [
+            {"method": "GET", "url": "/levels", "headers": {"X-Player-ID": rng.choice(players)}}
+            for _ in range(int(2000 * scale))
+        ], concurrency)
+
+        started: List[httpx.Response] = []
+        results["word_game_start"] = await timed_requests(client, [
+            {"method": "POST", "url": "/word-game/start"} for _ in players
+        ], concurrency, responses=started)
+        sessions = [response.json()["session_id"] for response in started]
+
+        # Bursts of guesses per session, skewed towards a few popular words
+        results["word_game_guess_burst"] = await timed_requests(client, [
+            {"method": "POST", "url": "/word-game/guess",
+             "json": {"session_id": session_id, "guess": rng.choice(GUESS_POOL[:rng.randint(3, len(GUESS_POOL))])},
+             "headers": {"X-Player-ID": player}}
+            for player, session_id in zip(players, sessions) for _ in range(20)
+        ], concurrency)
+
+        results["logic_gates"] = await timed_requests(client, [
+            {"method": "POST", "url": "/logic-gates/check", "headers": {"X-Player-ID": player},
+             "json": {"circuit_id": circuit_id, "sequence": sequence if rng.random() < 0.5 else sequence[::-1]}}
+            for player in players for circuit_id, sequence in CIRCUITS.items()
+        ], concurrency)
+
+        results["access_patterns"] = await timed_requests(client, [
+            {"method": "POST", "url": "/access-patterns/check", "headers": {"X-Player-ID": player},
+             "json": {"answers": ACCESS_PATTERN_ANSWERS if rng.random() < 0.5 else ACCESS_PATTERN_ANSWERS[::-1]}}
+            for player in players
+        ], concurrency)
+    await app.app.router.shutdown()
+    return results
+
+
+def run_micro(scale: float) -> Dict[str, dict]:
+    from services.word_game_services import WordGameService
+
+    service = WordGameService()
+    rng = random.Random(99)
+    guesses = [rng.choice(GUESS_POOL) for _ in range(int(5000 * scale))]
+    results = {}
+
+    def cold():
+        service.similarity_cache.clear()
+        service._calculate_similarity("espionage", rng.choice(guesses))
+
+    results["calculate_similarity_cold"] = summarize(time_call(cold, repeat=len(guesses)))
+    results["calculate_similarity_warm"] = summarize(
+        time_call(lambda: service._calculate_similarity("espionage", rng.choice(guesses)), repeat=len(guesses)))
+
+    vocabulary = list(service.embeddings.words)
+    results["initialize_with_mock_data"] = summarize(
+        time_call(lambda: service._initialize_with_mock_data(vocabulary), repeat=max(5, int(50 * scale))))
+    large_vocabulary = vocabulary + [f"word{i}" for i in range(int(5000 * scale))]
+    results["initialize_with_mock_data_large"] = summarize(
+        time_call(lambda: service._initialize_with_mock_data(large_vocabulary), repeat=3))
+    results["initialize_with_mock_data_large"]["words"] = len(large_vocabulary)
+
+    # Restore the normal vocabulary before timing sessions
+    service._initialize_with_mock_data(vocabulary)
+    results["start_game"] = summarize(time_call(service.start_game, repeat=int(2000 * scale)))
+    return results
+
+
+def compare(current: dict, previous_path: str) -> None:
+    with open(previous_path) as f:
+        previous = json.load(f)
+    print(f"\nChange against {previous.get('revision', previous_path)}:")
+    for group in ("flows", "micro"):
+        for name, summary in current[group].items():
+            before = previous["results"].get(group, {}).get(name)
+            if not before:
+                continue
+            for field in ("p50_ms", "p99_ms", "throughput_rps"):
+                if field in summary and before.get(field):
+                    change = 100.0 * (summary[field] - before[field]) / before[field]
+                    print(f"  {group}.{name}.{field}: {before[field]:.4f} -> {summary[field]:.4f} ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for the amount of work")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--output", help="JSON file for the results")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    # Fixed, isolated configuration so runs are comparable between commits
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("WORD_GAME_INIT", "eager")
+    os.environ.setdefault("SESSION_STORE", "memory")
+    os.environ.setdefault("GUESS_SESSION_RATE_LIMIT", "0")
+    os.environ.setdefault("GUESS_IP_RATE_LIMIT", "0")
+    # Empty rather than unset, so load_dotenv cannot pick a key up from .env
+    os.environ["GEMINI_API_KEY"] = ""
+    os.environ.pop("PROGRESS_DB_PATH", None)
+
+    results = {
+        "flows": asyncio.run(run_flows(args.scale, args.concurrency)),
+        "micro": run_micro(args.scale),
+    }
+    write_results("suite", results, args.output)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
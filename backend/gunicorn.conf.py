@@ -0,0 +1,28 @@
+"""gunicorn settings: uvicorn workers sharing one embedding snapshot.
+
+Usage (from backend/):
+    gunicorn app:app -c gunicorn.conf.py
+
+The master builds the word game embeddings and hint index once into
+memory-mapped files in SHARED_STATE_DIR before forking; every worker then
+attaches to the same read-only pages instead of building a private copy.
+"""
+import os
+import tempfile
+from dotenv import load_dotenv
+
+# The master builds the shared state, so it needs the same settings as the app
+load_dotenv()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+
+def on_starting(server):
+    # Set before forking, so every worker inherits it; an empty value (e.g. from .env) counts as unset
+    if not os.environ.get("SHARED_STATE_DIR"):
+        os.environ["SHARED_STATE_DIR"] = os.path.join(tempfile.gettempdir(), "datahunt-shared-state")
+    from services.word_game_services import build_shared_state
+    build_shared_state()
+    server.log.info("Shared word game state ready in %s", os.environ["SHARED_STATE_DIR"])
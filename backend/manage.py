@@ -0,0 +1,85 @@
+"""Offline maintenance commands for the DataHunt backend.
+
+Usage (from backend/):
+    python manage.py <command> [options]
+"""
+import argparse
+import sys
+from dotenv import load_dotenv
+
+
+def build_similarity_table(args):
+    """Build the multi-target similarity table loaded through SIMILARITY_TABLE_DIR."""
+    from services.similarity_table import SimilarityTable, read_word_list
+    from services.word_game_services import WordGameService
+
+    service = WordGameService()
+    vocabulary = read_word_list(args.vocabulary) if args.vocabulary else list(service.embeddings)
+    targets = read_word_list(args.targets) if args.targets else ["espionage"]
+    # Words with hand-tuned or precomputed scores for a target get a column too
+    scored = [word for target in targets for word in service.similarity_matrix.get(target, {})]
+    vocabulary = list(dict.fromkeys(vocabulary + targets + scored))
+
+    service.add_vocabulary(vocabulary)
+    table = SimilarityTable.build(
+        args.output, service.embeddings, vocabulary, targets,
+        overrides=service.similarity_matrix, chunk_size=args.chunk_size,
+    )
+    print(f"Wrote {len(table.targets)} targets x {len(table.vocabulary)} words to {args.output}")
+
+
+def analyze_guesses(args):
+    """Aggregate guess logs and learn scores for the most common unmatched guesses."""
+    import json
+    from services.guess_analytics import GuessStats, iter_guess_chunks, recalibrate
+    from services.word_game_services import WordGameService
+
+    stats = GuessStats(capacity=args.capacity, max_sessions=args.max_sessions)
+    for chunk in iter_guess_chunks(args.logs, chunk_size=args.chunk_size):
+        stats.add_chunk(*chunk)
+
+    service = WordGameService()
+    overrides, report = recalibrate(stats, service, top=args.top, min_count=args.min_count,
+                                    existing=service.similarity_overrides)
+    with open(args.output, "w") as f:
+        json.dump(overrides, f, indent=2, sort_keys=True)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    precomputed = sum(target["precomputed"] for target in report["targets"].values())
+    learned = sum(target["learned"] for target in report["targets"].values())
+    print(f"Read {stats.total} guesses from {stats.solved_sessions} solved sessions; "
+          f"wrote {precomputed} new scores ({learned} learned from the logs) to {args.output}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build-similarity-table", help=build_similarity_table.__doc__)
+    build.add_argument("--vocabulary", help="File with one vocabulary word per line (default: built-in words)")
+    build.add_argument("--targets", help="File with one target word per line, in rotation order (default: espionage)")
+    build.add_argument("--output", default="similarity_table", help="Output directory")
+    build.add_argument("--chunk-size", type=int, default=256, help="Targets scored per block")
+    build.set_defaults(handler=build_similarity_table)
+
+    analyze = commands.add_parser("analyze-guesses", help=analyze_guesses.__doc__)
+    analyze.add_argument("logs", nargs="+", help="Guess logs: JSON lines (GUESS_LOG_PATH) or CSV, optionally .gz")
+    analyze.add_argument("--output", default="similarity_overrides.json",
+                         help="Overrides file, loaded through SIMILARITY_OVERRIDES")
+    analyze.add_argument("--report", help="Optional JSON file with per-target statistics")
+    analyze.add_argument("--top", type=int, default=1000, help="Unmatched guesses to precompute per target")
+    analyze.add_argument("--min-count", type=int, default=2, help="Ignore guesses seen fewer times")
+    analyze.add_argument("--chunk-size", type=int, default=100000, help="Log records processed per chunk")
+    analyze.add_argument("--capacity", type=int, default=200000, help="Distinct guesses tracked at most")
+    analyze.add_argument("--max-sessions", type=int, default=100000,
+                         help="Unsolved sessions tracked at most while learning from convergence")
+    analyze.set_defaults(handler=analyze_guesses)
+
+    args = parser.parse_args(argv)
+    load_dotenv()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,65 @@
-from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+import hmac
+import logging
+import math
+import os
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Callable, List, Optional, Dict, Any
+from typing import Callable, List, Optional, Dict, Any, Tuple
 from services.level_services import LevelServices  # Change to absolute import
+from services.progress_store import DEFAULT_PLAYER
+from services.executor import Coalescer, run_blocking
+from services.metrics import REGISTRY
+from services.rate_limiter import RateLimiter, create_rate_limiter
+from services.response_cache import CachedJSON, ResponseCache
+from services.session_store import SessionStoreBusy
+from services.progress_events import format_event
+
+logger = logging.getLogger(__name__)
+
+# Idle event streams get a comment this often so proxies keep them open
+EVENTS_KEEPALIVE_SECONDS = 15.0
+
+# Proxies in front of the app that append to X-Forwarded-For (e.g. 1 for Heroku's router); 0 ignores the header
+_forwarded = os.getenv("TRUST_FORWARDED_FOR", "").lower()
+TRUSTED_PROXY_HOPS = int(_forwarded) if _forwarded.isdigit() else int(_forwarded in ("true", "yes"))
+
+# Submissions accepted by one /batch/check request
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "100"))
+# Lets /batch/check items name other players (e.g. a proctor grading a room); unset, items check the caller only
+PROCTOR_TOKEN = os.getenv("PROCTOR_TOKEN", "")
+
+# Guess throttling: per session and per client IP token buckets (GUESS_*_RATE_LIMIT / _BURST)
+guess_session_limiter = create_rate_limiter("guess_session", default_rate=5.0, default_burst=10.0)
+# Off by default without a trusted proxy: behind an untrusted proxy every player shares its IP
+guess_ip_limiter = create_rate_limiter("guess_ip", default_rate=50.0 if TRUSTED_PROXY_HOPS else 0.0,
+                                       default_burst=100.0)
+
+# Runtime embeddings are paid provider calls: past these buckets a guess gets the heuristic score instead
+embedding_session_limiter = create_rate_limiter("guess_embedding_session", default_rate=0.5, default_burst=30.0)
+# On even behind an untrusted proxy: players sharing its IP lose embeddings, not guesses
+embedding_ip_limiter = create_rate_limiter("guess_embedding_ip", default_rate=5.0, default_burst=100.0)
+
+# Concurrent identical guesses on one session share a single scoring call
+guess_coalescer = Coalescer()
+
+# Serialized once: the word list never changes, and neither does a session's target
+_words_response: Optional[CachedJSON] = None
+reveal_responses = ResponseCache(max_entries=int(os.getenv("SESSION_MAX", "10000")))
+
+RATE_LIMITED = REGISTRY.counter("guess_rate_limited_total", "Guesses rejected with 429, by limit.", ("limit",))
+EMBEDDING_LIMITED = REGISTRY.counter("guess_embedding_limited_total",
+                                     "Guesses scored without a runtime embedding, by limit.", ("limit",))
+REGISTRY.counter("guess_coalesced_total", "Guesses answered by an identical in-flight request.",
+                 function=lambda: guess_coalescer.coalesced)
 
 # Create a function that will hold our service instance
 class ServiceProvider:
     def __init__(self):
         self.service = None
     
-    def __call__(self):
+    async def __call__(self):
         if self.service is None:
             # Fallback to a new instance if not set (shouldn't happen in production)
             self.service = LevelServices()
@@ -19,6 +70,10 @@ get_service_instance = ServiceProvider()
 
 router = APIRouter()
 
+async def get_player_id(x_player_id: Optional[str] = Header(None)) -> str:
+    """Identify the player from the X-Player-ID header."""
+    return (x_player_id or "").strip() or DEFAULT_PLAYER
+
 class SolutionRequest(BaseModel):
     level_id: int
     dev_mode: bool = False
@@ -35,77 +90,250 @@ class LogicGateRequest(BaseModel):
 class AccessPatternRequest(BaseModel):
     answers: List[str]
 
+class CircuitSubmission(BaseModel):
+    circuit_id: str
+    sequence: List[str]
+    player_id: Optional[str] = None  # Defaults to the X-Player-ID of the request; others need X-Proctor-Token
+
+class PatternSubmission(BaseModel):
+    answers: List[str]
+    player_id: Optional[str] = None  # Defaults to the X-Player-ID of the request; others need X-Proctor-Token
+
+class BatchCheckRequest(BaseModel):
+    circuits: List[CircuitSubmission] = []
+    patterns: List[PatternSubmission] = []
+
+async def _progress_call(level_service: LevelServices, fn: Callable, *args):
+    """Run a progress operation inline, or on the executor when it may touch the database."""
+    if level_service.progress.db_path:
+        return await run_blocking(fn, *args)
+    return fn(*args)
+
+def _client_ip(request: Request) -> str:
+    if TRUSTED_PROXY_HOPS:
+        # Each trusted proxy appends the address it saw, so entries further left can be forged by the client
+        hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+        if len(hops) >= TRUSTED_PROXY_HOPS:
+            return hops[-TRUSTED_PROXY_HOPS]
+    return request.client.host if request.client else "unknown"
+
+async def _take_token(limiter: Optional[RateLimiter], key: str) -> Tuple[bool, float]:
+    if limiter is None:
+        return True, 0.0
+    if limiter.blocking:
+        return await run_blocking(limiter.allow, key)
+    return limiter.allow(key)
+
+async def _check_rate_limit(limiter: Optional[RateLimiter], name: str, key: str):
+    """Raise 429 with a Retry-After header once a key has used up its bucket."""
+    allowed, retry_after = await _take_token(limiter, key)
+    if not allowed:
+        RATE_LIMITED.inc(limit=name)
+        raise HTTPException(status_code=429, detail="Too many guesses, slow down",
+                            headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+def _is_proctor(token: Optional[str]) -> bool:
+    return bool(PROCTOR_TOKEN) and token is not None and hmac.compare_digest(token.encode(), PROCTOR_TOKEN.encode())
+
+async def _embedding_allowed(ip: str, session_id: str) -> bool:
+    """Whether a guess may trigger a runtime embedding, within the per IP and per session caps."""
+    for limiter, name, key in ((embedding_ip_limiter, "ip", ip), (embedding_session_limiter, "session", session_id)):
+        if not (await _take_token(limiter, key))[0]:
+            EMBEDDING_LIMITED.inc(limit=name)
+            return False
+    return True
+
+async def _word_game(level_service: LevelServices):
+    """The word game service; waits for it on the event loop while it is still warming up.
+    
+    Waiting requests hold no executor thread, so progress calls are not queued behind them.
+    """
+    if level_service.is_ready:
+        return level_service.word_game_service
+    return await level_service.wait_until_ready()
+
 @router.post("/solution")
-def check_solution(request: SolutionRequest, level_service: LevelServices = Depends(get_service_instance)):
+async def check_solution(request: SolutionRequest, player_id: str = Depends(get_player_id),
+                         level_service: LevelServices = Depends(get_service_instance)):
     # Allow level access in dev mode
-    if not request.dev_mode and not level_service.is_level_available(request.level_id):
+    if not request.dev_mode and not await _progress_call(
+            level_service, level_service.is_level_available, request.level_id, player_id):
         raise HTTPException(status_code=403, detail="Level not available yet")
     
-    if level_service.check_solution(request.level_id):
+    if await _progress_call(level_service, level_service.check_solution, request.level_id, player_id):
         next_level = request.level_id + 1 if request.level_id < level_service.total_levels else None
         return {"message": "Correct! Proceed to the next level.", "next_level": next_level}
     
     return {"message": "Invalid solution"}
 
 @router.get("/levels")
-def get_levels(level_service: LevelServices = Depends(get_service_instance)):
-    completed = list(level_service.get_completed_levels())
+async def get_levels(player_id: str = Depends(get_player_id),
+                     level_service: LevelServices = Depends(get_service_instance)):
+    completed = sorted(await _progress_call(level_service, level_service.get_completed_levels, player_id))
     # Use the get_available_levels method instead of the list comprehension
-    available = level_service.get_available_levels()
+    available = await _progress_call(level_service, level_service.get_available_levels, player_id)
     
     return {
         "completed": completed,
         "available": available
     }
 
+@router.get("/leaderboard")
+async def get_leaderboard(limit: int = Query(10, ge=1, le=100),
+                          level_service: LevelServices = Depends(get_service_instance)):
+    """Players ranked by levels completed, then by who got there first."""
+    return {"leaderboard": level_service.leaderboard.top(limit), "players": len(level_service.leaderboard)}
+
+@router.get("/events")
+async def stream_events(player_id: Optional[str] = Query(None), limit: int = Query(10, ge=1, le=100),
+                        header_player_id: str = Depends(get_player_id),
+                        level_service: LevelServices = Depends(get_service_instance)):
+    """Server-Sent Events stream of progress and leaderboard changes.
+    
+    EventSource cannot send headers, so the player may also be given as
+    ?player_id=. The stream opens with a snapshot of the player's progress
+    and the leaderboard, then carries "progress" events for that player and
+    "leaderboard" events for everyone.
+    """
+    player_id = (player_id or "").strip() or header_player_id
+    
+    async def stream():
+        # Subscribed only once the response streams, so a client gone before then leaves no queue behind
+        subscription = level_service.events.subscribe(player_id)
+        try:
+            # Taken after subscribing: changes made meanwhile arrive as events rather than being missed
+            snapshot = await _progress_call(level_service, level_service.progress_snapshot, player_id)
+            yield format_event("progress", snapshot)
+            yield format_event("snapshot", {"leaderboard": level_service.leaderboard.top(limit)})
+            while True:
+                try:
+                    data = await asyncio.wait_for(subscription.queue.get(), EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if data is None:
+                    # Too slow to keep up; the client reconnects for a fresh snapshot
+                    return
+                yield data
+        finally:
+            level_service.events.unsubscribe(subscription)
+    
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 # Word Game Routes
 @router.post("/word-game/start")
-def start_word_game(level_service: LevelServices = Depends(get_service_instance)):
+async def start_word_game(level_service: LevelServices = Depends(get_service_instance)):
     """Start a new word guessing game session."""
-    return level_service.word_game_service.start_game()
+    word_game_service = await _word_game(level_service)
+    return await run_blocking(word_game_service.start_game)
 
 @router.post("/word-game/guess")
-def guess_word(request: WordGuessRequest, level_service: LevelServices = Depends(get_service_instance)):
+async def guess_word(request: WordGuessRequest, http_request: Request, player_id: str = Depends(get_player_id),
+                     level_service: LevelServices = Depends(get_service_instance)):
     """Process a word guess and return similarity."""
-    result = level_service.word_game_service.check_guess(request.session_id, request.guess)
+    client_ip = _client_ip(http_request)
+    await _check_rate_limit(guess_ip_limiter, "ip", client_ip)
+    await _check_rate_limit(guess_session_limiter, "session", request.session_id)
+    word_game_service = await _word_game(level_service)
+    # Checked before anything is embedded: made-up session ids must not buy provider calls
+    if not await run_blocking(word_game_service.has_session, request.session_id):
+        return {"error": "Invalid session ID"}
+    # Guesses outside the vocabulary are embedded on the event loop, batched with other players'
+    if word_game_service.needs_embedding(request.guess) and await _embedding_allowed(client_ip, request.session_id):
+        await word_game_service.embed_guess(request.guess)
+    key = (request.session_id, request.guess.lower().strip())
+    try:
+        # Copied: coalesced callers share the result dict and the fields below are added per request
+        result = dict(await guess_coalescer.run(key, word_game_service.check_guess, request.session_id,
+                                                request.guess))
+    except SessionStoreBusy:
+        raise HTTPException(status_code=503, detail="Session store busy, try again", headers={"Retry-After": "1"})
     
     # If the guess was successful, mark level 3 as completed
     if result.get("is_successful", False):
-        level_service.complete_level_3()
-        print(f"Level 3 completed with word: {result['guess']}, similarity: {result['similarity']}%")
+        await _progress_call(level_service, level_service.complete_level_3, player_id)
+        logger.info("Level 3 completed with word: %s, similarity: %s%%", result["guess"], result["similarity"])
     
     # Add completion status to the response
-    result["completed"] = 3 in level_service.get_completed_levels()
+    result["completed"] = await _progress_call(level_service, level_service.is_level_completed, 3, player_id)
     
     return result
 
 @router.get("/word-game/reveal/{session_id}")
-def reveal_word(session_id: str, level_service: LevelServices = Depends(get_service_instance)):
+async def reveal_word(session_id: str, request: Request, level_service: LevelServices = Depends(get_service_instance)):
     """Reveal the target word."""
-    return level_service.word_game_service.reveal_word(session_id)
+    cached = reveal_responses.get(session_id)
+    if cached is None:
+        word_game_service = await _word_game(level_service)
+        result = await run_blocking(word_game_service.reveal_word, session_id)
+        if "error" in result:
+            return result
+        cached = reveal_responses.put(session_id, CachedJSON(result, "private, max-age=86400, immutable"))
+    return cached.response(request)
+
+@router.get("/word-game/hints/{session_id}")
+async def get_hints(session_id: str, k: int = Query(5, ge=1, le=50),
+                    level_service: LevelServices = Depends(get_service_instance)):
+    """Get the vocabulary words nearest to the best guess so far."""
+    word_game_service = await _word_game(level_service)
+    return await run_blocking(word_game_service.get_hints, session_id, k)
 
 @router.get("/word-game/words")
-def get_valid_words(level_service: LevelServices = Depends(get_service_instance)):
+async def get_valid_words(request: Request, level_service: LevelServices = Depends(get_service_instance)):
     """Get list of valid words."""
-    return {"words": level_service.word_game_service.get_valid_words()}
+    global _words_response
+    if _words_response is None:
+        word_game_service = await _word_game(level_service)
+        _words_response = CachedJSON({"words": list(word_game_service.get_valid_words())}, "public, max-age=3600")
+    return _words_response.response(request)
+
+@router.get("/word-game/cache-stats")
+async def get_similarity_cache_stats(level_service: LevelServices = Depends(get_service_instance)):
+    """Hit, miss and eviction counters of the guess similarity cache."""
+    word_game_service = await _word_game(level_service)
+    return word_game_service.similarity_cache.stats()
 
 # Add this route for checking the logic gate solution
 @router.post("/logic-gates/check")
-def check_logic_gates(request: LogicGateRequest, level_service: LevelServices = Depends(get_service_instance)):
+async def check_logic_gates(request: LogicGateRequest, player_id: str = Depends(get_player_id),
+                            level_service: LevelServices = Depends(get_service_instance)):
     """Check the submitted logic gate sequence."""
-    result = level_service.check_logic_gates(request.sequence, request.circuit_id)
+    result = await _progress_call(
+        level_service, level_service.check_logic_gates, request.sequence, request.circuit_id, player_id)
     return result
 
 # Add a reset endpoint for testing
 @router.post("/logic-gates/reset")
-def reset_logic_gates(level_service: LevelServices = Depends(get_service_instance)):
+async def reset_logic_gates(player_id: str = Depends(get_player_id),
+                            level_service: LevelServices = Depends(get_service_instance)):
     """Reset the logic gate puzzle state."""
-    level_service.reset_logic_circuits()
+    await _progress_call(level_service, level_service.reset_logic_circuits, player_id)
     return {"reset": True}
 
 
 @router.post("/access-patterns/check")
-def check_access_patterns(request: AccessPatternRequest, level_service: LevelServices = Depends(get_service_instance)):
+async def check_access_patterns(request: AccessPatternRequest, player_id: str = Depends(get_player_id),
+                                level_service: LevelServices = Depends(get_service_instance)):
     """Check the submitted access pattern classifications."""
-    result = level_service.check_access_patterns(request.answers)
-    return result
\ No newline at end of file
+    result = await _progress_call(level_service, level_service.check_access_patterns, request.answers, player_id)
+    return result
+
+
+@router.post("/batch/check")
+async def check_batch(request: BatchCheckRequest, player_id: str = Depends(get_player_id),
+                      x_proctor_token: Optional[str] = Header(None),
+                      level_service: LevelServices = Depends(get_service_instance)):
+    """Check many logic gate and access pattern submissions, across players, in one request.
+    
+    Items may name another player only when the request carries the
+    X-Proctor-Token configured in PROCTOR_TOKEN.
+    """
+    if len(request.circuits) + len(request.patterns) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=422, detail=f"At most {BATCH_MAX_ITEMS} submissions per batch")
+    named = {item.player_id for item in (*request.circuits, *request.patterns) if item.player_id}
+    if named - {player_id} and not _is_proctor(x_proctor_token):
+        raise HTTPException(status_code=403, detail="Only a proctor can submit for other players")
+    circuits = [(item.player_id or player_id, item.circuit_id, item.sequence) for item in request.circuits]
+    patterns = [(item.player_id or player_id, item.answers) for item in request.patterns]
+    return await run_blocking(level_service.check_batch, circuits, patterns)
@@ -0,0 +1,138 @@
+import json
+import os
+import re
+import tempfile
+from typing import Dict, Optional, Sequence
+import numpy as np
+from services.embedding_store import EmbeddingStore
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no fcntl
+    fcntl = None
+
+
+CACHE_FORMAT_VERSION = 1
+
+
+class EmbeddingCache:
+    """Versioned on-disk embedding cache keyed by model name and word.
+
+    Each model gets a pair of files in the cache directory:
+    ``<model>.v<version>.npy`` holding a float32 matrix of normalized rows,
+    and ``<model>.v<version>.json`` holding the row -> word mapping. The
+    matrix is opened with ``mmap_mode="r"`` so every worker shares the same
+    read-only pages instead of holding a private copy.
+    """
+
+    def __init__(self, cache_dir: str, model: str):
+        self.cache_dir = cache_dir
+        self.model = model
+        stem = f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', model)}.v{CACHE_FORMAT_VERSION}"
+        self.matrix_path = os.path.join(cache_dir, stem + ".npy")
+        self.index_path = os.path.join(cache_dir, stem + ".json")
+        self.lock_path = os.path.join(cache_dir, stem + ".lock")
+
+    def load(self) -> Optional[EmbeddingStore]:
+        """Memory-map the cached embeddings, or return None if there is no usable cache."""
+        try:
+            with open(self.index_path) as f:
+                header = json.load(f)
+            matrix = np.load(self.matrix_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+
+        if (header.get("version") != CACHE_FORMAT_VERSION
+                or header.get("model") != self.model
+                or matrix.ndim != 2
+                or matrix.shape[0] != len(header.get("words", []))):
+            return None
+        return EmbeddingStore.from_matrix(header["words"], matrix)
+
+    def save(self, embeddings: Dict[str, Sequence[float]]) -> EmbeddingStore:
+        """Merge new embeddings into the cache and return the updated store.
+
+        Writes go to temporary files that are renamed into place, so readers
+        never see a partial file; an exclusive lock keeps concurrent workers
+        from dropping each other's words.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self.lock_path, "w") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            current = self.load()
+            words = list(current.words) if current is not None else []
+            new_words = [w for w in embeddings if current is None or w not in current]
+            if not new_words and current is not None:
+                return current
+
+            new_rows = np.array([embeddings[w] for w in new_words], dtype=np.float32)
+            if current is not None and current.dim != new_rows.shape[1]:
+                # A different vector size means the model changed under the same name
+                words, current = [], None
+                new_words = list(embeddings)
+                new_rows = np.array([embeddings[w] for w in new_words], dtype=np.float32)
+
+            norms = np.linalg.norm(new_rows, axis=1, keepdims=True)
+            new_rows /= np.where(norms > 1e-10, norms, 1.0)
+            matrix = new_rows if current is None else np.vstack([current.matrix, new_rows])
+            words.extend(new_words)
+            self._write_files(words, matrix)
+
+        return self.load()
+
+    def write(self, store: EmbeddingStore) -> EmbeddingStore:
+        """Replace the cached embeddings with a whole store and return its memory-mapped copy."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self.lock_path, "w") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._write_files(list(store.words), store.matrix)
+        return self.load()
+
+    def load_or_build(self, build) -> EmbeddingStore:
+        """Memory-map the cached embeddings, building and writing them first if there are none.
+
+        ``build`` returns a store with normalized rows. It runs under the
+        lock, so when several workers start together only one of them builds.
+        """
+        store = self.load()
+        if store is not None:
+            return store
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self.lock_path, "w") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            if self.load() is None:
+                store = build()
+                self._write_files(list(store.words), store.matrix)
+        return self.load()
+
+    def remove(self) -> None:
+        """Delete the cache files, e.g. so a stale snapshot is rebuilt."""
+        for path in (self.matrix_path, self.index_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _write_files(self, words, matrix: np.ndarray) -> None:
+        # The matrix goes first: readers check its row count against the header
+        self._atomic_write(self.matrix_path, lambda f: np.save(f, np.ascontiguousarray(matrix, dtype=np.float32)))
+        header = {
+            "version": CACHE_FORMAT_VERSION,
+            "model": self.model,
+            "dim": int(matrix.shape[1]),
+            "words": words,
+        }
+        self._atomic_write(self.index_path, lambda f: f.write(json.dumps(header).encode()))
+
+    def _atomic_write(self, path: str, write) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
@@ -0,0 +1,359 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from services.embedding_cache import EmbeddingCache
+from services.embedding_store import EmbeddingStore
+from services.metrics import REGISTRY
+from services.mock_embeddings import anchor_vector, mock_embeddings, similarity_targets
+
+EMBEDDING_FETCH_SECONDS = REGISTRY.histogram(
+    "word_game_embedding_fetch_seconds", "Time spent per batched embedding API call.")
+EMBEDDING_FETCH_WORDS = REGISTRY.counter(
+    "word_game_embedding_fetch_words_total", "Words requested from the embedding API, by outcome.", ("outcome",))
+EMBEDDING_FETCH_RETRIES = REGISTRY.counter(
+    "word_game_embedding_fetch_retries_total", "Embedding API calls retried after an error or timeout.")
+
+Vectors = Dict[str, np.ndarray]
+
+
+class EmbeddingProvider:
+    """Source of word vectors.
+
+    ``embed`` is best effort: words the provider cannot embed are left out
+    of the result rather than raising. ``aembed`` is the same for callers on
+    the event loop.
+    """
+
+    # Name of the vector space, used to key caches and shared snapshots
+    name = "base"
+    # Whether vectors carry meaning, so guesses outside the vocabulary can be scored by cosine
+    semantic = True
+    # Whether fetched vectors are worth keeping in the on-disk EmbeddingCache
+    remote = False
+    batch_size = 100
+
+    def embed(self, words: Iterable[str]) -> Vectors:
+        raise NotImplementedError
+
+    async def aembed(self, words: Iterable[str]) -> Vectors:
+        # Local providers are fast enough to answer inline
+        return self.embed(words)
+
+    def close(self) -> None:
+        pass
+
+
+class MockEmbeddingProvider(EmbeddingProvider):
+    """Deterministic offline vectors at a chosen cosine to an anchor word.
+
+    ``similarities`` are the known scores (0-100) of words against the
+    anchor; other words get ``default_similarity``. The vectors mean nothing
+    beyond that, so the provider is not semantic.
+    """
+
+    semantic = False
+
+    def __init__(self, anchor: str, similarities: Dict[str, float], default_similarity: float = 0.4,
+                 dim: int = 100):
+        self.anchor = anchor
+        self.similarities = similarities
+        self.default_similarity = default_similarity
+        self.dim = dim
+        self.name = f"mock-{dim}"
+
+    def embed(self, words: Iterable[str]) -> Vectors:
+        words = list(dict.fromkeys(words))
+        anchor = anchor_vector(self.anchor, self.dim)
+        others = [w for w in words if w != self.anchor]
+        targets = similarity_targets(others, self.similarities, self.default_similarity)
+        # All rows in one vectorized step
+        vectors = dict(zip(others, mock_embeddings(others, anchor, targets, self.dim)))
+        if self.anchor in words:
+            vectors[self.anchor] = anchor
+        return {word: vectors[word] for word in words}
+
+
+class LocalFileEmbeddingProvider(EmbeddingProvider):
+    """Pretrained vectors from a local file, with no network.
+
+    Reads either an ``.npz`` with ``words`` and ``vectors`` arrays or the
+    word2vec / GloVe text format (one ``word v1 v2 ...`` line per word; a
+    word2vec ``count dim`` header line is skipped). Words missing from the
+    file are not embedded. With ``cache_dir`` the file is converted once
+    into an ``EmbeddingCache`` there (keyed by its size and mtime) and the
+    matrix is memory-mapped, so every worker shares the same pages.
+    """
+
+    def __init__(self, path: str, cache_dir: Optional[str] = None):
+        self.path = path
+        self.name = "file-" + os.path.splitext(os.path.basename(path))[0]
+        if cache_dir is None:
+            words, matrix = self._read(path)
+        else:
+            stat = os.stat(path)
+            cache = EmbeddingCache(cache_dir, f"source-{self.name}-{stat.st_size}-{stat.st_mtime_ns}")
+            store = cache.load_or_build(lambda: self._normalized(*self._read(path)))
+            words, matrix = store.words, store.matrix
+        self.dim = matrix.shape[1]
+        self._matrix = matrix
+        self._rows = {word: i for i, word in enumerate(words)}
+
+    @classmethod
+    def _read(cls, path: str) -> Tuple[List[str], np.ndarray]:
+        if path.endswith(".npz"):
+            with np.load(path) as arrays:
+                return [str(word) for word in arrays["words"]], np.asarray(arrays["vectors"], dtype=np.float32)
+        return cls._read_text(path)
+
+    @staticmethod
+    def _read_text(path: str) -> Tuple[List[str], np.ndarray]:
+        # Rows are parsed straight into a float32 matrix that doubles as it fills
+        words: List[str] = []
+        matrix = None
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                word, _, values = line.rstrip().partition(" ")
+                row = np.fromstring(values, dtype=np.float32, sep=" ")
+                if matrix is None:
+                    if len(row) < 2:
+                        continue
+                    matrix = np.empty((1024, len(row)), dtype=np.float32)
+                elif len(row) != matrix.shape[1]:
+                    continue
+                if len(words) == len(matrix):
+                    grown = np.empty((2 * len(matrix), matrix.shape[1]), dtype=np.float32)
+                    grown[:len(matrix)] = matrix
+                    matrix = grown
+                matrix[len(words)] = row
+                words.append(word.lower())
+        if matrix is None:
+            raise ValueError(f"No vectors in {path}")
+        return words, matrix[:len(words)]
+
+    @staticmethod
+    def _normalized(words: List[str], matrix: np.ndarray) -> EmbeddingStore:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms > 1e-10, norms, 1.0)
+        return EmbeddingStore.from_matrix(words, matrix)
+
+    def embed(self, words: Iterable[str]) -> Vectors:
+        return {word: self._matrix[self._rows[word]] for word in dict.fromkeys(words) if word in self._rows}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+
+class GeminiEmbeddingProvider(EmbeddingProvider):
+    """Gemini embedding API with batching, bounded concurrency, timeouts and retries.
+
+    Words are sent ``batch_size`` per request and at most ``max_concurrency``
+    requests are waited on at once, on the provider's own threads (the SDK
+    call is blocking). A request that errors or takes longer than ``timeout``
+    seconds is retried up to ``max_retries`` times with jittered exponential
+    backoff; a batch that still fails is left out of the result. The SDK
+    cannot cancel a call, so a timed-out call keeps its thread until it
+    returns: the pool has ``max_concurrency`` spare threads for those, and a
+    request is only submitted to an idle thread, so its timeout never counts
+    time spent queued. Once every thread is held by a call, batches fail at
+    once instead of queueing behind the stuck calls.
+    """
+
+    remote = True
+
+    def __init__(self, api_key: str, model: str = "models/embedding-001", batch_size: int = 100,
+                 max_concurrency: int = 4, max_retries: int = 2, backoff: float = 0.5,
+                 max_backoff: float = 8.0, timeout: float = 10.0):
+        # Imported here so the (slow) SDK import is only paid when it is used
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self.genai = genai
+        self.name = model
+        self.model = model
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self._max_running = 2 * max_concurrency
+        self._threads = ThreadPoolExecutor(max_workers=self._max_running, thread_name_prefix="embedding")
+        # Calls on the provider's threads, including ones whose callers timed out
+        self._running = 0
+        self._running_lock = threading.Lock()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _call(self, batch: List[str]) -> Vectors:
+        with EMBEDDING_FETCH_SECONDS.time():
+            result = self.genai.embed_content(model=self.model, content=batch, task_type="semantic_similarity")
+        return dict(zip(batch, (np.asarray(vector, dtype=np.float32) for vector in result["embedding"])))
+
+    def _batches(self, words: Iterable[str]) -> Iterator[List[str]]:
+        words = list(dict.fromkeys(words))
+        for start in range(0, len(words), self.batch_size):
+            yield words[start:start + self.batch_size]
+
+    def _delays(self) -> Iterator[float]:
+        # Full jitter keeps workers that failed together from retrying together
+        for attempt in range(self.max_retries):
+            yield random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _record(self, batch: List[str], vectors: Optional[Vectors], outcome: str = "error") -> Vectors:
+        EMBEDDING_FETCH_WORDS.inc(len(batch), outcome="ok" if vectors is not None else outcome)
+        return vectors or {}
+
+    def _submit(self, batch: List[str]) -> Optional[Future]:
+        """Start the call on an idle thread, or None when every thread is still held by a call."""
+        with self._running_lock:
+            if self._running >= self._max_running:
+                return None
+            self._running += 1
+        future = self._threads.submit(self._call, batch)
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, future: Future) -> None:
+        with self._running_lock:
+            self._running -= 1
+
+    def _fetch_batch(self, batch: List[str]) -> Vectors:
+        delays = self._delays()
+        while True:
+            future = self._submit(batch)
+            if future is None:
+                return self._record(batch, None, outcome="saturated")
+            try:
+                # A timeout raises here like any other error and is retried
+                return self._record(batch, future.result(self.timeout))
+            except Exception:
+                delay = next(delays, None)
+                if delay is None:
+                    return self._record(batch, None)
+                EMBEDDING_FETCH_RETRIES.inc()
+                time.sleep(delay)
+
+    async def _afetch_batch(self, batch: List[str]) -> Vectors:
+        delays = self._delays()
+        while True:
+            try:
+                async with self._semaphore:
+                    future = self._submit(batch)
+                    if future is None:
+                        return self._record(batch, None, outcome="saturated")
+                    return self._record(batch, await asyncio.wait_for(asyncio.wrap_future(future), self.timeout))
+            except Exception:
+                delay = next(delays, None)
+                if delay is None:
+                    return self._record(batch, None)
+                EMBEDDING_FETCH_RETRIES.inc()
+                await asyncio.sleep(delay)
+
+    def embed(self, words: Iterable[str]) -> Vectors:
+        """Fetch from a plain thread; batches run concurrently on the provider's threads."""
+        fetched: Vectors = {}
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as batches:
+            for vectors in batches.map(self._fetch_batch, self._batches(words)):
+                fetched.update(vectors)
+        return fetched
+
+    async def aembed(self, words: Iterable[str]) -> Vectors:
+        """Fetch from the event loop without blocking it; at most max_concurrency calls in flight."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        fetched: Vectors = {}
+        for vectors in await asyncio.gather(*(self._afetch_batch(batch) for batch in self._batches(words))):
+            fetched.update(vectors)
+        return fetched
+
+    def close(self) -> None:
+        self._threads.shutdown(wait=False)
+
+
+class EmbeddingBatcher:
+    """Gathers words requested concurrently on the event loop into batched ``aembed`` calls.
+
+    The first word opens a ``window``-second batch that later words join
+    (a full batch is sent at once); a word already in flight shares its
+    pending result. ``on_result`` sees every word's outcome, including ones
+    whose callers stopped waiting. Must be used from a single event loop.
+    """
+
+    def __init__(self, provider: EmbeddingProvider, window: float = 0.005,
+                 on_result: Optional[Callable[[str, Optional[np.ndarray]], None]] = None):
+        self.provider = provider
+        self.window = window
+        self.on_result = on_result
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._queued: List[str] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    def submit(self, word: str) -> asyncio.Future:
+        """Future for the word's vector; resolves to None if the provider could not embed it."""
+        future = self._pending.get(word)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._pending[word] = loop.create_future()
+            self._queued.append(word)
+            if len(self._queued) >= self.provider.batch_size:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.window, self._flush)
+        return future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        words, self._queued = self._queued, []
+        if words:
+            asyncio.ensure_future(self._fetch(words))
+
+    async def _fetch(self, words: List[str]) -> None:
+        try:
+            vectors = await self.provider.aembed(words)
+        except Exception:
+            vectors = {}
+        for word in words:
+            vector = vectors.get(word)
+            if self.on_result is not None:
+                self.on_result(word, vector)
+            future = self._pending.pop(word)
+            if not future.done():
+                future.set_result(vector)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+def create_embedding_provider(anchor: str, similarities: Dict[str, float]) -> EmbeddingProvider:
+    """The provider selected by EMBEDDING_PROVIDER (gemini, file or mock).
+
+    Without EMBEDDING_PROVIDER, Gemini is used when GEMINI_API_KEY is set and
+    the mock otherwise; ``anchor`` and ``similarities`` shape the mock vectors.
+    """
+    api_key = os.getenv("GEMINI_API_KEY")
+    kind = (os.getenv("EMBEDDING_PROVIDER") or ("gemini" if api_key else "mock")).lower()
+    if kind == "gemini":
+        if not api_key:
+            raise ValueError("EMBEDDING_PROVIDER=gemini needs GEMINI_API_KEY")
+        return GeminiEmbeddingProvider(
+            api_key,
+            model=os.getenv("EMBEDDING_MODEL", "models/embedding-001"),
+            batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", "100")),
+            max_concurrency=int(os.getenv("EMBEDDING_CONCURRENCY", "4")),
+            max_retries=int(os.getenv("EMBEDDING_RETRIES", "2")),
+            backoff=float(os.getenv("EMBEDDING_BACKOFF_SECONDS", "0.5")),
+            timeout=float(os.getenv("EMBEDDING_TIMEOUT_SECONDS", "10")),
+        )
+    if kind == "file":
+        path = os.getenv("EMBEDDING_FILE")
+        if not path:
+            raise ValueError("EMBEDDING_PROVIDER=file needs EMBEDDING_FILE")
+        return LocalFileEmbeddingProvider(path, cache_dir=os.getenv("SHARED_STATE_DIR") or None)
+    if kind == "mock":
+        return MockEmbeddingProvider(anchor, similarities)
+    raise ValueError(f"Unknown EMBEDDING_PROVIDER: {kind}")
@@ -0,0 +1,81 @@
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+
+
+class EmbeddingStore:
+    """Contiguous, pre-normalized float32 embedding matrix with a word -> row index."""
+
+    def __init__(self, dim: int = 100, capacity: int = 64):
+        self.dim = dim
+        self.words: List[str] = []
+        self.index: Dict[str, int] = {}
+        # Rows are allocated in chunks so that adding words one at a time
+        # does not reallocate the whole matrix on every insert
+        self._matrix = np.zeros((max(capacity, 1), dim), dtype=np.float32)
+
+    @classmethod
+    def from_matrix(cls, words: Sequence[str], matrix: np.ndarray) -> "EmbeddingStore":
+        """Build a store around an existing matrix whose rows are already normalized."""
+        store = cls.__new__(cls)
+        store.dim = matrix.shape[1]
+        store.words = list(words)
+        store.index = {word: i for i, word in enumerate(store.words)}
+        # Keep float32 matrices (including read-only memory maps) without copying
+        store._matrix = matrix if matrix.dtype == np.float32 else matrix.astype(np.float32)
+        return store
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """View of the populated rows."""
+        return self._matrix[:len(self.words)]
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.index
+
+    def __iter__(self):
+        return iter(self.words)
+
+    def __getitem__(self, word: str) -> np.ndarray:
+        return self._matrix[self.index[word]]
+
+    def __setitem__(self, word: str, vector) -> None:
+        self.add_many([word], np.asarray(vector, dtype=np.float32).reshape(1, -1))
+
+    def get(self, word: str, default=None) -> Optional[np.ndarray]:
+        row = self.index.get(word)
+        return default if row is None else self._matrix[row]
+
+    def add_many(self, words: Iterable[str], vectors: np.ndarray) -> None:
+        """Insert or overwrite rows for the given words, normalizing them first."""
+        words = list(words)
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(words), self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms > 1e-10, norms, 1.0)
+
+        new_words = [w for w in dict.fromkeys(words) if w not in self.index]
+        self._reserve(len(self.words) + len(new_words))
+        for word in new_words:
+            self.index[word] = len(self.words)
+            self.words.append(word)
+
+        rows = np.fromiter((self.index[w] for w in words), dtype=np.intp, count=len(words))
+        self._matrix[rows] = vectors
+
+    def _reserve(self, size: int) -> None:
+        if size <= self._matrix.shape[0] and self._matrix.flags.writeable:
+            return
+        capacity = max(size, 2 * self._matrix.shape[0])
+        grown = np.zeros((capacity, self.dim), dtype=np.float32)
+        grown[:len(self.words)] = self._matrix[:len(self.words)]
+        self._matrix = grown
+
+    def rows(self, words: Sequence[str]) -> np.ndarray:
+        """Return row indices for the given words, -1 for unknown words."""
+        return np.fromiter((self.index.get(w, -1) for w in words), dtype=np.intp, count=len(words))
+
+    def nbytes(self) -> int:
+        """Bytes used by the populated vectors."""
+        return self.matrix.nbytes
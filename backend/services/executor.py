@@ -0,0 +1,63 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Shared bounded pool for blocking service work, sized by SERVICE_EXECUTOR_WORKERS."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("SERVICE_EXECUTOR_WORKERS", "8")),
+                    thread_name_prefix="service",
+                )
+    return _executor
+
+
+async def run_blocking(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking call on the service executor without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(fn, *args, **kwargs))
+
+
+class Coalescer:
+    """Shares one execution between identical blocking calls that are in flight at once.
+
+    The first caller for a key starts ``fn`` on the executor; callers with
+    the same key that arrive before it finishes await the same result
+    instead of running it again. Must be used from a single event loop.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def run(self, key: Hashable, fn: Callable[..., Any], *args) -> Any:
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            future = asyncio.ensure_future(run_blocking(fn, *args))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shielded: one caller disconnecting must not cancel the others' result
+        return await asyncio.shield(future)
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+
+def shutdown_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
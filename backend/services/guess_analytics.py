@@ -0,0 +1,275 @@
+import csv
+import gzip
+import itertools
+import json
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+
+# Guesses longer than this are junk for analytics and would widen every key array
+MAX_GUESS_LENGTH = 64
+# Similarity histogram: one bin per whole percent, 0..100
+HISTOGRAM_BINS = 101
+# Guesses remembered per unsolved session while waiting for it to reach the target
+MAX_SESSION_GUESSES = 500
+# Solved sessions a guess needs before its learned score outweighs the current one
+LEARNING_PRIOR = 20
+
+Chunk = Tuple[List[str], List[str], np.ndarray, List[Optional[str]]]
+
+
+def _open(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8", newline="")
+
+
+def _parse_json_lines(lines: List[str]) -> List[dict]:
+    # One parser call for the whole batch; only a batch with a bad line is parsed line by line
+    try:
+        return json.loads("[" + ",".join(line for line in lines if line.strip()) + "]")
+    except ValueError:
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        return records
+
+
+def _record_batches(path: str, batch_size: int) -> Iterator[List[dict]]:
+    """Lists of raw records from a JSON-lines or CSV guess log."""
+    with _open(path) as f:
+        rows = csv.DictReader(f) if path.endswith((".csv", ".csv.gz")) else None
+        while True:
+            lines = list(itertools.islice(rows if rows is not None else f, batch_size))
+            if not lines:
+                return
+            yield lines if rows is not None else _parse_json_lines(lines)
+
+
+def _columns(records: List[dict]) -> Chunk:
+    targets, guesses, similarities, sessions = [], [], [], []
+    for record in records:
+        try:
+            guess = record["guess"].lower().strip()
+            similarity = float(record["similarity"])
+            target = record["target"].lower()
+        except (AttributeError, KeyError, TypeError, ValueError):
+            # Malformed rows are skipped
+            continue
+        if guess and len(guess) <= MAX_GUESS_LENGTH:
+            targets.append(target)
+            guesses.append(guess)
+            similarities.append(similarity)
+            sessions.append(record.get("session") or record.get("session_id") or None)
+    return targets, guesses, np.asarray(similarities, dtype=np.float32), sessions
+
+
+def iter_guess_chunks(paths: Iterable[str], chunk_size: int = 100000) -> Iterator[Chunk]:
+    """Stream guess logs as (targets, guesses, similarities, sessions) chunks of at most chunk_size records.
+
+    Logs are the JSON lines written by GuessLog (GUESS_LOG_PATH) or CSV
+    exports with target, guess and similarity columns (and optionally
+    session), optionally gzipped, read in the order given. Only one chunk
+    is held in memory at a time.
+    """
+    for path in paths:
+        for records in _record_batches(path, chunk_size):
+            chunk = _columns(records)
+            if chunk[1]:
+                yield chunk
+
+
+class GuessStats:
+    """Bounded-memory aggregate of guess logs.
+
+    Per (target, guess) pair it keeps a count, a similarity sum and how the
+    guess sits on the way to the answer: in every session that went on to
+    guess the target, a guess at position i of the n distinct guesses
+    before it gets progress (i + 1) / (n + 1), so guesses players make just
+    before solving score close to 1. Once more than ``capacity`` pairs are
+    tracked the rarest are dropped Misra-Gries style, so memory stays
+    bounded however many distinct typos arrive while frequent guesses keep
+    (slightly under-)estimated counts. Unsolved sessions are held up to
+    ``max_sessions`` at a time. Per target it keeps an exact similarity
+    histogram.
+    """
+
+    def __init__(self, capacity: int = 200000, max_sessions: int = 100000):
+        self.capacity = capacity
+        self.max_sessions = max_sessions
+        self.total = 0
+        self.solved_sessions = 0
+        # (target, guess) -> [count, similarity sum, solved sessions, progress sum]
+        self.pairs: Dict[Tuple[str, str], List[float]] = {}
+        self.histograms: Dict[str, np.ndarray] = {}
+        # Session -> (target, distinct guesses so far), or (target, None) once solved
+        self._sessions: "OrderedDict[str, Tuple[str, Optional[List[str]]]]" = OrderedDict()
+
+    def add_chunk(self, targets: List[str], guesses: List[str], similarities: np.ndarray,
+                  sessions: Optional[List[Optional[str]]] = None) -> None:
+        self.total += len(guesses)
+        # Group the chunk's pairs once with numpy instead of one dict update per record
+        keys = np.array([f"{target}\t{guess}" for target, guess in zip(targets, guesses)])
+        unique, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        sums = np.bincount(inverse, weights=similarities, minlength=len(unique))
+        for key, count, total in zip(unique.tolist(), counts.tolist(), sums.tolist()):
+            target, guess = key.split("\t", 1)
+            entry = self.pairs.get((target, guess))
+            if entry is None:
+                self.pairs[(target, guess)] = [count, total, 0, 0.0]
+            else:
+                entry[0] += count
+                entry[1] += total
+
+        if sessions is not None:
+            for session_id, target, guess in zip(sessions, targets, guesses):
+                if session_id is not None:
+                    self._add_to_session(session_id, target, guess)
+
+        target_array = np.array(targets)
+        bins = np.clip(np.rint(similarities), 0, HISTOGRAM_BINS - 1).astype(np.intp)
+        for target in np.unique(target_array).tolist():
+            histogram = self.histograms.setdefault(target, np.zeros(HISTOGRAM_BINS, dtype=np.int64))
+            histogram += np.bincount(bins[target_array == target], minlength=HISTOGRAM_BINS)
+
+        if len(self.pairs) > self.capacity:
+            self._prune()
+
+    def _add_to_session(self, session_id: str, target: str, guess: str) -> None:
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            entry = self._sessions[session_id] = (target, [])
+            while len(self._sessions) > self.max_sessions:
+                # Sessions abandoned long ago never solve; drop the oldest
+                self._sessions.popitem(last=False)
+        if entry[1] is None:
+            # Already solved; later guesses say nothing about the way there
+            return
+        if guess != target:
+            if guess not in entry[1] and len(entry[1]) < MAX_SESSION_GUESSES:
+                entry[1].append(guess)
+            return
+        self._sessions[session_id] = (target, None)
+        self.solved_sessions += 1
+        earlier = entry[1]
+        for i, earlier_guess in enumerate(earlier):
+            pair = self.pairs.get((target, earlier_guess))
+            if pair is not None:
+                pair[2] += 1
+                pair[3] += (i + 1) / (len(earlier) + 1)
+
+    def _prune(self) -> None:
+        counts = np.fromiter((entry[0] for entry in self.pairs.values()), dtype=np.float64, count=len(self.pairs))
+        # Subtract the count of the first pair beyond capacity from everyone and drop what reaches zero
+        threshold = -np.partition(-counts, self.capacity)[self.capacity]
+        self.pairs = {
+            key: [count - threshold] + [value * (count - threshold) / count for value in values]
+            for key, (count, *values) in self.pairs.items() if count > threshold
+        }
+
+    def convergence(self, target: str, guess: str) -> Tuple[float, float]:
+        """(solved sessions, mean progress) of a guess on the way to the target."""
+        entry = self.pairs.get((target, guess))
+        if entry is None or not entry[2]:
+            return 0.0, 0.0
+        return entry[2], entry[3] / entry[2]
+
+    def top_guesses(self, target: str, limit: int, min_count: int = 1) -> List[Tuple[str, int, float]]:
+        """Most frequent guesses for a target as (guess, count, mean similarity)."""
+        rows = [(guess, int(count), total / count)
+                for (pair_target, guess), (count, total, *_) in self.pairs.items()
+                if pair_target == target and count >= min_count]
+        rows.sort(key=lambda row: (-row[1], row[0]))
+        return rows[:limit]
+
+    def summary(self, target: str) -> Dict[str, float]:
+        """Count and similarity percentiles of a target's guesses, from its histogram."""
+        histogram = self.histograms.get(target)
+        if histogram is None or not histogram.sum():
+            return {"guesses": 0}
+        cumulative = np.cumsum(histogram) / histogram.sum()
+        result = {"guesses": int(histogram.sum()),
+                  "mean_similarity": round(float(histogram @ np.arange(HISTOGRAM_BINS) / histogram.sum()), 2)}
+        for percentile in (50, 90, 99):
+            result[f"p{percentile}_similarity"] = int(np.searchsorted(cumulative, percentile / 100.0))
+        return result
+
+
+def fit_convergence(stats: GuessStats, service, min_solved: int = 5) -> Optional[Tuple[float, float, int]]:
+    """Least-squares line from mean convergence progress to the score of guesses with a trusted score.
+
+    Trusted scores are the hand-tuned matrix and the similarity table.
+    Returns (intercept, slope, points), or None when there are too few
+    points or progress does not rise with similarity.
+    """
+    progress, scores = [], []
+    for (target, guess), (_, _, solved, progress_sum) in stats.pairs.items():
+        if solved < min_solved or guess == target:
+            continue
+        score = service.similarity_matrix.get(target, {}).get(guess)
+        if score is None and service.similarity_table is not None:
+            score = service.similarity_table.lookup(target, guess)
+        if score is not None:
+            progress.append(progress_sum / solved)
+            scores.append(score)
+    if len(progress) < 3 or np.ptp(progress) == 0:
+        return None
+    slope, intercept = np.polyfit(np.asarray(progress), np.asarray(scores), 1)
+    if slope <= 0:
+        return None
+    return float(intercept), float(slope), len(progress)
+
+
+def recalibrate(stats: GuessStats, service, top: int = 1000, min_count: int = 2,
+                existing: Optional[Dict[str, Dict[str, float]]] = None) -> Tuple[Dict[str, Dict[str, float]], dict]:
+    """Similarity overrides for the most common guesses that miss the precomputed scores.
+
+    A guess is unmatched when neither the hand-tuned matrix nor the loaded
+    similarity table knows it, i.e. it is scored by the heuristic path at
+    request time. Its score is learned from the logs where they say
+    something: fit_convergence maps how close to the answer players make a
+    guess onto the trusted score scale, and that learned score is blended
+    with the current heuristic score by how many solved sessions back it
+    (weight solved / (solved + LEARNING_PRIOR)). Learned scores stay below
+    the success threshold, so only the target itself wins. Guesses without
+    solved sessions keep their current score, precomputed once so the
+    service answers them with a dict lookup. Returns (overrides, report).
+    """
+    overrides = {target: dict(scores) for target, scores in (existing or {}).items()}
+    fit = fit_convergence(stats, service)
+    ceiling = service.similarity_threshold - 1
+    report = {"total_guesses": stats.total, "tracked_pairs": len(stats.pairs),
+              "solved_sessions": stats.solved_sessions,
+              "convergence_fit": None if fit is None else {"intercept": round(fit[0], 2), "slope": round(fit[1], 2),
+                                                           "points": fit[2]},
+              "targets": {}}
+    for target in sorted(stats.histograms):
+        known = service.similarity_matrix.get(target, {})
+        table = service.similarity_table
+        candidates = stats.top_guesses(target, len(stats.pairs), min_count)
+        unmatched = [row for row in candidates
+                     if row[0] not in known and (table is None or table.lookup(target, row[0]) is None)][:top]
+        target_overrides = overrides.setdefault(target, {})
+        learned = 0
+        for guess, _, _ in unmatched:
+            score = float(service._calculate_similarity(target, guess))
+            solved, progress = stats.convergence(target, guess)
+            if fit is not None and solved and guess != target:
+                weight = solved / (solved + LEARNING_PRIOR)
+                learned_score = min(max(fit[0] + fit[1] * progress, 0.0), ceiling)
+                score = min((1 - weight) * score + weight * learned_score, ceiling)
+                learned += 1
+            target_overrides[guess] = round(score, 2)
+        report["targets"][target] = {
+            **stats.summary(target),
+            # Guesses in the logs that the new precomputed scores now cover
+            "covered_guesses": sum(count for _, count, _ in unmatched),
+            "precomputed": len(unmatched),
+            "learned": learned,
+            "top_guesses": [{"guess": guess, "count": count, "mean_similarity": round(mean, 2)}
+                            for guess, count, mean in candidates[:20]],
+        }
+    return overrides, report
@@ -0,0 +1,208 @@
+import json
+import os
+import threading
+import time
+from array import array
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class WordInterner:
+    """Process-wide word <-> small int table for the game vocabulary.
+
+    Only words the service registers (its embedded vocabulary) are interned,
+    so the table stays bounded whatever players type; a guess of one of
+    them costs 4 bytes in a history instead of a string.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._words: List[str] = []
+        self._lock = threading.Lock()
+
+    def intern(self, word: str) -> int:
+        word_id = self._ids.get(word)
+        if word_id is None:
+            with self._lock:
+                word_id = self._ids.get(word)
+                if word_id is None:
+                    word_id = len(self._words)
+                    self._words.append(word)
+                    self._ids[word] = word_id
+        return word_id
+
+    def intern_many(self, words: Iterable[str]) -> None:
+        for word in words:
+            self.intern(word)
+
+    def lookup(self, word: str) -> Optional[int]:
+        """The id of an already interned word, without interning it."""
+        return self._ids.get(word)
+
+    def word(self, word_id: int) -> str:
+        return self._words[word_id]
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+
+WORDS = WordInterner()
+
+
+class GuessHistory:
+    """Guesses of one session as parallel arrays of word ids and float32 scores.
+
+    Vocabulary words are stored as their WORDS id; other guesses are kept
+    in the session's own ``inline`` list and stored as negative ids
+    (-1 for inline[0]), so they are freed with the session. Keeps the first
+    position of every distinct word (duplicate check and its earlier score
+    in O(1)) and the positions of the best guess overall and of the best
+    guess usable as a hint anchor, updated on append.
+    """
+
+    __slots__ = ("word_ids", "scores", "positions", "inline", "inline_ids", "best", "best_anchor")
+
+    def __init__(self):
+        self.word_ids = array("i")
+        self.scores = array("f")
+        self.positions: Dict[int, int] = {}
+        self.inline: List[str] = []
+        self.inline_ids: Dict[str, int] = {}
+        self.best = -1
+        self.best_anchor = -1
+
+    def __len__(self) -> int:
+        return len(self.word_ids)
+
+    def __iter__(self) -> Iterator[Tuple[str, float]]:
+        for word_id, score in zip(self.word_ids, self.scores):
+            yield self._word(word_id), score
+
+    def __contains__(self, word: str) -> bool:
+        word_id = self._lookup(word)
+        return word_id is not None and word_id in self.positions
+
+    def _lookup(self, word: str) -> Optional[int]:
+        word_id = WORDS.lookup(word)
+        return word_id if word_id is not None else self.inline_ids.get(word)
+
+    def _word(self, word_id: int) -> str:
+        return WORDS.word(word_id) if word_id >= 0 else self.inline[-word_id - 1]
+
+    def previous_score(self, word: str) -> Optional[float]:
+        """Score of an earlier guess of the same word, or None if it is new."""
+        word_id = self._lookup(word)
+        position = self.positions.get(word_id) if word_id is not None else None
+        return None if position is None else float(self.scores[position])
+
+    def append(self, word: str, score: float, anchorable: bool = False) -> None:
+        """Record a guess; anchorable guesses (embedded, not the target) may anchor hints."""
+        word_id = self._lookup(word)
+        if word_id is None:
+            self.inline.append(word)
+            word_id = self.inline_ids[word] = -len(self.inline)
+        position = len(self.word_ids)
+        self.word_ids.append(word_id)
+        self.scores.append(score)
+        self.positions.setdefault(word_id, position)
+        if self.best < 0 or score > self.scores[self.best]:
+            self.best = position
+        if anchorable and (self.best_anchor < 0 or score > self.scores[self.best_anchor]):
+            self.best_anchor = position
+
+    def best_guess(self) -> Optional[Tuple[str, float]]:
+        if self.best < 0:
+            return None
+        return self._word(self.word_ids[self.best]), float(self.scores[self.best])
+
+    def best_anchor_word(self) -> Optional[str]:
+        return None if self.best_anchor < 0 else self._word(self.word_ids[self.best_anchor])
+
+    def guessed_words(self) -> List[str]:
+        return [self._word(word_id) for word_id in self.positions]
+
+    def to_json(self) -> Dict[str, Any]:
+        """Portable form for shared session stores: word ids are only valid in this process."""
+        return {
+            "words": [self._word(word_id) for word_id in self.word_ids],
+            "scores": [round(score, 2) for score in self.scores],
+            "best_anchor": self.best_anchor,
+        }
+
+    @classmethod
+    def coerce(cls, value: Any, anchorable: Optional[Callable[[str], bool]] = None) -> "GuessHistory":
+        """A GuessHistory from itself, its JSON form, or a legacy list of {"word", "similarity"} dicts.
+
+        ``anchorable`` tells which words of a legacy list may anchor hints.
+        """
+        if isinstance(value, GuessHistory):
+            return value
+        history = cls()
+        if isinstance(value, dict):
+            for word, score in zip(value.get("words", []), value.get("scores", [])):
+                history.append(word, score)
+            history.best_anchor = value.get("best_anchor", -1)
+        else:
+            for guess in value or []:
+                word = guess["word"]
+                history.append(word, guess["similarity"], anchorable=anchorable is not None and anchorable(word))
+        return history
+
+
+class GuessLog:
+    """Append-only JSON-lines log of guesses for post-event analytics.
+
+    Records are buffered in memory and appended to the file by a background
+    thread every ``flush_interval`` seconds, so logging never waits on disk
+    in the request path.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="guess-log-flush", daemon=True)
+        self._flusher.start()
+
+    def record(self, session_id: str, target_word: str, guess: str, similarity: float) -> None:
+        line = json.dumps({"t": round(time.time(), 3), "session": session_id, "target": target_word,
+                           "guess": guess, "similarity": round(similarity, 2)}, separators=(",", ":"))
+        with self._lock:
+            self._buffer.append(line)
+
+    def flush(self) -> int:
+        """Append buffered records to the log file; returns how many were written."""
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+        if lines:
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+            except OSError:
+                # Keep the records so the next flush retries them
+                with self._lock:
+                    self._buffer[:0] = lines
+                raise
+        return len(lines)
+
+    def _flush_loop(self) -> None:
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError:
+                continue
+
+    def close(self) -> None:
+        """Stop the flush thread and write any buffered records."""
+        self._stopped.set()
+        self._flusher.join()
+        self.flush()
+
+
+def create_guess_log() -> Optional[GuessLog]:
+    """The guess log configured by GUESS_LOG_PATH, or None when logging is off."""
+    path = os.getenv("GUESS_LOG_PATH")
+    if not path:
+        return None
+    return GuessLog(path, flush_interval=float(os.getenv("GUESS_LOG_FLUSH_SECONDS", "1.0")))
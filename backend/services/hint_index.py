@@ -0,0 +1,174 @@
+import hashlib
+import math
+import os
+import secrets
+import tempfile
+from typing import Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from services.embedding_store import EmbeddingStore
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no fcntl
+    fcntl = None
+
+
+def _words_digest(words: Sequence[str]) -> str:
+    return hashlib.blake2b("\n".join(words).encode(), digest_size=16).hexdigest()
+
+
+def _atomic_write(path: str, write) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class HintIndex:
+    """Inverted-file (IVF) nearest-neighbour index over normalized embeddings.
+
+    Vectors are clustered with spherical k-means into roughly sqrt(N)
+    lists, stored contiguously per list. A query scores the centroids,
+    probes the closest ``n_probe`` lists and ranks only their members, so
+    query cost grows with sqrt(N) instead of N. Small vocabularies use a
+    single list, which is an exact brute-force search.
+    """
+
+    # Below this many vectors one list (exact search) is already fast enough
+    BRUTE_FORCE_LIMIT = 2048
+    # k-means is trained on a sample; the full set is only assigned once
+    TRAINING_SAMPLE = 20000
+
+    def __init__(self, embeddings: EmbeddingStore, n_lists: Optional[int] = None,
+                 n_probe: Optional[int] = None, iterations: int = 8, seed: int = 0):
+        self.words = list(embeddings.words)
+        vectors = np.ascontiguousarray(embeddings.matrix, dtype=np.float32)
+        count = len(self.words)
+
+        if n_lists is None:
+            n_lists = 1 if count <= self.BRUTE_FORCE_LIMIT else int(math.sqrt(count))
+        self.n_lists = max(1, min(n_lists, count))
+        self.n_probe = min(self.n_lists, n_probe or max(1, self.n_lists // 16))
+
+        if self.n_lists == 1:
+            self.centroids = vectors.mean(axis=0, keepdims=True) if count else np.zeros((1, embeddings.dim), np.float32)
+            assignment = np.zeros(count, dtype=np.intp)
+        else:
+            self.centroids = self._train(vectors, self.n_lists, iterations, np.random.default_rng(seed))
+            assignment = self._assign(vectors, self.centroids)
+
+        # Lay vectors out list by list so a probe reads one contiguous slice
+        order = np.argsort(assignment, kind="stable")
+        self._ids = order
+        self._vectors = vectors[order]
+        self._offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=self.n_lists))])
+
+    @classmethod
+    def _train(cls, vectors: np.ndarray, n_lists: int, iterations: int, rng) -> np.ndarray:
+        sample = vectors
+        if len(vectors) > cls.TRAINING_SAMPLE:
+            sample = vectors[rng.choice(len(vectors), cls.TRAINING_SAMPLE, replace=False)]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = cls._assign(sample, centroids)
+            # Per-list sums as one matrix product with a one-hot assignment matrix
+            one_hot = np.zeros((len(sample), n_lists), dtype=np.float32)
+            one_hot[np.arange(len(sample)), assignment] = 1.0
+            sums = one_hot.T @ sample
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty lists keep their previous centroid
+            centroids = np.where(norms > 1e-10, sums / np.where(norms > 1e-10, norms, 1.0), centroids)
+        return centroids.astype(np.float32)
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 8192) -> np.ndarray:
+        assignment = np.empty(len(vectors), dtype=np.intp)
+        for start in range(0, len(vectors), chunk_size):
+            assignment[start:start + chunk_size] = np.argmax(vectors[start:start + chunk_size] @ centroids.T, axis=1)
+        return assignment
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def save(self, stem: str) -> None:
+        """Write the index next to an embedding snapshot: ``<stem>.npz`` plus ``<stem>.<build>.npy``.
+
+        The vectors go to a file named by a fresh build id and the ``.npz``
+        that names it is renamed into place last, so a reader sees either the
+        old pair or the new one. An exclusive lock keeps workers from
+        interleaving saves, and the ``.npz`` records a digest of the words so
+        an index built for another vocabulary is not attached.
+        """
+        directory = os.path.dirname(stem) or "."
+        vectors_name = f"{os.path.basename(stem)}.{secrets.token_hex(8)}.npy"
+        with open(stem + ".lock", "w") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            _atomic_write(os.path.join(directory, vectors_name), lambda f: np.save(f, self._vectors))
+            _atomic_write(stem + ".npz", lambda f: np.savez(
+                f, centroids=self.centroids, ids=self._ids, offsets=self._offsets, n_probe=self.n_probe,
+                words_digest=_words_digest(self.words), vectors=vectors_name))
+            # Earlier builds are unlinked; workers that mapped them keep their pages
+            for name in os.listdir(directory):
+                if (name.startswith(os.path.basename(stem) + ".") and name.endswith(".npy")
+                        and name != vectors_name):
+                    os.remove(os.path.join(directory, name))
+
+    @classmethod
+    def load(cls, stem: str, words: Sequence[str]) -> Optional["HintIndex"]:
+        """Attach to a saved index with its vectors memory-mapped, or None if it was built for other words."""
+        try:
+            with np.load(stem + ".npz") as arrays:
+                centroids, ids, offsets, n_probe = (arrays["centroids"], arrays["ids"],
+                                                    arrays["offsets"], int(arrays["n_probe"]))
+                digest, vectors_name = str(arrays["words_digest"]), str(arrays["vectors"])
+            if digest != _words_digest(words):
+                return None
+            vectors = np.load(os.path.join(os.path.dirname(stem), vectors_name), mmap_mode="r")
+        except (OSError, ValueError, KeyError):
+            return None
+        if len(ids) != len(words) or vectors.shape[0] != len(words):
+            return None
+        index = cls.__new__(cls)
+        index.words = list(words)
+        index.centroids = centroids
+        index.n_lists = len(centroids)
+        index.n_probe = n_probe
+        index._ids = ids
+        index._vectors = vectors
+        index._offsets = offsets
+        return index
+
+    def query(self, vector: np.ndarray, k: int = 5, exclude: Iterable[str] = ()) -> List[Tuple[str, float]]:
+        """Approximate k nearest words to a normalized vector, as (word, cosine) pairs."""
+        exclude = set(exclude)
+        if not self.words or k <= 0:
+            return []
+        vector = np.asarray(vector, dtype=np.float32)
+
+        if self.n_probe < self.n_lists:
+            probes = np.argpartition(self.centroids @ vector, -self.n_probe)[-self.n_probe:]
+        else:
+            probes = range(self.n_lists)
+        slices = [slice(self._offsets[p], self._offsets[p + 1]) for p in probes]
+        candidates = np.concatenate([self._ids[s] for s in slices])
+        scores = np.concatenate([self._vectors[s] @ vector for s in slices])
+
+        # Over-fetch so excluded words do not leave the result short
+        wanted = min(len(scores), k + len(exclude))
+        top = np.argpartition(scores, -wanted)[-wanted:]
+        top = top[np.argsort(scores[top])[::-1]]
+
+        results = []
+        for i in top:
+            word = self.words[candidates[i]]
+            if word not in exclude:
+                results.append((word, float(scores[i])))
+                if len(results) == k:
+                    break
+        return results
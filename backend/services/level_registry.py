@@ -0,0 +1,170 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+from services.progress_store import MAX_LEVEL_ID
+
+DEFAULT_LEVELS_CONFIG = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "levels.json"
+)
+
+
+class LevelValidator:
+    """Decides whether a submission to /solution completes a level."""
+
+    type_name = ""
+
+    # Whether a submission to /solution completes the level by itself
+    completes_on_submit = False
+
+    def __init__(self, config: Dict[str, Any]):
+        pass
+
+
+class AutoValidator(LevelValidator):
+    """Levels validated in the browser: any submission completes them."""
+
+    type_name = "auto"
+    completes_on_submit = True
+
+
+class ExternalValidator(LevelValidator):
+    """Levels completed by their own endpoint (e.g. the word game)."""
+
+    type_name = "external"
+
+
+class CircuitValidator(LevelValidator):
+    """Logic-gate circuits; the level completes once every circuit is solved.
+
+    Circuits own bits of the player's circuit mask in config order, so new
+    circuits should be appended to keep stored progress meaningful.
+    """
+
+    type_name = "circuits"
+
+    def __init__(self, config: Dict[str, Any]):
+        # Solutions are compiled to tuples: a check is one hash lookup plus one tuple compare
+        self.solutions = {circuit_id: tuple(sequence) for circuit_id, sequence in config["circuits"].items()}
+        self.circuit_bits = {circuit_id: 1 << i for i, circuit_id in enumerate(self.solutions)}
+        self.all_circuits_mask = (1 << len(self.solutions)) - 1
+
+    def check(self, circuit_id: str, sequence: Sequence[str]) -> bool:
+        solution = self.solutions.get(circuit_id)
+        return solution is not None and tuple(sequence) == solution
+
+
+class AnswersValidator(LevelValidator):
+    """A fixed list of answers, checked as a whole."""
+
+    type_name = "answers"
+
+    def __init__(self, config: Dict[str, Any]):
+        self.answers = tuple(config["answers"])
+
+    def check(self, answers: Sequence[str]) -> bool:
+        return tuple(answers) == self.answers
+
+
+VALIDATOR_TYPES = {cls.type_name: cls for cls in (AutoValidator, ExternalValidator, CircuitValidator, AnswersValidator)}
+
+
+class Level:
+    __slots__ = ("id", "name", "validator")
+
+    def __init__(self, level_id: int, name: str, validator: LevelValidator):
+        self.id = level_id
+        self.name = name
+        self.validator = validator
+
+
+class LevelSet:
+    """One immutable, fully validated snapshot of the level config."""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.levels: Dict[int, Level] = {}
+        self.by_type: Dict[str, Level] = {}
+        for entry in config["levels"]:
+            validator_config = entry.get("validator", {"type": "auto"})
+            validator_cls = VALIDATOR_TYPES.get(validator_config["type"])
+            if validator_cls is None:
+                raise ValueError(f"Unknown validator type for level {entry['id']}: {validator_config['type']}")
+            level = Level(int(entry["id"]), entry.get("name", f"Level {entry['id']}"), validator_cls(validator_config))
+            # Level ids are bit positions in the progress mask, below the circuit bits
+            if not 1 <= level.id <= MAX_LEVEL_ID:
+                raise ValueError(f"Level id {level.id} is outside 1..{MAX_LEVEL_ID}")
+            if level.id in self.levels:
+                raise ValueError(f"Duplicate level id {level.id}")
+            self.levels[level.id] = level
+            # The first level of each type serves that type's endpoint
+            self.by_type.setdefault(validator_cls.type_name, level)
+        self.total_levels = max(self.levels) if self.levels else 0
+
+
+class LevelRegistry:
+    """Level definitions loaded from a JSON config, with hot reload.
+
+    The config file is re-checked at most every ``reload_seconds``; when its
+    modification time changes it is parsed into a new LevelSet that replaces
+    the current one in a single assignment. A config that fails to parse
+    is ignored and the previous levels stay active.
+    """
+
+    def __init__(self, path: str = DEFAULT_LEVELS_CONFIG, reload_seconds: float = 5.0):
+        self.path = path
+        self.reload_seconds = reload_seconds
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = 0.0
+        self._levels = self._load()
+
+    def _load(self) -> LevelSet:
+        mtime = os.path.getmtime(self.path)
+        with open(self.path) as f:
+            levels = LevelSet(json.load(f))
+        self._mtime = mtime
+        return levels
+
+    def reload(self, force: bool = False) -> bool:
+        """Reload the config if it changed on disk; returns whether new levels are active."""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                if not force and os.path.getmtime(self.path) == self._mtime:
+                    return False
+                self._levels = self._load()
+            except (OSError, ValueError, KeyError, TypeError):
+                return False
+            return True
+
+    @property
+    def levels(self) -> LevelSet:
+        if self.reload_seconds > 0 and time.monotonic() - self._checked_at >= self.reload_seconds:
+            self.reload()
+        return self._levels
+
+    def get(self, level_id: int) -> Optional[Level]:
+        return self.levels.levels.get(level_id)
+
+    def find(self, type_name: str) -> Optional[Level]:
+        """The level served by a validator type's endpoint."""
+        return self.levels.by_type.get(type_name)
+
+    @property
+    def total_levels(self) -> int:
+        return self.levels.total_levels
+
+    def describe(self) -> List[Dict[str, Any]]:
+        return [
+            {"id": level.id, "name": level.name, "validator": level.validator.type_name}
+            for level in sorted(self.levels.levels.values(), key=lambda level: level.id)
+        ]
+
+
+def create_level_registry() -> LevelRegistry:
+    """Build the level registry configured through the environment."""
+    return LevelRegistry(
+        path=os.getenv("LEVELS_CONFIG", DEFAULT_LEVELS_CONFIG),
+        reload_seconds=float(os.getenv("LEVELS_RELOAD_SECONDS", "5")),
+    )
@@ -1,125 +1,340 @@
-from typing import List, Set, Dict, Any
-from services.word_game_services import WordGameService
+import asyncio
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import List, Set, Dict, Any, Optional, Tuple
+from services.progress_store import (
+    CIRCUIT_SHIFT, DEFAULT_PLAYER, LEVEL_MASK, ProgressStore, create_progress_store, decode_levels, level_bit,
+    valid_level_id
+)
+from services.level_registry import LevelRegistry, create_level_registry
+from services.progress_events import Leaderboard, ProgressEvents
+
+# How the word game (numpy, Gemini SDK, embeddings) is set up:
+#   eager      - build it inside LevelServices()
+#   lazy       - build it on first use
+#   background - build it in a warm-up thread started by the app's startup hook
+WARMUP_MODES = ("eager", "lazy", "background")
+
 
 class LevelServices:
-    def __init__(self):
-        self.completed_levels = set()
-        self.total_levels = 5  # Updated to include Level 5
-        
-        # Initialize services for different levels
-        self.word_game_service = WordGameService()
-        
-        # For Level 4: Logic Gate Puzzle
-        # Track which circuits have been solved
-        self.solved_circuits = {"circuit1": False, "circuit2": False}
+    def __init__(self, warmup_mode: Optional[str] = None, progress: Optional[ProgressStore] = None,
+                 registry: Optional[LevelRegistry] = None):
+        # Completed levels and solved circuits are tracked per player
+        self.progress = progress if progress is not None else create_progress_store()
+        # Levels, their validators and puzzle answers come from config/levels.json
+        self.registry = registry if registry is not None else create_level_registry()
         
-        # Define solutions for each circuit
-        self.circuit_solutions = {
-            "circuit1": ["NOT", "AND", "OR"],
-            "circuit2": ["NAND", "OR", "NOR"]
-        }
+        # Every progress change updates the leaderboard and is pushed to /events subscribers
+        self.leaderboard = Leaderboard()
+        self.events = ProgressEvents()
+        for player_id, state, updated_at in self.progress.all_players():
+            if state & LEVEL_MASK:
+                self.leaderboard.update(player_id, _count_levels(state), updated_at)
+        self.progress.add_listener(self._on_progress_change)
         
-        # For Level 5: Access Pattern Identification
-        self.access_pattern_correct_answers = ["Unauthorized", "Unauthorized", "Authorized", "Unauthorized"]
+        # Initialize services for different levels
+        self.warmup_mode = (warmup_mode or os.getenv("WORD_GAME_INIT", "background")).lower()
+        if self.warmup_mode not in WARMUP_MODES:
+            raise ValueError(f"Unknown WORD_GAME_INIT mode: {self.warmup_mode}")
+        self._word_game_service = None
+        self._word_game_lock = threading.Lock()
+        self._warmup_thread = None
+        # Requests waiting on the event loop for the warm-up: (loop, future) pairs
+        self._ready_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._ready_waiters_lock = threading.Lock()
+        if self.warmup_mode == "eager":
+            self.warm_up()
+    
+    @property
+    def total_levels(self) -> int:
+        return self.registry.total_levels
+    
+    @property
+    def word_game_service(self):
+        """The word game service, built on first access."""
+        if self._word_game_service is None:
+            self.warm_up()
+        return self._word_game_service
+    
+    @property
+    def is_ready(self) -> bool:
+        """Whether the word game has finished initializing."""
+        return self._word_game_service is not None
+    
+    def warm_up(self):
+        """Build the word game service if it has not been built yet."""
+        error = None
+        with self._word_game_lock:
+            if self._word_game_service is None:
+                from services.word_game_services import WordGameService
+                try:
+                    self._word_game_service = WordGameService()
+                except Exception as exc:
+                    error = exc
+        self._wake_ready_waiters(error)
+        if error is not None:
+            raise error
+    
+    async def wait_until_ready(self):
+        """The word game service, awaited on the event loop instead of on a thread while it warms up."""
+        if self.is_ready:
+            return self._word_game_service
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._ready_waiters_lock:
+            # Checked again under the lock so a warm-up finishing now cannot miss this waiter
+            if self.is_ready:
+                return self._word_game_service
+            self._ready_waiters.append((loop, future))
+        # Lazy mode builds on first use, also off the request path
+        self.start_background_warmup()
+        await future
+        return self._word_game_service
     
-    def is_level_available(self, level_id: int) -> bool:
+    def _wake_ready_waiters(self, error: Optional[BaseException]) -> None:
+        with self._ready_waiters_lock:
+            waiters, self._ready_waiters = self._ready_waiters, []
+            if error is not None:
+                # The next waiter starts a new attempt
+                self._warmup_thread = None
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future, error)
+    
+    def start_background_warmup(self) -> threading.Thread:
+        """Start building the word game service in a daemon thread (again, if an earlier attempt failed)."""
+        with self._ready_waiters_lock:
+            if self._warmup_thread is None:
+                self._warmup_thread = threading.Thread(target=self.warm_up, name="word-game-warmup", daemon=True)
+                self._warmup_thread.start()
+            return self._warmup_thread
+    
+    def is_level_available(self, level_id: int, player_id: str = DEFAULT_PLAYER) -> bool:
         """Check if a level is available to play."""
         # First level is always available
         if level_id == 1:
             return True
             
         # Other levels are available if the previous level is completed
-        return level_id - 1 in self.completed_levels
+        return valid_level_id(level_id) and bool(self.progress.levels(player_id) & level_bit(level_id - 1))
     
-    def get_available_levels(self) -> List[int]:
+    def get_available_levels(self, player_id: str = DEFAULT_PLAYER) -> List[int]:
         """Return list of available levels."""
-        return [i for i in range(1, self.total_levels + 1) 
-                if self.is_level_available(i)]
+        return list(_available_levels(self.progress.levels(player_id), self.total_levels))
     
-    def get_completed_levels(self) -> Set[int]:
+    def get_completed_levels(self, player_id: str = DEFAULT_PLAYER) -> Set[int]:
         """Return set of completed levels."""
-        return self.completed_levels
+        return set(decode_levels(self.progress.levels(player_id)))
+    
+    def is_level_completed(self, level_id: int, player_id: str = DEFAULT_PLAYER) -> bool:
+        """Check if a level has been completed."""
+        return valid_level_id(level_id) and bool(self.progress.levels(player_id) & level_bit(level_id))
+    
+    def progress_snapshot(self, player_id: str = DEFAULT_PLAYER) -> Dict[str, Any]:
+        """Completed and available levels plus leaderboard rank, as pushed to /events subscribers."""
+        return self._progress_payload(player_id, self.progress.levels(player_id))
+    
+    def _progress_payload(self, player_id: str, levels: int) -> Dict[str, Any]:
+        return {
+            "player_id": player_id,
+            "completed": list(decode_levels(levels)),
+            "available": list(_available_levels(levels, self.total_levels)),
+            "rank": self.leaderboard.rank(player_id),
+        }
+    
+    def _on_progress_change(self, player_id: str, old_state: Optional[int], new_state: int) -> None:
+        """Progress store listener: update the leaderboard and publish the delta."""
+        new_levels = new_state & LEVEL_MASK
+        if old_state is None:
+            # The store did not have the player cached. Everyone with a level is on the
+            # board, so a player missing from it had none; otherwise which levels are
+            # new is unknown, and only a changed count is published
+            on_board = self.leaderboard.rank(player_id) is not None
+            if not on_board and not new_levels:
+                return
+            old_levels = new_levels if on_board else 0
+        elif (old_state & LEVEL_MASK) == new_levels:
+            # Only circuit bits changed; nothing to show on the board
+            return
+        else:
+            old_levels = old_state & LEVEL_MASK
+        levels = _count_levels(new_levels)
+        reached_at = time.time()
+        rank = self.leaderboard.update(player_id, levels, reached_at)
+        if old_state is None and rank is None:
+            # Reloaded after eviction with the count the board already had
+            return
+        payload = self._progress_payload(player_id, new_levels)
+        payload["newly_completed"] = list(decode_levels(new_levels & ~old_levels))
+        self.events.publish("progress", payload, player_id=player_id)
+        if rank is not None:
+            # Enough for clients to re-sort their copy of the board, whose other ranks shift
+            self.events.publish("leaderboard", {"player_id": player_id, "levels": levels,
+                                                "reached_at": reached_at, "rank": rank})
+    
+    def _complete_level(self, level_id: int, player_id: str) -> None:
+        self.progress.update(player_id, set_levels=level_bit(level_id))
         
-    def check_solution(self, level_id: int, dev_mode: bool = False) -> bool:
+    def check_solution(self, level_id: int, player_id: str = DEFAULT_PLAYER, dev_mode: bool = False) -> bool:
         """Check if the solution for a given level is correct."""
-        if dev_mode:
-            # In dev mode, just mark as completed
-            self.completed_levels.add(level_id)
-            return True
-            
-        # Normal validation logic goes here for each level
-        if level_id == 1:
-            self.completed_levels.add(level_id)
-            return True
-        elif level_id == 2:
-            self.completed_levels.add(level_id)
-            return True
-        elif level_id == 3:
-            # Level 3 is handled by the word game service
-            return level_id in self.completed_levels
-        elif level_id == 4:
-            # Level 4 is handled by the logic gates endpoint
-            return level_id in self.completed_levels
-        elif level_id == 5:
-            # Level 5 is handled by the access pattern endpoint
-            return level_id in self.completed_levels
-        elif level_id == 6:
-            self.completed_levels.add(level_id)
-            return True
-        elif level_id == 7:
-            self.completed_levels.add(level_id)
-            return True
-        elif level_id == 8:
-            self.completed_levels.add(level_id)
-            return True
-        else:
+        level = self.registry.get(level_id)
+        if level is None:
             return False
+        
+        if dev_mode or level.validator.completes_on_submit:
+            # In dev mode, or for levels validated in the browser, just mark as completed
+            self._complete_level(level_id, player_id)
+            return True
+        
+        # Levels with their own endpoint are checked there
+        return self.is_level_completed(level_id, player_id)
     
-    def complete_level_3(self):
+    def complete_level_3(self, player_id: str = DEFAULT_PLAYER):
         """Mark level 3 as completed."""
-        self.completed_levels.add(3)
+        self._complete_level(3, player_id)
     
-    def complete_level_4(self):
+    def complete_level_4(self, player_id: str = DEFAULT_PLAYER):
         """Mark level 4 as completed."""
-        self.completed_levels.add(4)
+        self._complete_level(4, player_id)
     
-    def check_logic_gates(self, submitted_sequence: List[str], circuit_id: str) -> Dict[str, Any]:
+    def check_logic_gates(self, submitted_sequence: List[str], circuit_id: str,
+                          player_id: str = DEFAULT_PLAYER) -> Dict[str, Any]:
         """Check if the submitted logic gate sequence is correct for a specific circuit."""
-        # Get the expected solution for this circuit
-        expected_solution = self.circuit_solutions.get(circuit_id)
+        level = self.registry.find("circuits")
+        if level is None:
+            return {"correct": False, "completed": False, "all_circuits_solved": False, "circuits_solved": []}
+        validator = level.validator
         
         # Check if solution is correct
-        is_correct = submitted_sequence == expected_solution
+        is_correct = validator.check(circuit_id, submitted_sequence)
         
         if is_correct:
-            # Mark this circuit as solved
-            self.solved_circuits[circuit_id] = True
+            # Mark this circuit as solved; update() is atomic and returns the new state,
+            # so concurrent solves of different circuits cannot miss each other
+            state = self.progress.update(player_id, set_circuits=validator.circuit_bits[circuit_id])
             
-            # Only complete the level if both circuits are solved
-            if all(self.solved_circuits.values()):
-                self.completed_levels.add(4)
+            # Only complete the level if every circuit is solved
+            if (state >> CIRCUIT_SHIFT) & validator.all_circuits_mask == validator.all_circuits_mask:
+                state = self.progress.update(player_id, set_levels=level_bit(level.id))
+        else:
+            state = self.progress.get(player_id)
         
+        solved = state >> CIRCUIT_SHIFT
         return {
             "correct": is_correct,
-            "completed": 4 in self.completed_levels,
-            "all_circuits_solved": all(self.solved_circuits.values()),
-            "circuits_solved": list(k for k, v in self.solved_circuits.items() if v)
+            "completed": bool(state & level_bit(level.id)),
+            "all_circuits_solved": solved & validator.all_circuits_mask == validator.all_circuits_mask,
+            "circuits_solved": [k for k, bit in validator.circuit_bits.items() if solved & bit]
         }
     
-    def reset_logic_circuits(self):
+    def reset_logic_circuits(self, player_id: str = DEFAULT_PLAYER):
         """Reset the logic circuit status."""
-        self.solved_circuits = {"circuit1": False, "circuit2": False}
-        if 4 in self.completed_levels:
-            self.completed_levels.remove(4)
+        level = self.registry.find("circuits")
+        if level is not None:
+            self.progress.update(player_id, clear_levels=level_bit(level.id),
+                                 clear_circuits=level.validator.all_circuits_mask)
     
-    def check_access_patterns(self, submitted_answers: List[str]) -> Dict[str, Any]:
+    def check_access_patterns(self, submitted_answers: List[str],
+                              player_id: str = DEFAULT_PLAYER) -> Dict[str, Any]:
         """Check if the submitted access pattern classifications are correct."""
-        is_correct = submitted_answers == self.access_pattern_correct_answers
+        level = self.registry.find("answers")
+        if level is None:
+            return {"correct": False, "completed": False}
+        is_correct = level.validator.check(submitted_answers)
         
         if is_correct:
-            self.completed_levels.add(5)
+            state = self.progress.update(player_id, set_levels=level_bit(level.id))
+        else:
+            state = self.progress.get(player_id)
         
         return {
             "correct": is_correct,
-            "completed": 5 in self.completed_levels
-        }
\ No newline at end of file
+            "completed": bool(state & level_bit(level.id))
+        }
+    
+    def check_batch(self, circuit_submissions: List[Tuple[str, str, List[str]]],
+                    pattern_submissions: List[Tuple[str, List[str]]]) -> Dict[str, List[Dict[str, Any]]]:
+        """Validate many (player, circuit, sequence) and (player, answers) submissions in one pass.
+        
+        Correct submissions are folded into one progress update per player, so
+        the completion fields of each result reflect that player's state after
+        the whole batch.
+        """
+        circuit_level = self.registry.find("circuits")
+        pattern_level = self.registry.find("answers")
+        
+        # First pass: check every item and collect the bits to set per player
+        set_circuits: Dict[str, int] = {}
+        set_levels: Dict[str, int] = {}
+        circuit_correct = []
+        for player_id, circuit_id, sequence in circuit_submissions:
+            is_correct = circuit_level is not None and circuit_level.validator.check(circuit_id, sequence)
+            circuit_correct.append(is_correct)
+            set_circuits.setdefault(player_id, 0)
+            if is_correct:
+                set_circuits[player_id] |= circuit_level.validator.circuit_bits[circuit_id]
+        pattern_correct = []
+        for player_id, answers in pattern_submissions:
+            is_correct = pattern_level is not None and pattern_level.validator.check(answers)
+            pattern_correct.append(is_correct)
+            set_levels.setdefault(player_id, 0)
+            if is_correct:
+                set_levels[player_id] |= level_bit(pattern_level.id)
+        
+        # One atomic update per player
+        states = {}
+        for player_id in set_circuits.keys() | set_levels.keys():
+            circuits, levels = set_circuits.get(player_id, 0), set_levels.get(player_id, 0)
+            if circuits or levels:
+                state = self.progress.update(player_id, set_levels=levels, set_circuits=circuits)
+            else:
+                state = self.progress.get(player_id)
+            if circuits:
+                all_mask = circuit_level.validator.all_circuits_mask
+                if (state >> CIRCUIT_SHIFT) & all_mask == all_mask and not state & level_bit(circuit_level.id):
+                    state = self.progress.update(player_id, set_levels=level_bit(circuit_level.id))
+            states[player_id] = state
+        
+        circuit_results = []
+        for (player_id, _, _), is_correct in zip(circuit_submissions, circuit_correct):
+            result = {"player_id": player_id, "correct": is_correct, "completed": False,
+                      "all_circuits_solved": False, "circuits_solved": []}
+            if circuit_level is not None:
+                validator = circuit_level.validator
+                state = states[player_id]
+                solved = state >> CIRCUIT_SHIFT
+                result["completed"] = bool(state & level_bit(circuit_level.id))
+                result["all_circuits_solved"] = solved & validator.all_circuits_mask == validator.all_circuits_mask
+                result["circuits_solved"] = [k for k, bit in validator.circuit_bits.items() if solved & bit]
+            circuit_results.append(result)
+        pattern_results = [
+            {
+                "player_id": player_id,
+                "correct": is_correct,
+                "completed": pattern_level is not None and bool(states[player_id] & level_bit(pattern_level.id))
+            }
+            for (player_id, _), is_correct in zip(pattern_submissions, pattern_correct)
+        ]
+        return {"circuits": circuit_results, "patterns": pattern_results}
+
+
+@lru_cache(maxsize=4096)
+def _available_levels(levels: int, total_levels: int) -> Tuple[int, ...]:
+    """Available levels for a completed-levels bitmask: level 1 plus every level after a completed one."""
+    available = (1 | (levels << 1)) & ((1 << total_levels) - 1)
+    return decode_levels(available)
+
+
+def _count_levels(state: int) -> int:
+    return bin(state & LEVEL_MASK).count("1")
+
+
+def _resolve(future: asyncio.Future, error: Optional[BaseException]) -> None:
+    # A waiter whose request was cancelled has nothing left to wake
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(None)
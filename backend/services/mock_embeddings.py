@@ -0,0 +1,82 @@
+import hashlib
+from typing import Iterable, List, Optional, Sequence
+import numpy as np
+
+_GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
+
+def stable_seed(text: str) -> int:
+    """64-bit seed from a word, identical across processes and platforms.
+
+    Unlike ``hash()`` it is not salted per process, and unlike summing
+    character codes it does not collide for anagrams.
+    """
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _splitmix64(values: np.ndarray) -> np.ndarray:
+    # Vectorized SplitMix64 finalizer; uint64 arithmetic wraps modulo 2**64
+    z = values ^ (values >> np.uint64(30))
+    z *= _MIX1
+    z ^= z >> np.uint64(27)
+    z *= _MIX2
+    z ^= z >> np.uint64(31)
+    return z
+
+
+def hashed_normals(seeds: np.ndarray, dim: int) -> np.ndarray:
+    """Standard normal rows, one per seed, in a single vectorized pass.
+
+    Row i depends only on seeds[i] (a counter-based stream: the hash of
+    seed and position), so a word gets the same vector whether it is
+    generated alone or as part of any vocabulary.
+    """
+    pairs = (dim + 1) // 2
+    counters = np.arange(1, pairs + 1, dtype=np.uint64) * _GOLDEN_GAMMA
+    bits = _splitmix64(seeds.astype(np.uint64)[:, None] + counters[None, :])
+    # Each 64-bit hash yields two 24-bit float32 uniforms in (0, 1]; zero would
+    # break the log below. Single precision is plenty for mock vectors.
+    scale = np.float32(1.0 / 2**24)
+    high = ((bits >> np.uint64(40)).astype(np.float32) + np.float32(1.0)) * scale
+    low = (((bits >> np.uint64(8)) & np.uint64(0xFFFFFF)).astype(np.float32) + np.float32(1.0)) * scale
+    # Box-Muller: each pair of uniforms gives two independent normals
+    radius = np.sqrt(np.float32(-2.0) * np.log(high))
+    angle = np.float32(2.0 * np.pi) * low
+    return np.concatenate([radius * np.cos(angle), radius * np.sin(angle)], axis=1)[:, :dim]
+
+
+def anchor_vector(word: str, dim: int) -> np.ndarray:
+    """Unit vector for a target word, from a Generator seeded by its stable hash."""
+    vector = np.random.default_rng(stable_seed(word)).standard_normal(dim)
+    return (vector / np.linalg.norm(vector)).astype(np.float32)
+
+
+def mock_embeddings(words: Sequence[str], anchor: Optional[np.ndarray], similarities: Iterable[float],
+                    dim: int) -> np.ndarray:
+    """Unit vectors for the words with a chosen cosine similarity to the anchor.
+
+    Each word's random direction is orthogonalized against the anchor and
+    mixed back in as ``s * anchor + sqrt(1 - s^2) * ortho``, for all rows at
+    once. Without an anchor the random directions are returned as is.
+    """
+    seeds = np.fromiter((stable_seed(word) for word in words), dtype=np.uint64, count=len(words))
+    random_vecs = hashed_normals(seeds, dim)
+    random_vecs /= np.linalg.norm(random_vecs, axis=1, keepdims=True)
+    if anchor is None or not len(words):
+        return random_vecs
+
+    anchor = np.asarray(anchor, dtype=np.float32)
+    anchor = anchor / np.linalg.norm(anchor)
+    ortho = random_vecs - np.outer(random_vecs @ anchor, anchor)
+    norms = np.linalg.norm(ortho, axis=1, keepdims=True)
+    sims = np.clip(np.fromiter(similarities, dtype=np.float32, count=len(words)), -1.0, 1.0)[:, None]
+    mixed = sims * anchor + np.sqrt(1.0 - sims ** 2) * ortho / np.where(norms > 1e-6, norms, 1.0)
+    # Fall back to the random vector if orthogonalization fails
+    return np.where(norms > 1e-6, mixed, random_vecs)
+
+
+def similarity_targets(words: List[str], known: dict, default: float) -> List[float]:
+    """Target cosine per word: the known score / 100, or the default."""
+    return [known[word] / 100.0 if word in known else default for word in words]
@@ -0,0 +1,76 @@
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Optional
+
+
+class SamplingProfiler:
+    """Low-overhead wall-clock profiler that samples every thread's stack.
+
+    A daemon thread wakes every ``interval`` seconds, walks the frames of
+    all other threads and counts each stack in collapsed form
+    (``outer;inner;leaf``), ready for flamegraph tools. Only the
+    ``max_stacks`` most frequent stacks are kept between reports.
+    """
+
+    def __init__(self, interval: float = 0.01, max_depth: int = 64, max_stacks: int = 5000):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.max_stacks = max_stacks
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, frame in frames.items():
+                    if thread_id == own_id:
+                        continue
+                    self._stacks[self._collapse(frame)] += 1
+                self.samples += 1
+                if len(self._stacks) > 2 * self.max_stacks:
+                    self._stacks = Counter(dict(self._stacks.most_common(self.max_stacks)))
+
+    def _collapse(self, frame) -> str:
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def report(self, limit: int = 200, reset: bool = False) -> str:
+        """Collapsed stacks with their sample counts, most frequent first."""
+        with self._lock:
+            lines = [f"{stack} {count}" for stack, count in self._stacks.most_common(limit)]
+            if reset:
+                self._stacks.clear()
+                self.samples = 0
+        return "\n".join(lines) + "\n"
+
+
+def create_profiler() -> Optional[SamplingProfiler]:
+    """A started profiler when PROFILER_ENABLED is set, otherwise None."""
+    if os.getenv("PROFILER_ENABLED", "").lower() not in ("1", "true", "yes"):
+        return None
+    profiler = SamplingProfiler(interval=float(os.getenv("PROFILER_INTERVAL", "0.01")))
+    profiler.start()
+    return profiler
@@ -0,0 +1,124 @@
+import asyncio
+import bisect
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+class Leaderboard:
+    """Players ranked by levels completed, ties broken by who got there first.
+
+    Kept as a sorted list of ``(-levels, reached_at, player_id)`` keys that is
+    updated in place when a player's level count changes, so reading the top
+    of the board or a player's rank never re-sorts everyone.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[int, float]] = {}
+        self._order: List[Tuple[int, float, str]] = []
+        self._lock = threading.Lock()
+
+    def update(self, player_id: str, levels: int, reached_at: Optional[float] = None) -> Optional[int]:
+        """Record a player's level count; returns their new rank, or None if nothing changed."""
+        with self._lock:
+            previous = self._entries.get(player_id)
+            if previous is not None:
+                if previous[0] == levels:
+                    return None
+                old_key = (-previous[0], previous[1], player_id)
+                del self._order[bisect.bisect_left(self._order, old_key)]
+            reached_at = time.time() if reached_at is None else reached_at
+            self._entries[player_id] = (levels, reached_at)
+            key = (-levels, reached_at, player_id)
+            index = bisect.bisect_left(self._order, key)
+            self._order.insert(index, key)
+            return index + 1
+
+    def rank(self, player_id: str) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(player_id)
+            if entry is None:
+                return None
+            return bisect.bisect_left(self._order, (-entry[0], entry[1], player_id)) + 1
+
+    def top(self, limit: int = 10) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {"rank": i + 1, "player_id": player_id, "levels": -neg_levels, "reached_at": reached_at}
+                for i, (neg_levels, reached_at, player_id) in enumerate(self._order[:limit])
+            ]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class Subscription:
+    """One connected stream: a bounded queue of encoded events, optionally for a single player."""
+
+    def __init__(self, player_id: Optional[str], queue_size: int):
+        self.player_id = player_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+
+    def offer(self, data: Optional[str]) -> None:
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            # A client this far behind is cut off; on reconnect it gets a fresh snapshot
+            self.closed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class ProgressEvents:
+    """Fan-out of progress deltas to Server-Sent Events subscribers.
+
+    ``publish`` may be called from any thread (progress updates run on the
+    executor); each event is encoded once and handed to the event loop,
+    which copies it into every matching subscriber's queue. Events with a
+    player_id go to that player's subscribers and to unfiltered ones;
+    events without one go to everybody.
+    """
+
+    def __init__(self, queue_size: int = 256):
+        self.queue_size = queue_size
+        self._subscribers: Set[Subscription] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def subscribe(self, player_id: Optional[str] = None) -> Subscription:
+        """Register a subscriber; must be called from the event loop that will read it."""
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(player_id, self.queue_size)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: str, payload: Dict[str, Any], player_id: Optional[str] = None) -> None:
+        loop = self._loop
+        if not self._subscribers or loop is None or loop.is_closed():
+            return
+        data = format_event(event, payload)
+        try:
+            loop.call_soon_threadsafe(self._deliver, data, player_id)
+        except RuntimeError:
+            # The loop is shutting down
+            pass
+
+    def _deliver(self, data: str, player_id: Optional[str]) -> None:
+        for subscription in list(self._subscribers):
+            if player_id is None or subscription.player_id in (None, player_id):
+                subscription.offer(data)
+
+
+def format_event(event: str, payload: Dict[str, Any]) -> str:
+    """Encode one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n"
@@ -0,0 +1,298 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_PLAYER = "anonymous"
+
+# A player's whole progress is one int: completed levels in the low bits
+# (bit n-1 for level n) and solved circuits from CIRCUIT_SHIFT upwards.
+CIRCUIT_SHIFT = 32
+LEVEL_MASK = (1 << CIRCUIT_SHIFT) - 1
+# Highest level id that fits below the circuit bits
+MAX_LEVEL_ID = CIRCUIT_SHIFT
+
+
+class ProgressStore:
+    """Per-player level and circuit bitmasks with write-behind persistence.
+
+    Reads and writes hit an in-process dict. When a database path is given,
+    changed players are written to SQLite in batches by a background thread,
+    so completing a level never waits on disk. What is written are the bits
+    set and cleared since the last flush, merged into the stored state in
+    SQL, so workers never overwrite each other's bits. Cached entries are
+    re-read from the database after ``refresh_seconds`` (and right after a
+    flush) so other workers' writes become visible.
+
+    Listeners are told about every change of a player's state, whether made
+    here or picked up from another worker's flush (``sync``, run by the
+    flush thread). One player's notifications are delivered in order. The
+    old state is None when the player was not cached, so it is unknown.
+
+    Players with no progress are not cached. With a database, at most
+    ``max_cached`` players are, least recently loaded first out; a player
+    with changes not yet flushed is never dropped.
+    """
+
+    # Rows updated this long before the last sync are looked at again, for writes that committed late
+    SYNC_MARGIN = 5.0
+
+    def __init__(self, db_path: Optional[str] = None, flush_interval: float = 1.0,
+                 refresh_seconds: float = 2.0, max_cached: int = 100000):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.refresh_seconds = refresh_seconds
+        self.max_cached = max_cached
+        self._state: Dict[str, int] = {}
+        # When each cached player was last read from the database, least recent first
+        self._loaded_at: "OrderedDict[str, float]" = OrderedDict()
+        # Bits set and cleared per player since the last flush; its keys are the dirty players
+        self._pending: Dict[str, Tuple[int, int]] = {}
+        # Deltas being written by the flush in progress; like pending ones, they win over the database
+        self._flushing: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+        # Striped per-player locks that order each player's changes and notifications
+        self._player_locks = [threading.RLock() for _ in range(64)]
+        self._synced_at = time.time()
+        self._local = threading.local()
+        self._flusher = None
+        self._stopped = threading.Event()
+        self._listeners: List[Callable[[str, Optional[int], int], None]] = []
+        if db_path:
+            self._connection().execute(
+                "CREATE TABLE IF NOT EXISTS progress ("
+                "player_id TEXT PRIMARY KEY, state INTEGER NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._flusher = threading.Thread(target=self._flush_loop, name="progress-flush", daemon=True)
+            self._flusher.start()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, player_id: str) -> int:
+        """Return the packed progress state of a player (0 for a new player)."""
+        state = self._state.get(player_id)
+        if state is not None and (
+            self.db_path is None
+            or player_id in self._pending
+            or player_id in self._flushing
+            or time.monotonic() - self._loaded_at.get(player_id, 0.0) < self.refresh_seconds
+        ):
+            return state
+        return self._load(player_id)
+
+    def _player_lock(self, player_id: str) -> threading.RLock:
+        return self._player_locks[hash(player_id) % len(self._player_locks)]
+
+    def _load(self, player_id: str) -> int:
+        with self._player_lock(player_id):
+            state = 0
+            if self.db_path:
+                row = self._connection().execute(
+                    "SELECT state FROM progress WHERE player_id = ?", (player_id,)
+                ).fetchone()
+                if row:
+                    state = row[0]
+            return self._apply_stored(player_id, state)
+
+    def _apply_stored(self, player_id: str, state: int) -> int:
+        """Cache a state read from the database and notify if it changed; caller holds the player lock."""
+        with self._lock:
+            # A local write that is not in the database yet wins over it
+            if player_id in self._pending or player_id in self._flushing:
+                return self._state[player_id]
+            old_state = self._state.get(player_id)
+            if state:
+                self._state[player_id] = state
+                self._loaded_at[player_id] = time.monotonic()
+                self._loaded_at.move_to_end(player_id)
+                self._evict()
+            elif old_state is not None:
+                # Back to no progress: nothing left worth caching
+                del self._state[player_id]
+                self._loaded_at.pop(player_id, None)
+        if state != (old_state or 0):
+            self._notify(player_id, old_state, state)
+        return state
+
+    def _evict(self) -> None:
+        """Drop the least recently loaded players over max_cached; caller holds the store lock."""
+        if not self.db_path:
+            # Without a database the cache is the only copy
+            return
+        for _ in range(len(self._loaded_at) - self.max_cached):
+            player_id, _ = self._loaded_at.popitem(last=False)
+            if player_id in self._pending or player_id in self._flushing:
+                # Its change is not in the database yet; it can go once flushed
+                self._loaded_at[player_id] = 0.0
+                continue
+            self._state.pop(player_id, None)
+
+    def _notify(self, player_id: str, old_state: Optional[int], state: int) -> None:
+        # Under the player lock but not the store lock, so listeners may read the store
+        for listener in self._listeners:
+            listener(player_id, old_state, state)
+
+    def levels(self, player_id: str) -> int:
+        return self.get(player_id) & LEVEL_MASK
+
+    def circuits(self, player_id: str) -> int:
+        return self.get(player_id) >> CIRCUIT_SHIFT
+
+    def update(self, player_id: str, set_levels: int = 0, clear_levels: int = 0,
+               set_circuits: int = 0, clear_circuits: int = 0) -> int:
+        """Set and clear level/circuit bits for a player and return the new state."""
+        with self._player_lock(player_id):
+            self.get(player_id)
+            with self._lock:
+                old_state = self._state.get(player_id, 0)
+                set_bits = set_levels | (set_circuits << CIRCUIT_SHIFT)
+                clear_bits = clear_levels | (clear_circuits << CIRCUIT_SHIFT)
+                state = (old_state | set_bits) & ~clear_bits
+                if state == old_state:
+                    return state
+                self._state[player_id] = state
+                self._pending[player_id] = _merge_deltas(self._pending.get(player_id, (0, 0)),
+                                                         (set_bits, clear_bits))
+            self._notify(player_id, old_state, state)
+        return state
+
+    def add_listener(self, listener: Callable[[str, Optional[int], int], None]) -> None:
+        self._listeners.append(listener)
+
+    def all_players(self) -> List[Tuple[str, int, float]]:
+        """(player_id, state, updated_at) for every known player, e.g. to seed a leaderboard.
+
+        Stored states are cached as well, up to ``max_cached``, so that later
+        reads and syncs of those players only notify about changes made after
+        this call.
+        """
+        rows = {}
+        if self.db_path:
+            for player_id, state, updated_at in self._connection().execute(
+                "SELECT player_id, state, updated_at FROM progress"
+            ):
+                rows[player_id] = (player_id, state, updated_at)
+        with self._lock:
+            now = time.monotonic()
+            for player_id, state in self._state.items():
+                if player_id in self._pending or player_id in self._flushing or player_id not in rows:
+                    rows[player_id] = (player_id, state, time.time())
+            for player_id, state, _ in rows.values():
+                if state and player_id not in self._state and len(self._loaded_at) < self.max_cached:
+                    self._state[player_id] = state
+                    self._loaded_at[player_id] = now
+        return list(rows.values())
+
+    def flush(self) -> int:
+        """Write all changed players to the database in one batch; returns how many."""
+        if not self.db_path:
+            return 0
+        with self._lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, {}
+            self._flushing = pending
+        now = time.time()
+        rows = [{"player_id": player_id, "set": set_bits, "clear": clear_bits, "now": now}
+                for player_id, (set_bits, clear_bits) in pending.items()]
+        try:
+            # Only this worker's changes are applied, on top of whatever other workers stored
+            self._connection().executemany(
+                "INSERT INTO progress (player_id, state, updated_at) VALUES (:player_id, :set & ~:clear, :now) "
+                "ON CONFLICT(player_id) DO UPDATE SET state = (state | :set) & ~:clear, updated_at = :now",
+                rows,
+            )
+        except sqlite3.Error:
+            # Put the deltas back, ahead of any made since, so the next flush retries them
+            with self._lock:
+                for player_id, delta in pending.items():
+                    self._pending[player_id] = _merge_deltas(delta, self._pending.get(player_id, (0, 0)))
+                self._flushing = {}
+            raise
+        with self._lock:
+            self._flushing = {}
+            for player_id in pending:
+                if player_id in self._state:
+                    # Re-read on next access to pick up bits other workers merged in
+                    self._loaded_at[player_id] = 0.0
+                    self._loaded_at.move_to_end(player_id)
+            self._evict()
+        return len(rows)
+
+    def sync(self) -> int:
+        """Pick up states other workers flushed since the last sync; returns how many changed here."""
+        if not self.db_path:
+            return 0
+        since, self._synced_at = self._synced_at - self.SYNC_MARGIN, time.time()
+        rows = self._connection().execute(
+            "SELECT player_id, state FROM progress WHERE updated_at >= ?", (since,)
+        ).fetchall()
+        changed = 0
+        for player_id, state in rows:
+            with self._player_lock(player_id):
+                old_state = self._state.get(player_id, 0)
+                changed += self._apply_stored(player_id, state) != old_state
+        return changed
+
+    def _flush_loop(self) -> None:
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+                self.sync()
+            except sqlite3.Error:
+                continue
+
+    def close(self) -> None:
+        """Stop the flush thread and write any pending changes."""
+        self._stopped.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+
+def create_progress_store() -> ProgressStore:
+    """Build the progress store configured through the environment."""
+    return ProgressStore(
+        db_path=os.getenv("PROGRESS_DB_PATH") or None,
+        flush_interval=float(os.getenv("PROGRESS_FLUSH_SECONDS", "1.0")),
+        max_cached=int(os.getenv("PROGRESS_CACHE_SIZE", "100000")),
+    )
+
+
+def valid_level_id(level_id: int) -> bool:
+    return 1 <= level_id <= MAX_LEVEL_ID
+
+
+def level_bit(level_id: int) -> int:
+    if not valid_level_id(level_id):
+        raise ValueError(f"Level id must be between 1 and {MAX_LEVEL_ID}, got {level_id}")
+    return 1 << (level_id - 1)
+
+
+def _merge_deltas(first: Tuple[int, int], then: Tuple[int, int]) -> Tuple[int, int]:
+    """One (set, clear) pair with the effect of applying ``first`` and then ``then``."""
+    return (first[0] & ~then[1]) | then[0], (first[1] & ~then[0]) | then[1]
+
+
+def decode_levels(levels: int) -> Tuple[int, ...]:
+    """Level ids set in a level bitmask, in ascending order."""
+    result = []
+    level_id = 1
+    while levels:
+        if levels & 1:
+            result.append(level_id)
+        levels >>= 1
+        level_id += 1
+    return tuple(result)
@@ -0,0 +1,131 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+class RateLimiter:
+    """Token buckets keyed by an arbitrary string (session id, client IP, ...).
+
+    Each key holds up to ``burst`` tokens and regains ``rate`` tokens per
+    second; a request takes one. ``allow`` returns whether the request may
+    proceed and, if not, how many seconds until a token is available.
+    """
+
+    # Whether allow() may wait on I/O and so belongs on the executor
+    blocking = False
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+
+    def allow(self, key: str, cost: float = 1.0) -> Tuple[bool, float]:
+        raise NotImplementedError
+
+    def _take(self, tokens: float, updated_at: float, now: float, cost: float) -> Tuple[bool, float, float]:
+        # Refill for the time elapsed since the last request, then try to take the cost
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+        if tokens >= cost:
+            return True, tokens - cost, 0.0
+        return False, tokens, (cost - tokens) / self.rate
+
+
+class MemoryRateLimiter(RateLimiter):
+    """In-process buckets; the least recently used keys are dropped beyond ``max_keys``."""
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100000):
+        super().__init__(rate, burst)
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key: str, cost: float = 1.0) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (self.burst, now))
+            allowed, tokens, retry_after = self._take(tokens, updated_at, now, cost)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            # A dropped key starts again with a full bucket, which is the safe direction
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+
+class SQLiteRateLimiter(RateLimiter):
+    """Buckets shared by every worker on the host through a SQLite database file."""
+
+    # Idle buckets (full again by now) are deleted once every this many writes
+    PURGE_INTERVAL = 1000
+    blocking = True
+
+    def __init__(self, rate: float, burst: float, path: str, scope: str):
+        super().__init__(rate, burst)
+        self.path = path
+        self.scope = scope
+        self._local = threading.local()
+        self._writes = 0
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            "scope TEXT NOT NULL, key TEXT NOT NULL, tokens REAL NOT NULL, updated_at REAL NOT NULL, "
+            "PRIMARY KEY (scope, key))"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def allow(self, key: str, cost: float = 1.0) -> Tuple[bool, float]:
+        conn = self._connection()
+        now = time.time()
+        try:
+            # IMMEDIATE takes the write lock up front, so read-modify-write is atomic across workers
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT tokens, updated_at FROM rate_limits WHERE scope = ? AND key = ?", (self.scope, key)
+            ).fetchone()
+            tokens, updated_at = row if row else (self.burst, now)
+            allowed, tokens, retry_after = self._take(tokens, updated_at, now, cost)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limits (scope, key, tokens, updated_at) VALUES (?, ?, ?, ?)",
+                (self.scope, key, tokens, now),
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_INTERVAL == 0:
+                conn.execute("DELETE FROM rate_limits WHERE scope = ? AND updated_at < ?",
+                             (self.scope, now - self.burst / self.rate))
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            # BEGIN itself fails when the database stays locked past the timeout
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            # Never turn a database hiccup into rejected players
+            return True, 0.0
+        return allowed, retry_after
+
+
+def create_rate_limiter(scope: str, default_rate: float, default_burst: float) -> Optional[RateLimiter]:
+    """Limiter for one scope (e.g. "session", "ip") configured through the environment.
+
+    ``<SCOPE>_RATE_LIMIT`` is in requests per second and ``<SCOPE>_RATE_BURST``
+    the bucket size; a rate of 0 disables the limiter. RATE_LIMIT_BACKEND
+    selects memory (per worker) or sqlite (shared through RATE_LIMIT_DB_PATH).
+    """
+    prefix = scope.upper()
+    rate = float(os.getenv(f"{prefix}_RATE_LIMIT", str(default_rate)))
+    burst = float(os.getenv(f"{prefix}_RATE_BURST", str(default_burst)))
+    if rate <= 0:
+        return None
+    backend = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+    if backend == "sqlite":
+        return SQLiteRateLimiter(rate, burst, os.getenv("RATE_LIMIT_DB_PATH", "rate_limits.db"), scope)
+    if backend == "memory":
+        return MemoryRateLimiter(rate, burst)
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {backend}")
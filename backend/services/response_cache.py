@@ -0,0 +1,66 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+class CachedJSON:
+    """A JSON payload serialized once, served with a strong ETag and Cache-Control.
+
+    The body bytes and the ETag (a hash of them) are computed up front, so
+    serving it is a header comparison plus a byte copy; a matching
+    If-None-Match gets an empty 304.
+    """
+
+    __slots__ = ("body", "etag", "cache_control")
+
+    def __init__(self, payload: Any, cache_control: str = "no-cache"):
+        self.body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        self.etag = '"' + hashlib.blake2b(self.body, digest_size=16).hexdigest() + '"'
+        self.cache_control = cache_control
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        # If-None-Match uses the weak comparison, so a W/ prefix still matches
+        tags = (tag.strip() for tag in if_none_match.split(","))
+        return any((tag[2:] if tag.startswith("W/") else tag) == self.etag for tag in tags)
+
+    def response(self, request: Request) -> Response:
+        headers = {"ETag": self.etag, "Cache-Control": self.cache_control}
+        if self.matches(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+        return Response(self.body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """Bounded LRU of CachedJSON entries for payloads that never change once built,
+    e.g. the target word of a session."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, CachedJSON]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[CachedJSON]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, entry: CachedJSON) -> CachedJSON:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
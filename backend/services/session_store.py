@@ -0,0 +1,210 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+class SessionStoreBusy(Exception):
+    """A shared session store stayed locked by other workers past its timeout."""
+
+
+class SessionStore:
+    """Storage for word-game sessions.
+
+    Sessions are dicts of JSON-serializable values, or of objects with a
+    ``to_json()`` method that shared backends store in their place. Callers
+    that mutate a session must ``set`` it again so that shared backends see
+    the change, or use ``update`` for a read-modify-write.
+    """
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def set(self, session_id: str, session: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> None:
+        raise NotImplementedError
+
+    def update(self, session_id: str, fn: Callable[[Dict[str, Any]], Any]) -> Any:
+        """Apply ``fn`` to the session and store it again; returns fn's result, or None if there is no session.
+
+        This default is only atomic against callers that serialize per
+        session themselves (as WordGameService does within a process);
+        stores shared between processes override it.
+        """
+        session = self.get(session_id)
+        if session is None:
+            return None
+        result = fn(session)
+        self.set(session_id, session)
+        return result
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+
+class MemorySessionStore(SessionStore):
+    """In-process store that evicts least recently used sessions by age and count."""
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: float = 3600.0):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            if now - entry[0] > self.ttl_seconds:
+                del self._sessions[session_id]
+                return None
+            # Sliding expiry: every access keeps the session alive
+            self._sessions[session_id] = (now, entry[1])
+            self._sessions.move_to_end(session_id)
+            return entry[1]
+
+    def set(self, session_id: str, session: Dict[str, Any]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[session_id] = (now, session)
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _evict(self, now: float) -> None:
+        # Oldest entries sit at the front, so both limits only ever pop from there
+        while self._sessions:
+            session_id, (last_access, _) = next(iter(self._sessions.items()))
+            if len(self._sessions) > self.max_sessions or now - last_access > self.ttl_seconds:
+                self._sessions.popitem(last=False)
+            else:
+                break
+
+
+class SQLiteSessionStore(SessionStore):
+    """Store shared by every worker on the host through a SQLite database file."""
+
+    # Expired rows are purged once every this many writes
+    PURGE_INTERVAL = 500
+
+    def __init__(self, path: str, ttl_seconds: float = 3600.0):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._writes = 0
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT data FROM sessions WHERE id = ? AND updated_at >= ?",
+            (session_id, time.time() - self.ttl_seconds),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, session_id: str, session: Dict[str, Any]) -> None:
+        conn = self._connection()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (id, data, updated_at) VALUES (?, ?, ?)",
+            (session_id, json.dumps(session, default=_to_json), now),
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_INTERVAL == 0:
+            conn.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.ttl_seconds,))
+
+    def delete(self, session_id: str) -> None:
+        self._connection().execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def update(self, session_id: str, fn: Callable[[Dict[str, Any]], Any]) -> Any:
+        """Atomic across workers; keep ``fn`` cheap, since it runs under the database-wide write lock.
+
+        Raises SessionStoreBusy when the lock cannot be taken within the timeout.
+        """
+        conn = self._connection()
+        now = time.time()
+        try:
+            # IMMEDIATE takes the write lock before the read, so no other worker can write the session in between
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT data FROM sessions WHERE id = ? AND updated_at >= ?", (session_id, now - self.ttl_seconds)
+            ).fetchone()
+            result = None
+            if row is not None:
+                session = json.loads(row[0])
+                result = fn(session)
+                conn.execute(
+                    "UPDATE sessions SET data = ?, updated_at = ? WHERE id = ?",
+                    (json.dumps(session, default=_to_json), now, session_id),
+                )
+            conn.execute("COMMIT")
+        except sqlite3.OperationalError as exc:
+            # BEGIN itself fails when the database stays locked past the timeout
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise SessionStoreBusy(str(exc)) from exc
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def __len__(self) -> int:
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM sessions WHERE updated_at >= ?",
+            (time.time() - self.ttl_seconds,),
+        ).fetchone()[0]
+
+
+def _to_json(value: Any) -> Any:
+    to_json = getattr(value, "to_json", None)
+    if to_json is None:
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+    return to_json()
+
+
+def create_session_store() -> SessionStore:
+    """Build the session store selected by the SESSION_STORE environment variable.
+
+    Without SESSION_STORE, several workers (WEB_CONCURRENCY > 1) get the
+    shared SQLite store, since a session started on one worker may be
+    guessed on another.
+    """
+    default = "sqlite" if int(os.getenv("WEB_CONCURRENCY", "1")) > 1 else "memory"
+    backend = os.getenv("SESSION_STORE", default).lower()
+    ttl_seconds = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+    if backend == "sqlite":
+        return SQLiteSessionStore(os.getenv("SESSION_DB_PATH", "sessions.db"), ttl_seconds=ttl_seconds)
+    if backend == "memory":
+        return MemorySessionStore(int(os.getenv("SESSION_MAX", "10000")), ttl_seconds=ttl_seconds)
+    raise ValueError(f"Unknown SESSION_STORE backend: {backend}")
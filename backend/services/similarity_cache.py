@@ -0,0 +1,116 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+CacheKey = Tuple[str, str, str]
+
+
+class SimilarityCache:
+    """Bounded LRU cache of similarity scores keyed by (vector space, target, normalized guess).
+
+    The vector space is the embedding provider's name, so scores computed
+    against one provider are never served for another.
+
+    When ``shared_path`` is given, scores are also written to a SQLite file
+    so workers on the same host can reuse each other's results; the
+    in-process LRU stays in front of it as the first tier.
+    """
+
+    def __init__(self, maxsize: int = 4096, shared_path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.shared_path = shared_path
+        self._entries: "OrderedDict[CacheKey, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.shared_hits = 0
+        if shared_path:
+            self._connection().execute(
+                "CREATE TABLE IF NOT EXISTS similarity_scores ("
+                "space TEXT NOT NULL, target TEXT NOT NULL, guess TEXT NOT NULL, score REAL NOT NULL, "
+                "PRIMARY KEY (space, target, guess))"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.shared_path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: CacheKey) -> Optional[float]:
+        with self._lock:
+            score = self._entries.get(key)
+            if score is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return score
+
+        if self.shared_path:
+            row = self._connection().execute(
+                "SELECT score FROM similarity_scores WHERE space = ? AND target = ? AND guess = ?", key
+            ).fetchone()
+            if row is not None:
+                self._store(key, row[0])
+                with self._lock:
+                    self.hits += 1
+                    self.shared_hits += 1
+                return row[0]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: CacheKey, score: float) -> None:
+        self._store(key, score)
+        if self.shared_path:
+            try:
+                self._connection().execute(
+                    "INSERT OR REPLACE INTO similarity_scores (space, target, guess, score) VALUES (?, ?, ?, ?)",
+                    (*key, score),
+                )
+            except sqlite3.OperationalError:
+                # A busy shared tier only costs a future recomputation
+                pass
+
+    def _store(self, key: CacheKey, score: float) -> None:
+        with self._lock:
+            self._entries[key] = score
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        """Counters for sizing the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "shared_hits": self.shared_hits,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def create_similarity_cache() -> SimilarityCache:
+    """Build the similarity cache configured through the environment."""
+    return SimilarityCache(
+        maxsize=int(os.getenv("SIMILARITY_CACHE_SIZE", "4096")),
+        shared_path=os.getenv("SIMILARITY_CACHE_DB") or None,
+    )
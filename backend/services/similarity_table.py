@@ -0,0 +1,103 @@
+import datetime
+import json
+import os
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from services.embedding_store import EmbeddingStore
+
+TABLE_FORMAT_VERSION = 1
+INDEX_FILE = "similarity_index.json"
+SCORES_FILE = "similarity_scores.npy"
+
+
+class SimilarityTable:
+    """Dense target x vocabulary similarity scores with integer word ids.
+
+    Scores are percentages stored as float16, one row per target word and
+    one column per vocabulary word. Tables are built offline with
+    ``python manage.py build-similarity-table`` and memory-mapped at
+    startup, so a lookup is two dict reads and one array read.
+    """
+
+    def __init__(self, vocabulary: Sequence[str], targets: Sequence[str], scores: np.ndarray):
+        if scores.shape != (len(targets), len(vocabulary)):
+            raise ValueError(f"Score matrix shape {scores.shape} does not match "
+                             f"{len(targets)} targets x {len(vocabulary)} words")
+        self.vocabulary = list(vocabulary)
+        self.targets = list(targets)
+        self.word_ids: Dict[str, int] = {word: i for i, word in enumerate(self.vocabulary)}
+        self.target_rows: Dict[str, int] = {word: i for i, word in enumerate(self.targets)}
+        self.scores = scores
+
+    def lookup(self, target: str, word: str) -> Optional[float]:
+        """Similarity of word to target, or None if either is not in the table."""
+        row = self.target_rows.get(target)
+        col = self.word_ids.get(word)
+        if row is None or col is None:
+            return None
+        return float(self.scores[row, col])
+
+    def target_for_day(self, day: Optional[datetime.date] = None) -> str:
+        """Target word of the daily rotation."""
+        day = day or datetime.date.today()
+        return self.targets[day.toordinal() % len(self.targets)]
+
+    @classmethod
+    def load(cls, directory: str) -> "SimilarityTable":
+        with open(os.path.join(directory, INDEX_FILE)) as f:
+            index = json.load(f)
+        if index.get("version") != TABLE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported similarity table version: {index.get('version')}")
+        scores = np.load(os.path.join(directory, SCORES_FILE), mmap_mode="r")
+        return cls(index["vocabulary"], index["targets"], scores)
+
+    @classmethod
+    def build(cls, directory: str, embeddings: EmbeddingStore, vocabulary: Sequence[str],
+              targets: Sequence[str], overrides: Optional[Dict[str, Dict[str, float]]] = None,
+              chunk_size: int = 256) -> "SimilarityTable":
+        """Compute cosine similarities for every target and write the table to directory.
+
+        ``overrides`` maps target -> word -> score and takes precedence over
+        the embedding similarity (the hand-tuned matrix is passed here).
+        Targets are processed in chunks straight into the memory-mapped
+        output, so large vocabularies never need the full matrix in RAM.
+        """
+        vocabulary = list(dict.fromkeys(vocabulary))
+        targets = list(dict.fromkeys(targets))
+        missing = [w for w in set(vocabulary) | set(targets) if w not in embeddings]
+        if missing:
+            raise KeyError(f"No embeddings for: {', '.join(sorted(missing)[:10])}")
+
+        os.makedirs(directory, exist_ok=True)
+        scores_path = os.path.join(directory, SCORES_FILE)
+        tmp_path = scores_path + ".tmp.npy"
+        scores = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=np.float16, shape=(len(targets), len(vocabulary))
+        )
+
+        vocab_matrix = embeddings.matrix[embeddings.rows(vocabulary)]
+        word_ids = {word: i for i, word in enumerate(vocabulary)}
+        for start in range(0, len(targets), chunk_size):
+            chunk = targets[start:start + chunk_size]
+            block = embeddings.matrix[embeddings.rows(chunk)] @ vocab_matrix.T
+            block = np.clip(block * 100.0, 0.0, 100.0)
+            for offset, target in enumerate(chunk):
+                for word, score in (overrides or {}).get(target, {}).items():
+                    if word in word_ids:
+                        block[offset, word_ids[word]] = score
+                if target in word_ids:
+                    block[offset, word_ids[target]] = 100.0
+            scores[start:start + len(chunk)] = block
+        scores.flush()
+        del scores
+        os.replace(tmp_path, scores_path)
+
+        with open(os.path.join(directory, INDEX_FILE), "w") as f:
+            json.dump({"version": TABLE_FORMAT_VERSION, "vocabulary": vocabulary, "targets": targets}, f)
+        return cls.load(directory)
+
+
+def read_word_list(path: str) -> List[str]:
+    """Read one word per line, lowercased, skipping blanks and # comments."""
+    with open(path) as f:
+        return [line.strip().lower() for line in f if line.strip() and not line.startswith("#")]
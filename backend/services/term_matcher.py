@@ -0,0 +1,111 @@
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class TermMatcher:
+    """Aho-Corasick automaton over a table of scored terms.
+
+    Built once per target word; ``best_match`` finds the highest-scoring
+    term occurring anywhere in a guess in a single pass over the guess,
+    however many terms the table holds.
+    """
+
+    def __init__(self, term_scores: Dict[str, float]):
+        # Node 0 is the root. For each node: outgoing edges, failure link and
+        # the best (score, term) ending here or at any suffix of it.
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._best: List[Optional[Tuple[float, str]]] = [None]
+
+        for term, score in term_scores.items():
+            node = 0
+            for char in term:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(None)
+                node = next_node
+            if self._best[node] is None or score > self._best[node][0]:
+                self._best[node] = (score, term)
+
+        # Breadth-first pass: failure links and best outputs inherited from suffixes
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                inherited = self._best[self._fail[child]]
+                if inherited is not None and (self._best[child] is None or inherited[0] > self._best[child][0]):
+                    self._best[child] = inherited
+                queue.append(child)
+
+    def best_match(self, text: str) -> Optional[Tuple[str, float]]:
+        """Return (term, score) of the best-scoring term found in text, or None."""
+        goto, fail, best_at = self._goto, self._fail, self._best
+        node = 0
+        best = None
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            found = best_at[node]
+            if found is not None and (best is None or found[0] > best[0]):
+                best = found
+        return None if best is None else (best[1], best[0])
+
+
+class PrefixTrie:
+    """Character trie over the vocabulary for longest-common-prefix queries.
+
+    Words are numbered in sorted order, so the words below any node form a
+    contiguous id range; the prefix a guess shares with a given vocabulary
+    word is then the depth of the deepest node on the guess's path whose
+    range contains that word.
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self.words = sorted(set(words))
+        self.ids = {word: i for i, word in enumerate(self.words)}
+        # Each node: [children, first word id, last word id]
+        self._root = [{}, 0, len(self.words) - 1]
+        for word_id, word in enumerate(self.words):
+            node = self._root
+            for char in word:
+                child = node[0].get(char)
+                if child is None:
+                    child = [{}, word_id, word_id]
+                    node[0][char] = child
+                child[2] = word_id
+                node = child
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.ids
+
+    def longest_prefix(self, text: str) -> Tuple[int, Optional[str]]:
+        """Longest prefix of text shared with any vocabulary word, and one such word."""
+        node, depth = self._root, 0
+        for char in text:
+            child = node[0].get(char)
+            if child is None:
+                break
+            node, depth = child, depth + 1
+        return depth, (self.words[node[1]] if self.words and depth else None)
+
+    def common_prefix_length(self, text: str, word: str) -> Optional[int]:
+        """Length of the common prefix of text and a vocabulary word, None if word is not in the vocabulary."""
+        word_id = self.ids.get(word)
+        if word_id is None:
+            return None
+        node, depth = self._root, 0
+        for char in text:
+            child = node[0].get(char)
+            if child is None or not child[1] <= word_id <= child[2]:
+                break
+            node, depth = child, depth + 1
+        return depth
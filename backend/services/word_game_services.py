@@ -1,34 +1,120 @@
+import asyncio
+import json
+import re
 import uuid
+import datetime
+import threading
+import time
 import numpy as np
 import os
-from typing import Dict, List, Any, Optional, Set
-from dotenv import load_dotenv
-import google.generativeai as genai
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Sequence, Set
+from services.embedding_store import EmbeddingStore
+from services.embedding_cache import EmbeddingCache
+from services.session_store import MemorySessionStore, SessionStore, create_session_store
+from services.similarity_cache import create_similarity_cache
+from services.term_matcher import PrefixTrie, TermMatcher
+from services.similarity_table import INDEX_FILE, SimilarityTable
+from services.hint_index import HintIndex
+from services.embedding_providers import EmbeddingBatcher, create_embedding_provider
+from services.mock_embeddings import mock_embeddings, similarity_targets
+from services.guess_history import WORDS, GuessHistory, create_guess_log
+from services.metrics import REGISTRY
 
+SIMILARITY_SECONDS = REGISTRY.histogram(
+    "word_game_similarity_seconds", "Time spent scoring a guess, by source.", ("source",))
+GUESS_EMBEDDINGS = REGISTRY.counter(
+    "word_game_guess_embeddings_total", "Guesses outside the vocabulary sent for embedding, by outcome.",
+    ("outcome",))
 
-load_dotenv()
+# Shared and immutable, so get_valid_words does not build a new list per call
+VALID_WORDS = ("espionage", "spy", "agent", "surveillance", "covert", "intelligence")
+# Guesses worth embedding at runtime: plain words, not arbitrary text
+EMBEDDABLE_GUESS = re.compile(r"[a-z][a-z'-]{1,31}")
 
 
 class WordGameService:
     
-    def __init__(self):
-        self.sessions = {}
+    def __init__(self, sessions: Optional[SessionStore] = None, rebuild_shared: bool = False):
+        self.sessions = sessions if sessions is not None else create_session_store()
+        # Guesses on one session are serialized; striping keeps unrelated sessions apart
+        self._session_locks = [threading.Lock() for _ in range(64)]
+        self._embedding_lock = threading.Lock()
+        self.similarity_cache = create_similarity_cache()
+        # Optional append-only record of every guess (GUESS_LOG_PATH)
+        self.guess_log = create_guess_log()
         self.similarity_threshold = 95 
         
 
         self.word_list = ["espionage"]
 
-        self.use_gemini = False
+        self.embedding_cache_dir = os.getenv(
+            "EMBEDDING_CACHE_DIR",
+            os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".embedding_cache")
+        )
         
-        api_key = os.getenv("GEMINI_API_KEY")
-        if api_key:
-            genai.configure(api_key=api_key)
-            self.use_gemini = True
+        # Embeddings and hint index shared by every worker, built once by the gunicorn master
+        self.shared_state_dir = os.getenv("SHARED_STATE_DIR") or None
+        self._rebuild_shared = rebuild_shared
+        
+        # Substrings that indicate relevance to a target word
+        self.term_scores = {
+            "espionage": {
+                "spy": 90.0, "secret": 75.0, "agent": 85.0, "intelligen": 80.0,
+                "cover": 80.0, "surveillance": 85.0, "reconn": 70.0, "infiltrat": 80.0,
+                "stealth": 65.0, "decept": 70.0, "crypt": 50.0, "secur": 60.0,
+                "mission": 65.0, "shadow": 60.0, "covert": 85.0, "classified": 75.0
+            }
+        }
+        # Compiled once so scoring a guess is a single pass however large the tables grow
+        self.term_matchers = {target: TermMatcher(terms) for target, terms in self.term_scores.items()}
         
         # Set up embeddings and predetermined similarities
-        self.embeddings = {}
+        self.embedding_dim = 100
+        self.embeddings = EmbeddingStore(dim=self.embedding_dim)
         self.similarity_matrix = self._create_similarity_matrix()
+        # Gemini, a local vector file or the mock (EMBEDDING_PROVIDER)
+        self.provider = create_embedding_provider("espionage", self.similarity_matrix["espionage"])
         self._initialize_embeddings()
+        # Guesses of vocabulary words are stored by id; everything else stays inline in its session
+        WORDS.intern_many(self.embeddings.words)
+        
+        # Vectors for guesses outside the vocabulary, fetched at runtime from semantic providers
+        self.guess_vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.guess_vectors_max = int(os.getenv("GUESS_EMBEDDING_CACHE_SIZE", "10000"))
+        self._guess_vectors_lock = threading.Lock()
+        self.guess_embedding_timeout = float(os.getenv("GUESS_EMBEDDING_TIMEOUT_SECONDS", "2"))
+        self.guess_batcher = None
+        if self.provider.semantic and os.getenv("GUESS_EMBEDDINGS", "1") != "0":
+            self.guess_batcher = EmbeddingBatcher(
+                self.provider, float(os.getenv("GUESS_EMBEDDING_BATCH_WINDOW_SECONDS", "0.005")),
+                on_result=self._remember_guess_vector)
+        
+        # Precomputed scores for common guesses, written by manage.py analyze-guesses
+        self.similarity_overrides: Dict[str, Dict[str, float]] = {}
+        overrides_path = os.getenv("SIMILARITY_OVERRIDES")
+        if overrides_path and os.path.exists(overrides_path):
+            self.load_similarity_overrides(overrides_path)
+        
+        # Multi-target mode: a precomputed table built by manage.py, memory-mapped
+        self.similarity_table = None
+        table_dir = os.getenv("SIMILARITY_TABLE_DIR")
+        if table_dir and os.path.exists(os.path.join(table_dir, INDEX_FILE)):
+            self.similarity_table = SimilarityTable.load(table_dir)
+        
+        # Nearest-neighbour index for hints, rebuilt when the vocabulary grows
+        self.hint_index = self._initialize_hint_index()
+        
+        REGISTRY.gauge("word_game_sessions", "Sessions held by the session store.",
+                       function=lambda: len(self.sessions))
+        REGISTRY.gauge("word_game_embeddings", "Words with an embedding.", function=lambda: len(self.embeddings))
+        REGISTRY.gauge("word_game_guess_embeddings", "Guesses outside the vocabulary with a runtime embedding.",
+                       function=lambda: len(self.guess_vectors))
+        REGISTRY.gauge("word_game_similarity_cache_size", "Entries in the similarity cache.",
+                       function=lambda: len(self.similarity_cache))
+        for counter in ("hits", "misses", "evictions"):
+            REGISTRY.counter(f"word_game_similarity_cache_{counter}_total", f"Similarity cache {counter}.",
+                             function=lambda counter=counter: getattr(self.similarity_cache, counter))
         
     def _create_similarity_matrix(self):
         """Create a predefined similarity matrix focused on espionage."""
@@ -79,6 +165,19 @@ class WordGameService:
         
         return matrix
         
+    def load_similarity_overrides(self, path: str) -> int:
+        """Merge target -> word -> score overrides into the similarity matrix; returns how many."""
+        with open(path) as f:
+            overrides = json.load(f)
+        count = 0
+        for target, scores in overrides.items():
+            target_scores = self.similarity_matrix.setdefault(target.lower(), {})
+            for word, score in scores.items():
+                target_scores[word.lower()] = float(score)
+                count += 1
+            self.similarity_overrides.setdefault(target.lower(), {}).update(scores)
+        return count
+    
     def _initialize_embeddings(self):
         """Generate embeddings for espionage and related words."""
         # Get all unique words from the similarity matrix
@@ -87,130 +186,186 @@ class WordGameService:
             all_words.add(word)
             for related_word in self.similarity_matrix[word]:
                 all_words.add(related_word)
+        self.vocabulary_trie = PrefixTrie(all_words)
+        
+        snapshot = self.shared_snapshot()
+        if snapshot is not None and self._rebuild_shared:
+            snapshot.remove()
+        elif snapshot is not None:
+            store = snapshot.load()
+            if store is not None and all(w in store for w in all_words):
+                # Built by another process: attach to its pages instead of building a copy
+                self.embedding_dim = store.dim
+                self.embeddings = store
+                return
                 
-        if self.use_gemini:
-            self._initialize_with_gemini(all_words)
+        if self.provider.semantic:
+            self._initialize_with_provider(all_words)
         else:
             self._initialize_with_mock_data(all_words)
-    
-    def _initialize_with_gemini(self, words):
-        """Initialize word embeddings using Gemini API."""
-        embedding_model = "models/embedding-001"
         
-        for word in words:
+        if snapshot is not None:
             try:
-                embedding_result = genai.embed_content(
-                    model=embedding_model,
-                    content=word,
-                    task_type="semantic_similarity"
-                )
-                embedding = embedding_result["embedding"]
-                self.embeddings[word] = embedding
-            except Exception:
-                # Fallback to mock embedding
-                self.embeddings[word] = self._create_mock_embedding(word)
+                self.embeddings = snapshot.write(self.embeddings)
+            except OSError:
+                # Not shareable (e.g. read-only directory); keep the private copy
+                pass
+    
+    def shared_snapshot(self) -> Optional[EmbeddingCache]:
+        """The embedding snapshot in SHARED_STATE_DIR, or None when sharing is off."""
+        if self.shared_state_dir is None:
+            return None
+        return EmbeddingCache(self.shared_state_dir, f"shared-{self.provider.name}")
+    
+    def _initialize_hint_index(self) -> HintIndex:
+        snapshot = self.shared_snapshot()
+        if snapshot is None:
+            return HintIndex(self.embeddings)
+        stem = os.path.splitext(snapshot.matrix_path)[0] + ".hints"
+        index = None if self._rebuild_shared else HintIndex.load(stem, self.embeddings.words)
+        if index is None:
+            index = HintIndex(self.embeddings)
+            try:
+                index.save(stem)
+            except OSError:
+                pass
+        return index
+    
+    def _initialize_with_provider(self, words):
+        """Initialize word embeddings from the provider; remote ones are backed by the on-disk cache."""
+        cache = EmbeddingCache(self.embedding_cache_dir, self.provider.name)
+        
+        # A warm cache is memory-mapped and needs no network at all
+        cached = cache.load() if self.provider.remote else None
+        missing = [w for w in words if cached is None or w not in cached]
+        if missing:
+            fetched = self.provider.embed(missing)
+            if fetched and not self.provider.remote:
+                cached = self._store_from(fetched)
+            elif fetched:
+                try:
+                    cached = cache.save(fetched)
+                except OSError:
+                    # Read-only filesystem: keep the vectors for this process only
+                    cached = self._store_from(fetched)
+        
+        if cached is not None:
+            # Provider vectors set the dimension of the store
+            self.embedding_dim = cached.dim
+            self.embeddings = cached
+        
+        # Fallback to mock embeddings for words the provider could not embed
+        missing = [w for w in words if w not in self.embeddings]
+        if missing:
+            self.embeddings.add_many(missing, self._create_mock_embeddings(missing))
+    
+    def add_vocabulary(self, words):
+        """Make sure every word has an embedding, e.g. before building a similarity table."""
+        missing = [w for w in dict.fromkeys(w.lower() for w in words) if w not in self.embeddings]
+        if not missing:
+            return
+        
+        if self.provider.semantic:
+            fetched = self.provider.embed(missing)
+            if fetched and self.provider.remote:
+                try:
+                    EmbeddingCache(self.embedding_cache_dir, self.provider.name).save(fetched)
+                except OSError:
+                    pass
+            if fetched:
+                self.embeddings.add_many(fetched, np.array(list(fetched.values()), dtype=np.float32))
+        
+        remaining = [w for w in missing if w not in self.embeddings]
+        if remaining:
+            self.embeddings.add_many(remaining, self._create_mock_embeddings(remaining))
+        self.vocabulary_trie = PrefixTrie(list(self.vocabulary_trie.words) + missing)
+        WORDS.intern_many(missing)
+    
+    def _store_from(self, vectors) -> EmbeddingStore:
+        store = EmbeddingStore(dim=len(next(iter(vectors.values()))), capacity=len(vectors))
+        store.add_many(vectors, np.array(list(vectors.values()), dtype=np.float32))
+        return store
     
     def _initialize_with_mock_data(self, words):
-
-        np.random.seed(42)  # For reproducibility
-        espionage_vec = np.random.rand(100)
-        espionage_vec = espionage_vec / np.linalg.norm(espionage_vec)
-        self.embeddings["espionage"] = espionage_vec.tolist()
-        for word in words:
-            if word == "espionage":
-                continue
-                
-            # Get target similarity or default
-            target_sim = 0.4  # Default similarity for unknown words
-            if word in self.similarity_matrix["espionage"]:
-                target_sim = self.similarity_matrix["espionage"][word] / 100.0
-                
-            # Create a vector that will have the target similarity with espionage
-            np.random.seed(sum(ord(c) for c in word))  # Word-specific seed
-            random_vec = np.random.rand(100)
-            random_vec = random_vec / np.linalg.norm(random_vec)
-            
-            # Get an orthogonal component
-            ortho_vec = random_vec - espionage_vec * np.dot(random_vec, espionage_vec)
-            if np.linalg.norm(ortho_vec) > 1e-10:  # Avoid division by zero
-                ortho_vec = ortho_vec / np.linalg.norm(ortho_vec)
-                # Mix the vectors to get the target similarity
-                final_vec = target_sim * espionage_vec + np.sqrt(1 - target_sim**2) * ortho_vec
-                final_vec = final_vec / np.linalg.norm(final_vec)
-                self.embeddings[word] = final_vec.tolist()
-            else:
-                # Fall back to a random vector if orthogonalization fails
-                self.embeddings[word] = random_vec.tolist()
+        """Deterministic offline embeddings, generated for the whole vocabulary at once."""
+        ordered_words = ["espionage"] + [w for w in words if w != "espionage"]
+        # One bulk insert; the store normalizes rows on the way in
+        self.embedding_dim = self.provider.dim
+        self.embeddings = self._store_from(self.provider.embed(ordered_words))
     
     def _create_mock_embedding(self, word):
         """Create a mock embedding that will respect similarity with espionage."""
-        word = word.lower()
+        return self._create_mock_embeddings([word])[0]
+    
+    def _create_mock_embeddings(self, words):
+        """Mock embeddings for several words in one vectorized step."""
+        words = [w.lower() for w in words]
+        # Default similarity 0.3 for words without a known score
+        targets = similarity_targets(words, self.similarity_matrix.get("espionage", {}), 0.3)
+        # Without an espionage embedding yet, the words get plain random vectors
+        return mock_embeddings(words, self.embeddings.get("espionage"), targets, self.embedding_dim)
+    
+    def _calculate_similarity(self, word1, word2):
+        """Calculate similarity between two words, memoized per (provider, target, normalized guess)."""
+        start = time.perf_counter()
+        key = (word1.lower(), word2.lower().strip())
         
-        # Get target similarity or default
-        target_sim = 0.3  # Default similarity for unknown words
-        if "espionage" in self.similarity_matrix and word in self.similarity_matrix["espionage"]:
-            target_sim = self.similarity_matrix["espionage"][word] / 100.0
+        # Hand-tuned and override scores first: the cache may hold scores from before they were recalibrated
+        similarity = self.similarity_matrix.get(key[0], {}).get(key[1])
+        if similarity is not None:
+            SIMILARITY_SECONDS.observe(time.perf_counter() - start, source="matrix")
+            return similarity
         
-        # If espionage embedding exists, use it to create a related vector
-        if "espionage" in self.embeddings:
-            espionage_vec = np.array(self.embeddings["espionage"])
-            
-            # Create a partially aligned vector
-            np.random.seed(sum(ord(c) for c in word))
-            random_vec = np.random.rand(100)
-            random_vec = random_vec / np.linalg.norm(random_vec)
-            
-            # Mix to achieve target similarity
-            final_vec = target_sim * espionage_vec + np.sqrt(1 - target_sim**2) * random_vec
-            return (final_vec / np.linalg.norm(final_vec)).tolist()
-        else:
-            # If no espionage embedding yet, create a basic random vector
-            np.random.seed(sum(ord(c) for c in word))
-            vec = np.random.rand(100)
-            return (vec / np.linalg.norm(vec)).tolist()
+        # Multi-target table: an index lookup plus an array read
+        if self.similarity_table is not None:
+            similarity = self.similarity_table.lookup(*key)
+            if similarity is not None:
+                SIMILARITY_SECONDS.observe(time.perf_counter() - start, source="table")
+                return similarity
+        
+        cache_key = (self.provider.name, *key)
+        similarity = self.similarity_cache.get(cache_key)
+        source = "cache"
+        if similarity is None:
+            similarity = self._score_similarity(*key)
+            # A stand-in score for a guess whose vector is still on its way must not outlive it
+            if not self._awaiting_vector(key[1]):
+                self.similarity_cache.put(cache_key, similarity)
+            source = "scored"
+        SIMILARITY_SECONDS.observe(time.perf_counter() - start, source=source)
+        return similarity
     
-    def _calculate_similarity(self, word1, word2):
-        """Calculate similarity between two words."""
-        # First check our predetermined similarity matrix
-        word1 = word1.lower()
-        word2 = word2.lower()
-        
-        # If both words are in our matrix, use the predefined similarity
-        if word1 in self.similarity_matrix and word2 in self.similarity_matrix[word1]:
-            return self.similarity_matrix[word1][word2]
-            
-        # If the word isn't in our matrix, estimate similarity
+    def _score_similarity(self, word1, word2):
+        """Score two lowercased words missing from the similarity matrix, without the cache."""
+        # The word isn't in our matrix, so estimate similarity
         if word1 == word2:
             return 100.0
+        
+        # With a semantic provider, embedded words are scored by meaning
+        if self.provider.semantic:
+            vector1, vector2 = self._vector(word1), self._vector(word2)
+            if vector1 is not None and vector2 is not None:
+                return round(max(float(vector1 @ vector2), 0.0) * 100.0, 2)
             
-        # If one word is "espionage", provide crafted similarities for common spy terms
-        if word1 == "espionage" or word2 == "espionage":
-            check_word = word2 if word1 == "espionage" else word1
-            
-            # Check for substrings that indicate relevance to espionage
-            spy_terms = {
-                "spy": 90.0, "secret": 75.0, "agent": 85.0, "intelligen": 80.0,
-                "cover": 80.0, "surveillance": 85.0, "reconn": 70.0, "infiltrat": 80.0,
-                "stealth": 65.0, "decept": 70.0, "crypt": 50.0, "secur": 60.0,
-                "mission": 65.0, "shadow": 60.0, "covert": 85.0, "classified": 75.0
-            }
-            
-            for term, sim in spy_terms.items():
-                if term in check_word:
-                    return sim
+        # If one word is a target with a term table (e.g. "espionage"),
+        # provide crafted similarities for the best matching term
+        matcher, check_word = self.term_matchers.get(word1), word2
+        if matcher is None:
+            matcher, check_word = self.term_matchers.get(word2), word1
+        if matcher is not None:
+            match = matcher.best_match(check_word)
+            if match is not None:
+                return match[1]
                     
         # For unknown words, try to determine a reasonable similarity
         # Check for partial matches
         if word1 in word2 or word2 in word1:
             return 65.0
             
-        # Check for common prefixes
-        common_prefix_length = 0
-        for i in range(min(len(word1), len(word2))):
-            if word1[i] == word2[i]:
-                common_prefix_length += 1
-            else:
-                break
+        # Check for common prefixes, through the vocabulary trie when possible
+        common_prefix_length = self.vocabulary_trie.common_prefix_length(word2, word1)
+        if common_prefix_length is None:
+            common_prefix_length = len(os.path.commonprefix([word1, word2]))
                 
         if common_prefix_length >= 3:
             return 40.0 + (common_prefix_length * 2)
@@ -218,71 +373,189 @@ class WordGameService:
         # If nothing else matches, return a low but not too low similarity
         return 20.0
     
+    def current_target(self, day: Optional[datetime.date] = None) -> str:
+        """Target word for new sessions: the daily rotation in multi-target mode, else espionage."""
+        if self.similarity_table is not None:
+            return self.similarity_table.target_for_day(day)
+        return "espionage"
+    
     def start_game(self) -> Dict[str, str]:
-        """Start a new word guessing session with espionage as the target word."""
+        """Start a new word guessing session with the current target word."""
         session_id = str(uuid.uuid4())
         
-        # Always use espionage as the target word
-        target_word = "espionage"
+        target_word = self.current_target()
         
-        # Get or create embedding for target word
-        if target_word in self.embeddings:
-            target_embedding = self.embeddings[target_word]
-        else:
-            target_embedding = self._create_mock_embedding(target_word)
-            self.embeddings[target_word] = target_embedding
+        # Make sure the target word has an embedding
+        if target_word not in self.embeddings:
+            with self._embedding_lock:
+                if target_word not in self.embeddings:
+                    self.embeddings[target_word] = self._create_mock_embedding(target_word)
         
-        # Store session data
-        self.sessions[session_id] = {
+        # Store session data; the target embedding is looked up by word
+        # instead of being copied into every session
+        self.sessions.set(session_id, {
             "target_word": target_word,
-            "target_embedding": target_embedding,
-            "guesses": []
-        }
+            "guesses": GuessHistory()
+        })
         
         return {"session_id": session_id}
     
     def check_guess(self, session_id: str, guess: str) -> Dict[str, Any]:
         """Process a word guess and return similarity."""
-        if session_id not in self.sessions:
+        guess = guess.lower().strip()
+        session = self.sessions.get(session_id)
+        if session is None:
             return {"error": "Invalid session ID"}
         
-        session = self.sessions[session_id]
-        guess = guess.lower().strip()
+        # Scored before the session is locked: a session's target never changes, and a
+        # shared store holds its write lock across every worker for the update below
         target_word = session["target_word"]
+        similarity = 100.0 if guess == target_word else self._calculate_similarity(target_word, guess)
         
-        # Handle exact match
-        if guess == target_word:
-            self.sessions[session_id]["guesses"].append({"word": guess, "similarity": 100.0})
-            return {
-                "guess": guess,
-                "similarity": 100.0,
-                "is_valid_word": True,
-                "is_successful": True
-            }
+        with self._session_locks[hash(session_id) % len(self._session_locks)]:
+            # One atomic read-modify-write, so workers sharing the store never drop each other's guesses
+            outcome = self.sessions.update(session_id,
+                                           lambda session: self._apply_guess(session, guess, similarity))
+        if outcome is None:
+            return {"error": "Invalid session ID"}
         
-        # Calculate similarity
-        similarity = self._calculate_similarity(target_word, guess)
+        target_word, result = outcome
+        if self.guess_log is not None and not result["is_repeat"]:
+            self.guess_log.record(session_id, target_word, guess, result["similarity"])
+        return result
+    
+    def _apply_guess(self, session: Dict[str, Any], guess: str, similarity: float):
+        """Add a scored guess to the session; returns (target word, result)."""
+        target_word = session["target_word"]
+        history = session["guesses"] = GuessHistory.coerce(session["guesses"], self._anchorable(target_word))
         
-        # Track the guess
-        session["guesses"].append({"word": guess, "similarity": similarity})
+        # A repeated guess is answered from the history instead of being scored again
+        previous = history.previous_score(guess)
+        if previous is not None:
+            return target_word, self._guess_result(guess, previous, target_word, history, is_repeat=True)
         
-        # Determine if the guess is successful
-        is_successful = similarity >= self.similarity_threshold
+        # Track the guess; embedded words other than the target can anchor hints
+        history.append(guess, similarity, anchorable=self._anchorable(target_word)(guess))
+        return target_word, self._guess_result(guess, similarity, target_word, history)
+    
+    def _anchorable(self, target_word: str):
+        """Predicate for guesses that can anchor hints: embedded words other than the target."""
+        return lambda word: word != target_word and self._vector(word) is not None
+    
+    def _vector(self, word: str) -> Optional[np.ndarray]:
+        """Normalized vector of a vocabulary word or of a guess embedded at runtime."""
+        vector = self.embeddings.get(word)
+        if vector is None and self.guess_vectors:
+            with self._guess_vectors_lock:
+                vector = self.guess_vectors.get(word)
+                if vector is not None:
+                    self.guess_vectors.move_to_end(word)
+        return vector
+    
+    async def embed_guess(self, guess: str) -> None:
+        """Fetch a vector for a guess outside the vocabulary, so it is scored by meaning.
         
+        Awaited on the event loop before the guess is checked. Concurrent
+        guesses share batched provider calls; if the vector takes longer than
+        GUESS_EMBEDDING_TIMEOUT_SECONDS the guess gets the heuristic score and
+        the vector is kept for later guesses of the word.
+        """
+        word = guess.lower().strip()
+        if not self._awaiting_vector(word):
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(self.guess_batcher.submit(word)), self.guess_embedding_timeout)
+        except asyncio.TimeoutError:
+            GUESS_EMBEDDINGS.inc(outcome="timeout")
+    
+    def needs_embedding(self, guess: str) -> bool:
+        """Whether embed_guess would call the provider for this guess."""
+        return self._awaiting_vector(guess.lower().strip())
+    
+    def has_session(self, session_id: str) -> bool:
+        return session_id in self.sessions
+    
+    def _awaiting_vector(self, word: str) -> bool:
+        """Whether a guess may still get a runtime vector, so its heuristic score is provisional."""
+        return (self.guess_batcher is not None and EMBEDDABLE_GUESS.fullmatch(word) is not None
+                and self._vector(word) is None)
+    
+    def _remember_guess_vector(self, word: str, vector: Optional[np.ndarray]) -> None:
+        if vector is None or len(vector) != self.embeddings.dim:
+            GUESS_EMBEDDINGS.inc(outcome="error")
+            return
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        with self._guess_vectors_lock:
+            self.guess_vectors[word] = vector / norm if norm > 1e-10 else vector
+            while len(self.guess_vectors) > self.guess_vectors_max:
+                self.guess_vectors.popitem(last=False)
+        GUESS_EMBEDDINGS.inc(outcome="ok")
+    
+    def _guess_result(self, guess: str, similarity: float, target_word: str, history: GuessHistory,
+                      is_repeat: bool = False) -> Dict[str, Any]:
+        is_exact = guess == target_word
         return {
             "guess": guess,
-            "similarity": round(similarity, 2),
+            "similarity": 100.0 if is_exact else round(similarity, 2),
             "is_valid_word": True,  # Consider all words valid for better user experience
-            "is_successful": is_successful
+            # Determine if the guess is successful
+            "is_successful": is_exact or similarity >= self.similarity_threshold,
+            "is_repeat": is_repeat,
+            "best_similarity": round(history.best_guess()[1], 2)
         }
     
     def reveal_word(self, session_id: str) -> Dict[str, str]:
         """Reveal the target word."""
-        if session_id not in self.sessions:
+        session = self.sessions.get(session_id)
+        if session is None:
             return {"error": "Invalid session ID"}
         
-        return {"target_word": self.sessions[session_id]["target_word"]}
+        return {"target_word": session["target_word"]}
     
-    def get_valid_words(self) -> List[str]:
+    def get_hints(self, session_id: str, k: int = 5) -> Dict[str, Any]:
+        """Return the k vocabulary words nearest to the player's best guess so far, or to the target."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return {"error": "Invalid session ID"}
+        
+        target_word = session["target_word"]
+        history = GuessHistory.coerce(session["guesses"], self._anchorable(target_word))
+        guessed = set(history.guessed_words())
+        
+        # Anchor on the best guess that has an embedding, else on the target itself
+        anchor = history.best_anchor_word() or target_word
+        
+        if len(self.hint_index) != len(self.embeddings):
+            with self._embedding_lock:
+                if len(self.hint_index) != len(self.embeddings):
+                    self.hint_index = HintIndex(self.embeddings)
+        
+        # A runtime guess vector may have been evicted since the guess was made
+        anchor_vector = self._vector(anchor)
+        if anchor_vector is None:
+            anchor, anchor_vector = target_word, self.embeddings[target_word]
+        neighbours = self.hint_index.query(anchor_vector, k, exclude=guessed | {target_word, anchor})
+        # Scored exactly as guessing the word would score it, so the panel agrees with guess results
+        scored = [(word, self._calculate_similarity(target_word, word)) for word, _ in neighbours]
+        scored.sort(key=lambda item: -item[1])
+        return {
+            "anchor": "target" if anchor == target_word else anchor,
+            "hints": [{"word": word, "similarity": similarity} for word, similarity in scored]
+        }
+    
+    def close(self) -> None:
+        """Write out anything still buffered, e.g. on shutdown."""
+        if self.guess_log is not None:
+            self.guess_log.close()
+        self.provider.close()
+    
+    def get_valid_words(self) -> Sequence[str]:
         """Return the list of valid words for hints."""
-        return ["espionage", "spy", "agent", "surveillance", "covert", "intelligence"]
\ No newline at end of file
+        return VALID_WORDS
+
+
+def build_shared_state() -> None:
+    """Rebuild the SHARED_STATE_DIR snapshot from scratch, e.g. once in the gunicorn master."""
+    service = WordGameService(sessions=MemorySessionStore(max_sessions=1), rebuild_shared=True)
+    service.close()
@@ -0,0 +1,87 @@
+import os
+import sys
+import threading
+import types
+import zlib
+
+import numpy as np
+import pytest
+
+# Tests import the backend packages the same way app.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings that would send the word game to the network or to shared files
+ENVIRONMENT = ("GEMINI_API_KEY", "EMBEDDING_PROVIDER", "EMBEDDING_FILE", "SHARED_STATE_DIR", "SESSION_STORE",
+               "WEB_CONCURRENCY", "SIMILARITY_CACHE_DB", "SIMILARITY_TABLE_DIR", "SIMILARITY_OVERRIDES",
+               "GUESS_LOG_PATH")
+
+
+@pytest.fixture(autouse=True)
+def isolated_environment(monkeypatch, tmp_path):
+    for name in ENVIRONMENT:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("EMBEDDING_CACHE_DIR", str(tmp_path / "embedding_cache"))
+
+
+class FakeGenai(types.ModuleType):
+    """Stand-in for ``google.generativeai`` with scripted failures and delays.
+
+    The first ``fail_first`` calls raise, each call sleeps ``delay`` seconds
+    (or blocks until ``release`` is set when ``hang`` is true), and words in
+    ``unknown`` are never embedded. Vectors are deterministic per word.
+    """
+
+    def __init__(self, fail_first=0, delay=0.0, hang=False, unknown=(), dim=8):
+        super().__init__("google.generativeai")
+        self.fail_first = fail_first
+        self.delay = delay
+        self.hang = hang
+        self.release = threading.Event()
+        self.unknown = set(unknown)
+        self.dim = dim
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def configure(self, api_key):
+        self.api_key = api_key
+
+    def vector(self, word):
+        return np.random.default_rng(zlib.crc32(word.encode())).standard_normal(self.dim).tolist()
+
+    def embed_content(self, model, content, task_type):
+        with self._lock:
+            self.calls.append(list(content))
+            attempt = len(self.calls)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            if self.hang:
+                self.release.wait()
+            elif self.delay:
+                self.release.wait(self.delay)
+            if attempt <= self.fail_first or self.unknown.intersection(content):
+                raise RuntimeError("503 Service Unavailable")
+            return {"embedding": [self.vector(word) for word in content]}
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+@pytest.fixture
+def fake_genai(monkeypatch):
+    """Install a FakeGenai as ``google.generativeai``; call it with FakeGenai options to replace it."""
+    installed = []
+
+    def install(**options):
+        fake = FakeGenai(**options)
+        monkeypatch.setitem(sys.modules, "google.generativeai", fake)
+        if "google" in sys.modules:
+            monkeypatch.setattr(sys.modules["google"], "generativeai", fake, raising=False)
+        installed.append(fake)
+        return fake
+
+    yield install
+    for fake in installed:
+        fake.release.set()
@@ -0,0 +1,57 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from routers import level_routes
+from services.level_services import LevelServices
+from services.progress_store import ProgressStore
+
+CIRCUIT = {"circuit_id": "circuit1", "sequence": ["NOT", "AND", "OR"]}
+
+
+@pytest.fixture
+def levels():
+    return LevelServices(warmup_mode="lazy", progress=ProgressStore())
+
+
+@pytest.fixture
+def post(levels):
+    app = FastAPI()
+    app.include_router(level_routes.router)
+    app.dependency_overrides[level_routes.get_service_instance] = lambda: levels
+
+    def post(body, **headers):
+        async def send():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                return await client.post("/batch/check", json=body, headers={"X-Player-ID": "ada", **headers})
+        return asyncio.run(send())
+
+    return post
+
+
+def test_items_default_to_the_calling_player(post, levels):
+    response = post({"circuits": [CIRCUIT, {**CIRCUIT, "player_id": "ada"}]})
+
+    assert response.status_code == 200
+    assert levels.progress.circuits("ada") == 1
+
+
+def test_batches_over_the_limit_are_rejected(post, monkeypatch):
+    monkeypatch.setattr(level_routes, "BATCH_MAX_ITEMS", 2)
+
+    assert post({"circuits": [CIRCUIT] * 2}).status_code == 200
+    assert post({"circuits": [CIRCUIT] * 2, "patterns": [{"answers": []}]}).status_code == 422
+
+
+def test_other_players_need_the_proctor_token(post, levels, monkeypatch):
+    body = {"circuits": [{**CIRCUIT, "player_id": "grace"}]}
+
+    assert post(body).status_code == 403
+    assert post(body, **{"X-Proctor-Token": ""}).status_code == 403
+
+    monkeypatch.setattr(level_routes, "PROCTOR_TOKEN", "s3cret")
+    assert post(body, **{"X-Proctor-Token": "guess"}).status_code == 403
+    assert post(body, **{"X-Proctor-Token": "s3cret"}).status_code == 200
+    assert levels.progress.circuits("grace") == 1
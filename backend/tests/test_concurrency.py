@@ -0,0 +1,71 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from services.executor import Coalescer
+from services.level_services import LevelServices
+from services.progress_store import ProgressStore
+
+CIRCUITS = {"circuit1": ["NOT", "AND", "OR"], "circuit2": ["NAND", "OR", "NOR"]}
+ACCESS_PATTERN_ANSWERS = ["Unauthorized", "Unauthorized", "Authorized", "Unauthorized"]
+
+
+def test_concurrent_solves_for_one_player_are_not_lost():
+    levels = LevelServices(warmup_mode="lazy", progress=ProgressStore())
+    barrier = threading.Barrier(4)
+
+    def solve(fn, *args):
+        barrier.wait()
+        return fn(*args)
+
+    for round_id in range(20):
+        player_id = f"player-{round_id}"
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            calls = [pool.submit(solve, levels.check_logic_gates, sequence, circuit_id, player_id)
+                     for circuit_id, sequence in CIRCUITS.items()]
+            calls.append(pool.submit(solve, levels.check_access_patterns, ACCESS_PATTERN_ANSWERS, player_id))
+            calls.append(pool.submit(solve, levels.check_solution, 1, player_id))
+            for call in calls:
+                call.result()
+
+        assert levels.get_completed_levels(player_id) == {1, 4, 5}
+        assert levels.check_logic_gates([], "circuit1", player_id)["all_circuits_solved"]
+
+
+def test_coalescer_shares_one_call_between_identical_requests():
+    calls = []
+    release = threading.Event()
+
+    def score(word):
+        calls.append(word)
+        release.wait(1.0)
+        return {"guess": word}
+
+    async def guess_together():
+        coalescer = Coalescer()
+        waiting = [asyncio.ensure_future(coalescer.run(("session", "spy"), score, "spy")) for _ in range(3)]
+        other = asyncio.ensure_future(coalescer.run(("session", "mole"), score, "mole"))
+        await asyncio.sleep(0.01)
+        # One caller going away does not cancel the shared call for the rest
+        waiting[0].cancel()
+        release.set()
+        results = await asyncio.gather(*waiting[1:], other)
+        return results, coalescer.coalesced, len(coalescer)
+
+    results, coalesced, in_flight = asyncio.run(guess_together())
+
+    assert sorted(calls) == ["mole", "spy"]
+    assert results == [{"guess": "spy"}, {"guess": "spy"}, {"guess": "mole"}]
+    assert coalesced == 2 and in_flight == 0
+
+
+def test_load_test_flow_loses_no_updates(monkeypatch):
+    # The simulated players share one address; the limiters are read when the routes are imported
+    monkeypatch.setenv("GUESS_SESSION_RATE_LIMIT", "0")
+    monkeypatch.setenv("GUESS_IP_RATE_LIMIT", "0")
+    from benchmarks.load_test import run
+
+    results = asyncio.run(run(players=10, guesses=3))
+
+    assert results["errors"] == 0
+    assert results["lost_updates"] == 0, results["lost_update_examples"]
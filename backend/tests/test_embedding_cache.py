@@ -0,0 +1,69 @@
+import json
+
+import numpy as np
+
+from services.embedding_cache import EmbeddingCache
+from services.embedding_store import EmbeddingStore
+
+
+def vectors(*words, dim=4):
+    return {word: np.arange(1, dim + 1, dtype=np.float32) * (i + 1) + i for i, word in enumerate(words)}
+
+
+def test_missing_cache_loads_as_none(tmp_path):
+    assert EmbeddingCache(str(tmp_path), "model").load() is None
+
+
+def test_saved_rows_are_normalized_and_memory_mapped(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "models/embedding-001")
+
+    store = cache.save(vectors("spy", "agent"))
+
+    assert store.words == ["spy", "agent"]
+    assert isinstance(store.matrix, np.memmap)
+    assert np.allclose(np.linalg.norm(store.matrix, axis=1), 1.0)
+
+
+def test_save_merges_new_words_and_keeps_existing_rows(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model")
+    first = np.array(cache.save(vectors("spy"))["spy"])
+
+    store = cache.save({**vectors("agent", "mole"), "spy": np.ones(4, dtype=np.float32)})
+
+    assert store.words == ["spy", "agent", "mole"]
+    assert np.array_equal(store["spy"], first)
+
+
+def test_a_new_vector_size_replaces_the_cache(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model")
+    cache.save(vectors("spy", "agent"))
+
+    store = cache.save(vectors("mole", dim=8))
+
+    assert store.words == ["mole"]
+    assert store.dim == 8
+
+
+def test_header_for_another_model_or_version_is_ignored(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model")
+    cache.save(vectors("spy"))
+    with open(cache.index_path) as f:
+        header = json.load(f)
+
+    for change in ({"model": "other"}, {"version": 0}, {"words": ["spy", "agent"]}):
+        with open(cache.index_path, "w") as f:
+            json.dump({**header, **change}, f)
+        assert cache.load() is None
+
+
+def test_load_or_build_builds_only_when_nothing_is_cached(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model")
+    builds = []
+
+    def build():
+        builds.append(1)
+        return EmbeddingStore.from_matrix(["spy"], np.array([[0.6, 0.8]], dtype=np.float32))
+
+    assert cache.load_or_build(build).words == ["spy"]
+    assert cache.load_or_build(build).words == ["spy"]
+    assert len(builds) == 1
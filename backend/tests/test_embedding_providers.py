@@ -0,0 +1,160 @@
+import asyncio
+import time
+
+import pytest
+
+from services import embedding_providers
+from services.embedding_providers import (EmbeddingBatcher, GeminiEmbeddingProvider, MockEmbeddingProvider,
+                                          create_embedding_provider)
+
+
+def make_provider(**options):
+    settings = dict(batch_size=10, max_concurrency=2, max_retries=2, backoff=0.0, timeout=1.0)
+    settings.update(options)
+    return GeminiEmbeddingProvider("test-key", **settings)
+
+
+def words(count):
+    return [f"word{i}" for i in range(count)]
+
+
+def test_retries_errors_until_a_call_succeeds(fake_genai):
+    genai = fake_genai(fail_first=2)
+    provider = make_provider()
+
+    vectors = provider.embed(words(5))
+
+    assert sorted(vectors) == sorted(words(5))
+    assert len(genai.calls) == 3
+
+
+def test_leaves_out_a_batch_that_fails_every_attempt(fake_genai):
+    genai = fake_genai(fail_first=100)
+    provider = make_provider(max_retries=2)
+
+    assert provider.embed(["spy"]) == {}
+    assert len(genai.calls) == 3
+
+
+def test_backoff_doubles_up_to_the_cap(fake_genai, monkeypatch):
+    fake_genai()
+    provider = make_provider(max_retries=5, backoff=0.5, max_backoff=2.0)
+    # Full jitter draws from [0, cap]; take the cap to see the schedule
+    monkeypatch.setattr(embedding_providers.random, "uniform", lambda low, high: high)
+
+    assert list(provider._delays()) == [0.5, 1.0, 2.0, 2.0, 2.0]
+
+
+def test_sleeps_between_retries(fake_genai, monkeypatch):
+    fake_genai(fail_first=2)
+    provider = make_provider(backoff=0.25)
+    sleeps = []
+    monkeypatch.setattr(embedding_providers.random, "uniform", lambda low, high: high)
+    monkeypatch.setattr(embedding_providers.time, "sleep", sleeps.append)
+
+    provider.embed(["spy"])
+
+    assert sleeps == [0.25, 0.5]
+
+
+def test_retries_a_call_that_times_out(fake_genai):
+    genai = fake_genai(delay=0.5)
+    provider = make_provider(max_retries=1, timeout=0.05)
+
+    start = time.perf_counter()
+    assert provider.embed(["spy"]) == {}
+    assert time.perf_counter() - start < 0.4
+    assert len(genai.calls) == 2
+
+
+def test_fails_fast_once_stuck_calls_hold_every_thread(fake_genai):
+    genai = fake_genai(hang=True)
+    provider = make_provider(max_concurrency=2, max_retries=1, timeout=0.02)
+
+    # Two batches of two attempts each strand all 2 * max_concurrency threads
+    provider.embed(words(20))
+    assert len(genai.calls) == 4
+
+    start = time.perf_counter()
+    assert provider.embed(["spy"]) == {}
+    assert time.perf_counter() - start < 0.02
+    assert len(genai.calls) == 4
+
+    # Threads come back as the stuck calls return
+    genai.hang = False
+    genai.release.set()
+    deadline = time.monotonic() + 1.0
+    while provider._running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert list(provider.embed(["spy"])) == ["spy"]
+
+
+def test_timeout_does_not_count_time_queued_behind_other_batches(fake_genai):
+    genai = fake_genai(delay=0.05)
+    provider = make_provider(batch_size=1, max_concurrency=2, max_retries=0, timeout=0.15)
+
+    # Six batches on two slots wait well past the timeout in total
+    assert sorted(provider.embed(words(6))) == sorted(words(6))
+    assert len(genai.calls) == 6
+
+
+def test_splits_words_into_batches_with_bounded_concurrency(fake_genai):
+    genai = fake_genai(delay=0.02)
+    provider = make_provider(batch_size=10, max_concurrency=3)
+
+    vectors = provider.embed(words(95) + ["word0"])
+
+    assert len(vectors) == 95
+    assert sorted(len(batch) for batch in genai.calls) == [5] + [10] * 9
+    assert genai.peak <= 3
+
+
+def test_aembed_batches_with_bounded_concurrency(fake_genai):
+    genai = fake_genai(delay=0.02)
+    provider = make_provider(batch_size=10, max_concurrency=3)
+
+    vectors = asyncio.run(provider.aembed(words(45)))
+
+    assert len(vectors) == 45
+    assert len(genai.calls) == 5
+    assert genai.peak <= 3
+
+
+def test_batcher_coalesces_concurrent_words_into_one_call(fake_genai):
+    genai = fake_genai()
+    provider = make_provider()
+    seen = []
+
+    async def guess_together():
+        batcher = EmbeddingBatcher(provider, window=0.01, on_result=lambda word, vector: seen.append(word))
+        return await asyncio.gather(*(batcher.submit(word) for word in ["spy", "mole", "spy"]))
+
+    spy, mole, spy_again = asyncio.run(guess_together())
+
+    assert genai.calls == [["spy", "mole"]]
+    assert spy is spy_again and mole is not None
+    assert sorted(seen) == ["mole", "spy"]
+
+
+def test_batcher_resolves_failed_words_to_none(fake_genai):
+    fake_genai(fail_first=100)
+    provider = make_provider(max_retries=0)
+
+    async def guess():
+        return await EmbeddingBatcher(provider, window=0.0).submit("spy")
+
+    assert asyncio.run(guess()) is None
+
+
+def test_uses_the_mock_provider_without_an_api_key():
+    provider = create_embedding_provider("espionage", {"spy": 90.0})
+
+    assert isinstance(provider, MockEmbeddingProvider)
+    assert not provider.semantic
+
+
+def test_gemini_needs_an_api_key(monkeypatch):
+    monkeypatch.setenv("EMBEDDING_PROVIDER", "gemini")
+
+    with pytest.raises(ValueError):
+        create_embedding_provider("espionage", {})
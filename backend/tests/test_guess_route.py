@@ -0,0 +1,59 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from routers import level_routes
+from services.level_services import LevelServices
+from services.progress_store import ProgressStore
+from services.rate_limiter import MemoryRateLimiter
+from services.word_game_services import WordGameService
+
+
+@pytest.fixture
+def genai(monkeypatch, fake_genai):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setenv("EMBEDDING_RETRIES", "0")
+    monkeypatch.setenv("GUESS_EMBEDDING_BATCH_WINDOW_SECONDS", "0")
+    for name in ("guess_session_limiter", "guess_ip_limiter", "embedding_session_limiter", "embedding_ip_limiter"):
+        monkeypatch.setattr(level_routes, name, None)
+    return fake_genai()
+
+
+@pytest.fixture
+def play(genai):
+    levels = LevelServices(warmup_mode="lazy", progress=ProgressStore())
+    levels._word_game_service = WordGameService()
+    app = FastAPI()
+    app.include_router(level_routes.router)
+    app.dependency_overrides[level_routes.get_service_instance] = lambda: levels
+
+    def play(*requests):
+        async def send():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                session_id = (await client.post("/word-game/start")).json()["session_id"]
+                return [(await client.post("/word-game/guess", json={"session_id": sid or session_id, "guess": guess}))
+                        .json() for sid, guess in requests]
+        genai.calls.clear()
+        return asyncio.run(send())
+
+    return play
+
+
+def embedded_words(genai):
+    return [word for batch in genai.calls for word in batch]
+
+
+def test_unknown_sessions_are_answered_before_anything_is_embedded(play, genai):
+    assert play(("made-up", "dossier")) == [{"error": "Invalid session ID"}]
+    assert genai.calls == []
+
+
+def test_guesses_past_the_session_cap_get_the_heuristic_score(play, genai, monkeypatch):
+    monkeypatch.setattr(level_routes, "embedding_session_limiter", MemoryRateLimiter(rate=0.001, burst=1.0))
+
+    dossier, sleeper = play((None, "dossier"), (None, "sleeper"))
+
+    assert embedded_words(genai) == ["dossier"]
+    assert "similarity" in dossier and "similarity" in sleeper
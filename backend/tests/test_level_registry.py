@@ -0,0 +1,104 @@
+import json
+import os
+
+import pytest
+
+from services.level_registry import (DEFAULT_LEVELS_CONFIG, AnswersValidator, CircuitValidator, LevelRegistry,
+                                     LevelSet)
+from services.progress_store import MAX_LEVEL_ID
+
+
+def write_config(path, levels, mtime=None):
+    with open(path, "w") as f:
+        json.dump({"version": 1, "levels": levels}, f)
+    if mtime is not None:
+        # Rewrites within one filesystem tick would otherwise keep the old mtime
+        os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def test_shipped_config_loads():
+    registry = LevelRegistry(DEFAULT_LEVELS_CONFIG, reload_seconds=0)
+
+    assert registry.total_levels == 8
+    assert registry.find("external").id == 3
+    assert isinstance(registry.find("circuits").validator, CircuitValidator)
+    assert isinstance(registry.find("answers").validator, AnswersValidator)
+
+
+@pytest.mark.parametrize("levels", [
+    [{"id": 0}],
+    [{"id": MAX_LEVEL_ID + 1}],
+    [{"id": 1}, {"id": 1}],
+    [{"id": 1, "validator": {"type": "riddle"}}],
+])
+def test_invalid_level_sets_are_rejected(levels):
+    with pytest.raises(ValueError):
+        LevelSet({"levels": levels})
+
+
+def test_first_level_of_each_type_serves_its_endpoint():
+    levels = LevelSet({"levels": [
+        {"id": 2, "validator": {"type": "answers", "answers": ["a"]}},
+        {"id": 5, "validator": {"type": "answers", "answers": ["b"]}},
+        {"id": 1},
+    ]})
+
+    assert levels.by_type["answers"].id == 2
+    assert levels.by_type["auto"].validator.completes_on_submit
+    assert levels.levels[1].name == "Level 1"
+    assert levels.total_levels == 5
+
+
+def test_circuit_validator_checks_sequences_and_assigns_bits_in_order():
+    validator = CircuitValidator({"circuits": {"first": ["NOT", "AND"], "second": ["OR"]}})
+
+    assert validator.check("first", ["NOT", "AND"])
+    assert not validator.check("first", ["AND", "NOT"])
+    assert not validator.check("missing", ["OR"])
+    assert validator.circuit_bits == {"first": 0b01, "second": 0b10}
+    assert validator.all_circuits_mask == 0b11
+
+
+def test_answers_validator_checks_the_whole_list():
+    validator = AnswersValidator({"answers": ["Authorized", "Unauthorized"]})
+
+    assert validator.check(["Authorized", "Unauthorized"])
+    assert not validator.check(["Authorized"])
+
+
+def test_reload_picks_up_a_changed_config(tmp_path):
+    path = write_config(tmp_path / "levels.json", [{"id": 1}], mtime=1000)
+    registry = LevelRegistry(path, reload_seconds=0)
+    assert not registry.reload()
+
+    write_config(path, [{"id": 1}, {"id": 2, "name": "Map"}], mtime=2000)
+
+    assert registry.reload()
+    assert registry.get(2).name == "Map"
+
+
+def test_invalid_config_keeps_the_previous_levels(tmp_path):
+    path = write_config(tmp_path / "levels.json", [{"id": 1}, {"id": 2}], mtime=1000)
+    registry = LevelRegistry(path, reload_seconds=0)
+
+    write_config(path, [{"id": 1}, {"id": 1}], mtime=2000)
+    assert not registry.reload()
+    with open(path, "w") as f:
+        f.write("{")
+    assert not registry.reload(force=True)
+    os.remove(path)
+    assert not registry.reload(force=True)
+
+    assert [level["id"] for level in registry.describe()] == [1, 2]
+
+
+def test_levels_are_rechecked_after_the_reload_interval(tmp_path, monkeypatch):
+    path = write_config(tmp_path / "levels.json", [{"id": 1}], mtime=1000)
+    registry = LevelRegistry(path, reload_seconds=60)
+    write_config(path, [{"id": 1}, {"id": 2}], mtime=2000)
+
+    monkeypatch.setattr("services.level_registry.time.monotonic", lambda: 30.0)
+    assert registry.total_levels == 1
+    monkeypatch.setattr("services.level_registry.time.monotonic", lambda: 61.0)
+    assert registry.total_levels == 2
@@ -0,0 +1,37 @@
+import threading
+
+from services.metrics import Registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Registry().histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, route="/guess")
+
+    lines = histogram.render()
+
+    assert 'latency_seconds_bucket{route="/guess",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/guess",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{route="/guess"} 3' in lines
+
+
+def test_histogram_renders_while_new_label_sets_are_observed():
+    histogram = Registry().histogram("latency_seconds", "Latency.", ("route",))
+    stop = threading.Event()
+
+    def observe():
+        for route in range(500):
+            if stop.is_set():
+                return
+            histogram.observe(0.01, route=str(route))
+
+    thread = threading.Thread(target=observe)
+    thread.start()
+    try:
+        for _ in range(20):
+            lines = histogram.render()
+            counts = [line for line in lines if line.startswith("latency_seconds_count")]
+            assert all(line.endswith(" 1") for line in counts)
+    finally:
+        stop.set()
+        thread.join()
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from routers import level_routes
+from services.level_services import LevelServices
+from services.progress_store import ProgressStore
+
+
+@pytest.fixture
+def levels():
+    return LevelServices(warmup_mode="lazy", progress=ProgressStore())
+
+
+def open_stream(levels):
+    return level_routes.stream_events(player_id="ada", limit=10, header_player_id="ada", level_service=levels)
+
+
+def test_stream_subscribes_while_open_and_unsubscribes_on_close(levels):
+    async def scenario():
+        response = await open_stream(levels)
+        subscribers = [len(levels.events)]
+        first = await response.body_iterator.__anext__()
+        subscribers.append(len(levels.events))
+        await response.body_iterator.aclose()
+        subscribers.append(len(levels.events))
+        return first, subscribers
+
+    first, subscribers = asyncio.run(scenario())
+
+    assert first.startswith("event: progress")
+    assert subscribers == [0, 1, 0]
+
+
+def test_failed_snapshot_leaves_no_subscriber(levels, monkeypatch):
+    def fail(player_id):
+        raise RuntimeError("progress database unavailable")
+
+    monkeypatch.setattr(levels, "progress_snapshot", fail)
+
+    async def scenario():
+        response = await open_stream(levels)
+        with pytest.raises(RuntimeError):
+            await response.body_iterator.__anext__()
+
+    asyncio.run(scenario())
+    assert len(levels.events) == 0
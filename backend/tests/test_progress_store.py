@@ -0,0 +1,144 @@
+import sqlite3
+import uuid
+
+import pytest
+
+from services.progress_store import (CIRCUIT_SHIFT, MAX_LEVEL_ID, ProgressStore, _merge_deltas, decode_levels,
+                                     level_bit, valid_level_id)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "progress.db")
+
+
+@pytest.fixture
+def open_store(db_path):
+    """Factory for database-backed stores (one per simulated worker) that flush only when told to."""
+    stores = []
+
+    def open_store(**options):
+        store = ProgressStore(db_path, flush_interval=3600, **options)
+        stores.append(store)
+        return store
+
+    yield open_store
+    for store in stores:
+        store.close()
+
+
+def stored_state(db_path, player_id):
+    row = sqlite3.connect(db_path).execute("SELECT state FROM progress WHERE player_id = ?", (player_id,)).fetchone()
+    return row[0] if row else None
+
+
+def test_level_bits_cover_level_ids_below_the_circuit_bits():
+    assert level_bit(1) == 1
+    assert level_bit(MAX_LEVEL_ID) == 1 << (CIRCUIT_SHIFT - 1)
+    assert not valid_level_id(0) and not valid_level_id(MAX_LEVEL_ID + 1)
+    with pytest.raises(ValueError):
+        level_bit(MAX_LEVEL_ID + 1)
+    assert decode_levels(level_bit(1) | level_bit(3) | level_bit(8)) == (1, 3, 8)
+
+
+def test_merged_deltas_match_applying_them_in_order():
+    first, then = (0b0011, 0b0100), (0b0100, 0b0001)
+    merged = _merge_deltas(first, then)
+    for state in range(16):
+        in_order = (((state | first[0]) & ~first[1]) | then[0]) & ~then[1]
+        assert (state | merged[0]) & ~merged[1] == in_order
+
+
+def test_levels_and_circuits_share_one_state():
+    store = ProgressStore()
+
+    store.update("ada", set_levels=level_bit(1) | level_bit(2), set_circuits=0b101)
+    store.update("ada", clear_levels=level_bit(1), clear_circuits=0b001)
+
+    assert store.levels("ada") == level_bit(2)
+    assert store.circuits("ada") == 0b100
+
+
+def test_reads_of_unknown_players_are_not_cached(open_store):
+    for store in (ProgressStore(), open_store()):
+        for _ in range(5):
+            assert store.get(str(uuid.uuid4())) == 0
+        assert len(store) == 0
+
+
+def test_flush_merges_each_workers_bits_in_sql(db_path, open_store):
+    first, second = open_store(), open_store()
+    first.update("ada", set_levels=level_bit(1) | level_bit(2))
+    first.flush()
+
+    # Both workers change the player before either sees the other's write
+    second.get("ada")
+    first.update("ada", clear_levels=level_bit(1))
+    second.update("ada", set_levels=level_bit(3))
+    first.flush()
+    second.flush()
+
+    assert stored_state(db_path, "ada") == level_bit(2) | level_bit(3)
+
+
+def test_failed_flush_keeps_the_deltas_for_the_next_one(db_path, open_store):
+    store = open_store()
+    store.update("ada", set_levels=level_bit(1))
+    connection = store._connection()
+
+    class Failing:
+        def executemany(self, *args):
+            raise sqlite3.OperationalError("database is locked")
+
+    store._local.conn = Failing()
+    with pytest.raises(sqlite3.Error):
+        store.flush()
+    store.update("ada", set_levels=level_bit(2))
+    store._local.conn = connection
+
+    assert store.flush() == 1
+    assert stored_state(db_path, "ada") == level_bit(1) | level_bit(2)
+
+
+def test_cache_keeps_the_most_recently_loaded_players(db_path, open_store):
+    writer = open_store()
+    for player_id in ("a", "b", "c"):
+        writer.update(player_id, set_levels=level_bit(1))
+    writer.flush()
+
+    store = open_store(max_cached=2)
+    for player_id in ("a", "b", "c"):
+        store.get(player_id)
+
+    assert len(store) == 2
+    assert "a" not in store._state
+    assert store.levels("a") == level_bit(1)
+
+
+def test_players_with_unflushed_changes_are_never_evicted(db_path, open_store):
+    store = open_store(max_cached=1)
+    store.update("a", set_levels=level_bit(1))
+    store.update("b", set_levels=level_bit(2))
+    store.flush()
+    store.update("a", set_levels=level_bit(3))
+    store.get("b")
+
+    assert store.levels("a") == level_bit(1) | level_bit(3)
+    store.flush()
+    assert stored_state(db_path, "a") == level_bit(1) | level_bit(3)
+
+
+def test_listeners_get_no_old_state_for_players_reloaded_after_eviction(open_store):
+    writer = open_store()
+    writer.update("a", set_levels=level_bit(1))
+    writer.update("b", set_levels=level_bit(1))
+    writer.flush()
+    store = open_store(max_cached=1)
+    changes = []
+    store.add_listener(lambda player_id, old, new: changes.append((player_id, old, new)))
+
+    store.get("a")
+    store.get("b")
+    store.get("a")
+
+    assert changes == [("a", None, 1), ("b", None, 1), ("a", None, 1)]
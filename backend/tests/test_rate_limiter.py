@@ -0,0 +1,116 @@
+import sqlite3
+
+import pytest
+
+from services import rate_limiter
+from services.rate_limiter import MemoryRateLimiter, SQLiteRateLimiter, create_rate_limiter
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock)
+    monkeypatch.setattr(rate_limiter.time, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_limiter(request, tmp_path):
+    def make_limiter(rate, burst, scope="guess_session"):
+        if request.param == "memory":
+            return MemoryRateLimiter(rate, burst)
+        return SQLiteRateLimiter(rate, burst, str(tmp_path / "rate_limits.db"), scope)
+    return make_limiter
+
+
+def test_burst_then_retry_after_the_refill_time(make_limiter, clock):
+    limiter = make_limiter(rate=2.0, burst=3.0)
+
+    assert [limiter.allow("a")[0] for _ in range(3)] == [True, True, True]
+    assert limiter.allow("a") == (False, 0.5)
+    # Other keys have buckets of their own
+    assert limiter.allow("b") == (True, 0.0)
+
+
+def test_tokens_refill_with_time_up_to_the_burst(make_limiter, clock):
+    limiter = make_limiter(rate=1.0, burst=2.0)
+    limiter.allow("a", cost=2.0)
+
+    clock.now += 1.0
+    assert limiter.allow("a") == (True, 0.0)
+    assert not limiter.allow("a")[0]
+
+    clock.now += 60.0
+    assert [limiter.allow("a")[0] for _ in range(3)] == [True, True, False]
+
+
+def test_rejected_requests_take_no_tokens(make_limiter, clock):
+    limiter = make_limiter(rate=1.0, burst=1.0)
+    limiter.allow("a")
+    for _ in range(5):
+        limiter.allow("a")
+
+    clock.now += 1.0
+    assert limiter.allow("a")[0]
+
+
+def test_memory_limiter_forgets_the_least_recently_used_keys(clock):
+    limiter = MemoryRateLimiter(rate=1.0, burst=1.0, max_keys=2)
+    for key in ("a", "b", "c"):
+        limiter.allow(key)
+
+    # "a" was dropped and comes back with a full bucket
+    assert limiter.allow("a")[0]
+    assert not limiter.allow("c")[0]
+
+
+def test_sqlite_buckets_are_shared_between_workers_per_scope(tmp_path, clock):
+    path = str(tmp_path / "rate_limits.db")
+    first, second = (SQLiteRateLimiter(1.0, 2.0, path, "guess_session") for _ in range(2))
+    other_scope = SQLiteRateLimiter(1.0, 2.0, path, "guess_ip")
+
+    assert first.allow("a")[0] and second.allow("a")[0]
+    assert not first.allow("a")[0]
+    assert other_scope.allow("a")[0]
+
+
+def test_sqlite_limiter_fails_open_while_the_database_is_locked(tmp_path, clock):
+    path = str(tmp_path / "rate_limits.db")
+    limiter = SQLiteRateLimiter(1.0, 1.0, path, "guess_session")
+    limiter._connection().execute("PRAGMA busy_timeout = 50")
+    limiter.allow("a")
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+
+    assert limiter.allow("a") == (True, 0.0)
+
+    other.execute("ROLLBACK")
+    assert not limiter.allow("a")[0]
+
+
+def test_create_rate_limiter_reads_the_scope_settings(monkeypatch, tmp_path):
+    monkeypatch.setenv("GUESS_SESSION_RATE_LIMIT", "3")
+    monkeypatch.setenv("GUESS_SESSION_RATE_BURST", "6")
+
+    limiter = create_rate_limiter("guess_session", default_rate=5.0, default_burst=10.0)
+    assert isinstance(limiter, MemoryRateLimiter)
+    assert (limiter.rate, limiter.burst) == (3.0, 6.0)
+
+    monkeypatch.setenv("RATE_LIMIT_BACKEND", "sqlite")
+    monkeypatch.setenv("RATE_LIMIT_DB_PATH", str(tmp_path / "rate_limits.db"))
+    assert isinstance(create_rate_limiter("guess_ip", 5.0, 10.0), SQLiteRateLimiter)
+
+    monkeypatch.setenv("GUESS_SESSION_RATE_LIMIT", "0")
+    assert create_rate_limiter("guess_session", 5.0, 10.0) is None
+
+    monkeypatch.setenv("RATE_LIMIT_BACKEND", "redis")
+    with pytest.raises(ValueError):
+        create_rate_limiter("guess_ip", 5.0, 10.0)
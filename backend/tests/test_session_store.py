@@ -0,0 +1,128 @@
+import sqlite3
+import threading
+
+import pytest
+
+from services import session_store
+from services.session_store import MemorySessionStore, SessionStoreBusy, SQLiteSessionStore
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(session_store.time, "monotonic", clock)
+    monkeypatch.setattr(session_store.time, "time", clock)
+    return clock
+
+
+def test_memory_store_evicts_the_least_recently_used_session(clock):
+    store = MemorySessionStore(max_sessions=2)
+    store.set("a", {"n": 1})
+    store.set("b", {"n": 2})
+    store.get("a")
+
+    store.set("c", {"n": 3})
+
+    assert "a" in store and "c" in store
+    assert store.get("b") is None
+
+
+def test_memory_store_expires_idle_sessions_and_slides_on_access(clock):
+    store = MemorySessionStore(ttl_seconds=60)
+    store.set("idle", {})
+    store.set("active", {})
+
+    clock.now += 45
+    store.get("active")
+    clock.now += 30
+
+    assert store.get("idle") is None
+    assert store.get("active") == {}
+
+
+def test_memory_store_update_applies_and_returns(clock):
+    store = MemorySessionStore()
+    store.set("a", {"guesses": []})
+
+    assert store.update("a", lambda session: session["guesses"].append("spy") or "done") == "done"
+    assert store.get("a") == {"guesses": ["spy"]}
+    assert store.update("missing", lambda session: "never") is None
+
+
+def test_sqlite_store_round_trips_through_to_json(tmp_path):
+    class History:
+        def to_json(self):
+            return {"words": ["spy"]}
+
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    store.set("a", {"target_word": "espionage", "guesses": History()})
+
+    assert store.get("a") == {"target_word": "espionage", "guesses": {"words": ["spy"]}}
+    assert len(store) == 1
+
+
+def test_sqlite_store_expires_sessions(tmp_path, clock):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl_seconds=60)
+    store.set("a", {})
+
+    clock.now += 61
+
+    assert store.get("a") is None
+    assert store.update("a", lambda session: "never") is None
+    assert len(store) == 0
+
+
+def test_sqlite_updates_from_many_threads_are_not_lost(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    SQLiteSessionStore(path).set("a", {"count": 0})
+
+    def add(count):
+        # A store per thread, like a worker process each
+        store = SQLiteSessionStore(path)
+        for _ in range(count):
+            store.update("a", lambda session: session.update(count=session["count"] + 1))
+
+    threads = [threading.Thread(target=add, args=(25,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert SQLiteSessionStore(path).get("a") == {"count": 100}
+
+
+def test_sqlite_update_raises_busy_while_another_worker_holds_the_lock(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    store = SQLiteSessionStore(path)
+    store.set("a", {"count": 0})
+    store._connection().execute("PRAGMA busy_timeout = 50")
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+
+    with pytest.raises(SessionStoreBusy):
+        store.update("a", lambda session: session.update(count=1))
+
+    other.execute("ROLLBACK")
+    assert store.update("a", lambda session: session.update(count=1)) is None
+    assert store.get("a") == {"count": 1}
+
+
+def test_sqlite_update_rolls_back_when_fn_raises(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    store.set("a", {"count": 0})
+
+    def fail(session):
+        session["count"] = 1
+        raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        store.update("a", fail)
+    assert store.get("a") == {"count": 0}
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from services.embedding_cache import EmbeddingCache
+from services.word_game_services import WordGameService
+
+
+@pytest.fixture
+def gemini(monkeypatch, fake_genai):
+    """Configure the word game for Gemini; returns fake_genai to script the API."""
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setenv("EMBEDDING_RETRIES", "0")
+    monkeypatch.setenv("EMBEDDING_BACKOFF_SECONDS", "0")
+    monkeypatch.setenv("GUESS_EMBEDDINGS", "0")
+    return fake_genai
+
+
+def fetched_words(genai):
+    return [word for batch in genai.calls for word in batch]
+
+
+def test_cold_cache_fetches_the_vocabulary_and_saves_it(gemini):
+    genai = gemini()
+
+    service = WordGameService()
+
+    cache = EmbeddingCache(service.embedding_cache_dir, service.provider.name).load()
+    assert cache is not None
+    assert sorted(fetched_words(genai)) == sorted(cache.words) == sorted(service.embeddings.words)
+    spy = np.asarray(genai.vector("spy"))
+    assert np.allclose(service.embeddings["spy"], spy / np.linalg.norm(spy))
+
+
+def test_warm_cache_needs_no_api_calls(gemini):
+    gemini()
+    WordGameService()
+    genai = gemini()
+
+    service = WordGameService()
+
+    assert genai.calls == []
+    assert "spy" in service.embeddings
+
+
+def test_partial_cache_fetches_only_missing_words(gemini):
+    gemini()
+    WordGameService()
+    genai = gemini()
+
+    service = WordGameService()
+    service.add_vocabulary(["spy", "dossier"])
+
+    assert fetched_words(genai) == ["dossier"]
+    assert "dossier" in EmbeddingCache(service.embedding_cache_dir, service.provider.name).load()
+
+
+def test_words_the_api_cannot_embed_fall_back_to_mock_vectors(gemini, monkeypatch):
+    monkeypatch.setenv("EMBEDDING_BATCH_SIZE", "1")
+    gemini(unknown={"spy"})
+
+    service = WordGameService()
+
+    assert "spy" in service.embeddings
+    cached = EmbeddingCache(service.embedding_cache_dir, service.provider.name).load()
+    assert "spy" not in cached and "agent" in cached
+
+
+def test_api_outage_falls_back_to_mock_vectors_for_everything(gemini):
+    gemini(fail_first=10 ** 6)
+
+    service = WordGameService()
+
+    assert len(service.embeddings) == len(service.similarity_matrix)
+    assert service.check_guess(service.start_game()["session_id"], "spy")["similarity"] == 90.0
+
+
+def test_stand_in_scores_are_not_cached_until_the_guess_vector_arrives(gemini, monkeypatch):
+    monkeypatch.setenv("GUESS_EMBEDDINGS", "1")
+    genai = gemini()
+    service = WordGameService()
+    key = (service.provider.name, "espionage", "dossier")
+
+    service._calculate_similarity("espionage", "dossier")
+    assert service.similarity_cache.get(key) is None
+
+    service._remember_guess_vector("dossier", np.asarray(genai.vector("dossier"), dtype=np.float32))
+    score = service._calculate_similarity("espionage", "dossier")
+    assert service.similarity_cache.get(key) == score
+
+
+def test_recalibrated_overrides_win_over_shared_cached_scores(tmp_path, monkeypatch):
+    monkeypatch.setenv("SIMILARITY_CACHE_DB", str(tmp_path / "similarity.db"))
+    before = WordGameService()._calculate_similarity("espionage", "dossier")
+    overrides = tmp_path / "overrides.json"
+    overrides.write_text('{"espionage": {"dossier": 77.5}}')
+    monkeypatch.setenv("SIMILARITY_OVERRIDES", str(overrides))
+
+    # A worker started after the recalibration shares the cache the old scores went into
+    service = WordGameService()
+
+    assert before != 77.5
+    assert service._calculate_similarity("espionage", "Dossier ") == 77.5
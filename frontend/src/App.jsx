@@ -14,6 +14,15 @@ import axios from "axios";
 import { API_BASE_URL } from "./config";
 import './index.css';
 
+// Identify the team to the backend so progress is tracked per player
+const setPlayerId = (loginData) => {
+  if (loginData?.teamName) {
+    axios.defaults.headers.common["X-Player-ID"] = loginData.teamName;
+  } else {
+    delete axios.defaults.headers.common["X-Player-ID"];
+  }
+};
+
 function App() {
   const [currentLevel, setCurrentLevel] = useState(1);
   const [completedLevels, setCompletedLevels] = useState([]);
@@ -28,6 +37,7 @@ function App() {
     if (storedLoginData) {
       try {
         const loginData = JSON.parse(storedLoginData);
+        setPlayerId(loginData);
         setUser(loginData);
         setIsLoggedIn(true);
       } catch (error) {
@@ -38,32 +48,54 @@ function App() {
     fetchLevelStatus();
   }, []);
   
+  // Progress is pushed over Server-Sent Events; a slow poll of /levels backs it up
+  // for reconnects and browsers without EventSource
+  useEffect(() => {
+    if (!user?.teamName) return;
+    const poll = setInterval(fetchLevelStatus, 30000);
+    if (typeof EventSource === "undefined") return () => clearInterval(poll);
+    const events = new EventSource(`${API_BASE_URL}/events?player_id=${encodeURIComponent(user.teamName)}`);
+    events.addEventListener("progress", (event) => {
+      try {
+        applyLevelStatus(JSON.parse(event.data));
+      } catch (error) {
+        // Ignore malformed events
+      }
+    });
+    return () => {
+      clearInterval(poll);
+      events.close();
+    };
+  }, [user]);
+  
   const fetchLevelStatus = async () => {
     try {
       const response = await axios.get(`${API_BASE_URL}/levels`);
-      
-      // Set completed levels
-      const backendCompleted = response.data.completed || [];
-      setCompletedLevels(backendCompleted);
-      
-      // Set available levels - ensure we have at least level 1
-      const backendAvailable = response.data.available || [];
-      const availableLevelsSet = new Set([1, ...backendAvailable]);
-      
-      // Make sure all levels up to current level and completed levels are available
-      backendCompleted.forEach(level => {
-        availableLevelsSet.add(level);
-        if (level < 8) availableLevelsSet.add(level + 1);
-      });
-      
-      setAvailableLevels(Array.from(availableLevelsSet).sort((a, b) => a - b));
-      
+      applyLevelStatus(response.data);
     } catch (error) {
       // Use default values if API fails
       setAvailableLevels([1]);
     }
   };
   
+  const applyLevelStatus = (data) => {
+    // Set completed levels
+    const backendCompleted = data.completed || [];
+    setCompletedLevels(backendCompleted);
+    
+    // Set available levels - ensure we have at least level 1
+    const backendAvailable = data.available || [];
+    const availableLevelsSet = new Set([1, ...backendAvailable]);
+    
+    // Make sure all levels up to current level and completed levels are available
+    backendCompleted.forEach(level => {
+      availableLevelsSet.add(level);
+      if (level < 8) availableLevelsSet.add(level + 1);
+    });
+    
+    setAvailableLevels(Array.from(availableLevelsSet).sort((a, b) => a - b));
+  };
+  
   const handleLevelComplete = async (levelId) => {
     try {
       // Add the completed level to the completed levels array
@@ -126,6 +158,7 @@ function App() {
   };
 
   const handleLogin = (loginData) => {
+    setPlayerId(loginData);
     setUser(loginData);
     setIsLoggedIn(true);
     
@@ -145,6 +178,7 @@ function App() {
   
   const handleLogout = () => {
     localStorage.removeItem('datahuntLogin');
+    setPlayerId(null);
     setUser(null);
     setIsLoggedIn(false);
     setGameCompleted(false);